@@ -0,0 +1,35 @@
+"""Runtime helpers for validating Notecard API transactions against these schemas.
+
+Importing the package is cheap: schemas are only read, and jsonschema only
+imported, when they are first used.
+
+    from notecard_schema import get_request_schema, get_validator
+
+    get_validator("note.add").is_valid({"req": "note.add", "body": {"temp": 21.5}})
+"""
+
+import importlib
+
+from .loader import get_request_schema, get_response_schema
+
+# Public names defined in submodules that import jsonschema, loaded on first access.
+_LAZY = {
+    "Dispatcher": "dispatch",
+    "SchemaValidator": "validator",
+    "get_validator": "validator",
+}
+
+__all__ = ["Dispatcher", "SchemaValidator", "get_request_schema", "get_response_schema", "get_validator"]
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
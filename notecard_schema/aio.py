@@ -0,0 +1,188 @@
+"""
+asyncio facade over the request dispatcher.
+
+Hosts that drive many Notecards from one event loop should not spend loop
+time materializing jsonschema errors for a large `hub.set` or `card.aux`.
+`AsyncValidator` queues validations made during one loop iteration and
+checks them in batches, scheduled on the loop rather than run inline:
+
+- while the current pass of the event loop stays within the latency
+  budget, requests are checked on the loop with the compiled `is_valid`,
+  which takes microseconds and is cheaper than a hop to another thread;
+- whatever is left once the budget is spent is checked on a dedicated
+  single-thread executor;
+- errors for invalid requests are always built on the executor.
+
+The budget is shared by every batch flushed in one pass of the loop, so
+however many validations are queued, the loop is not held much longer
+than the budget.
+
+An `AsyncValidator` belongs to the event loop it is first used on.
+"""
+
+import asyncio
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Iterable, List, Optional, Tuple
+
+from jsonschema.exceptions import ValidationError
+
+from .dispatch import Dispatcher
+
+DEFAULT_LATENCY_BUDGET_MS = 1.0
+DEFAULT_MAX_BATCH = 256
+
+
+class AsyncValidator:
+    """Micro-batches validations from an asyncio event loop."""
+
+    def __init__(self, dispatcher: Optional[Dispatcher] = None,
+                 latency_budget_ms: float = DEFAULT_LATENCY_BUDGET_MS,
+                 max_batch: int = DEFAULT_MAX_BATCH, executor: Optional[Executor] = None):
+        """Create an async validator.
+
+        Args:
+            dispatcher: The request dispatcher to validate with, warmed
+                here. Defaults to the shared unscoped dispatcher.
+            latency_budget_ms: Most time, in milliseconds, a batch may spend
+                validating on the event loop before the rest is offloaded.
+                Zero offloads every check.
+            max_batch: Number of queued validations that are scheduled as
+                a batch without waiting for the end of the loop iteration.
+            executor: Executor for offloaded work. A dedicated single-thread
+                executor is created, and shut down by `close`, when omitted.
+        """
+        if dispatcher is None:
+            from .scoping import validator_for
+            dispatcher = validator_for()
+        if latency_budget_ms < 0:
+            raise ValueError("latency_budget_ms must not be negative")
+        if max_batch <= 0:
+            raise ValueError("max_batch must be positive")
+        # Compiling a validator on first use would block the loop.
+        self.dispatcher = dispatcher.warm()
+        self.latency_budget = latency_budget_ms / 1000
+        self.max_batch = max_batch
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._pending: List[Tuple[Any, asyncio.Future]] = []
+        self._handle: Optional[asyncio.Handle] = None
+        # End of the latency budget of the current loop pass, or None between passes.
+        self._deadline: Optional[float] = None
+
+    @property
+    def executor(self) -> Executor:
+        """The executor offloaded work runs on, created on first use."""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="notecard-schema")
+        return self._executor
+
+    def _submit(self, instance: Any) -> asyncio.Future:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((instance, future))
+        if len(self._pending) >= self.max_batch:
+            # Never check inline: the caller may be queueing many more.
+            batch, self._pending = self._pending, []
+            loop.call_soon(self._check, batch)
+        elif self._handle is None:
+            self._handle = loop.call_soon(self._flush)
+        return future
+
+    def _flush(self) -> None:
+        self._handle = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self._check(batch)
+
+    def _end_pass(self) -> None:
+        self._deadline = None
+
+    def _check(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        if self._deadline is None:
+            self._deadline = time.perf_counter() + self.latency_budget
+            asyncio.get_running_loop().call_soon(self._end_pass)
+        is_valid = self.dispatcher.is_valid
+        for index, (instance, future) in enumerate(batch):
+            if time.perf_counter() >= self._deadline:
+                self._offload(batch[index:])
+                return
+            if not future.done():
+                try:
+                    future.set_result(is_valid(instance))
+                except Exception as e:
+                    future.set_exception(e)
+
+    def _offload(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        is_valid = self.dispatcher.is_valid
+        instances = [instance for instance, _ in batch]
+        results = asyncio.get_running_loop().run_in_executor(
+            self.executor, lambda: [is_valid(instance) for instance in instances])
+
+        def resolve(results):
+            for index, (_, future) in enumerate(batch):
+                if future.done():
+                    continue
+                if results.cancelled():
+                    # exception() would raise CancelledError here.
+                    future.cancel()
+                elif results.exception() is not None:
+                    future.set_exception(results.exception())
+                else:
+                    future.set_result(results.result()[index])
+
+        results.add_done_callback(resolve)
+
+    async def is_valid(self, instance: Any) -> bool:
+        """Return True if the instance is valid under notecard.api.json."""
+        return await self._submit(instance)
+
+    async def validate_many(self, instances: Iterable[Any]) -> List[Optional[ValidationError]]:
+        """Return the most relevant error for each instance, or None for valid ones.
+
+        The instances are queued `max_batch` at a time, yielding to the loop
+        in between; errors are built on the executor.
+        """
+        instances = list(instances)
+        chunks = []
+        for start in range(0, len(instances), self.max_batch):
+            chunks.append([self._submit(instance) for instance in instances[start:start + self.max_batch]])
+            await asyncio.sleep(0)
+        # Indexes of the invalid instances, collected a chunk at a time.
+        invalid = []
+        for index, chunk in enumerate(chunks):
+            start = index * self.max_batch
+            valid = await asyncio.gather(*chunk)
+            invalid.extend(start + offset for offset, ok in enumerate(valid) if not ok)
+            # Free each chunk's futures now rather than all at once on return.
+            chunks[index] = None
+        results: List[Optional[ValidationError]] = [None] * len(instances)
+        if not invalid:
+            return results
+        best_error = self.dispatcher.best_error
+        errors = await asyncio.get_running_loop().run_in_executor(
+            self.executor, lambda: [best_error(instances[index]) for index in invalid])
+        for index, error in zip(invalid, errors):
+            results[index] = error
+        return results
+
+    async def validate(self, instance: Any) -> None:
+        """Raise the most relevant ValidationError if the instance is invalid."""
+        if await self.is_valid(instance):
+            return
+        error = await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.dispatcher.best_error, instance)
+        if error is not None:
+            raise error
+
+    def close(self) -> None:
+        """Shut down the executor if this validator created it."""
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def __aenter__(self) -> "AsyncValidator":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        self.close()
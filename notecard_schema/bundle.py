@@ -0,0 +1,215 @@
+"""
+Bundling of every Notecard API schema into one self-contained file.
+
+`notecard.api.json` refers to each request schema by its absolute
+`raw.githubusercontent.com` URL, so validating against it means fetching
+those URLs or building a `referencing.Registry` by hand. `build_bundle`
+produces a single schema instead:
+
+- the `title`, `version` and other top-level fields of notecard.api.json;
+- every request and response schema, and notecard.codes.json, under
+  `$defs`, keyed by filename without `.notecard.api.json` / `.json`
+  (`card.time.req`, `card.time.rsp`, `notecard.codes`), with their own
+  `$schema` and `$id` removed so they are plain subschemas of the bundle;
+- every `$ref`, and every `codeRef` annotation, rewritten to a local JSON
+  pointer such as `#/$defs/card.time.req`.
+
+The result loads with one file read and validates with any Draft 2020-12
+validator, no registry needed.
+
+`write_binary_bundle` also stores the parsed bundle next to it as
+`notecard.api.bundle.marshal`, which loads several times faster than the
+JSON. Its header records the format version, the Python bytecode magic
+number and the size, modification time and SHA-256 of the JSON it was made
+from; `load_bundle` uses it only while all of them still match, and
+otherwise parses the JSON.
+
+Usage: python -m notecard_schema.bundle --output notecard.api.bundle.json --binary
+"""
+
+import argparse
+import hashlib
+import importlib.util
+import json
+import marshal
+import os
+import struct
+import tempfile
+from typing import Any, Dict, Optional
+
+from .loader import INDEX_FILE, SCHEMA_DIR, api_name, load_schema, ref_filename, request_filenames, response_filename
+
+BUNDLE_FILE = "notecard.api.bundle.json"
+CODES_FILE = "notecard.codes.json"
+
+BINARY_SUFFIX = ".marshal"
+BINARY_MAGIC = b"NCSB"
+BINARY_FORMAT = 1
+# magic, format, Python bytecode magic, JSON size, JSON mtime (ns), JSON SHA-256.
+_BINARY_HEADER = struct.Struct("<4sH4sQQ32s")
+
+# Annotation keywords whose values are lists of references.
+REFERENCE_LIST_KEYWORDS = ("codeRef",)
+
+
+def def_name(filename: str) -> str:
+    """Return the `$defs` key a schema file is bundled under."""
+    for suffix in (".notecard.api.json", ".json"):
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return filename
+
+
+def _local_ref(ref: str, bundled: Dict[str, str]) -> str:
+    filename = ref_filename(ref)
+    if filename not in bundled:
+        raise ValueError(f"Cannot bundle reference to {ref!r}: {filename} is not a bundled schema")
+    fragment = ref.split('#', 1)[1] if '#' in ref else ""
+    if fragment and not fragment.startswith('/'):
+        raise ValueError(f"Cannot bundle reference to {ref!r}: only JSON pointer fragments are supported")
+    return f"#/$defs/{bundled[filename]}{fragment}"
+
+
+def _rewrite(node: Any, bundled: Dict[str, str]) -> Any:
+    """Return a copy of a schema with references to bundled files made local."""
+    if isinstance(node, list):
+        return [_rewrite(item, bundled) for item in node]
+    if not isinstance(node, dict):
+        return node
+    result = {}
+    for key, value in node.items():
+        if key == "$ref" and isinstance(value, str) and not value.startswith('#'):
+            result[key] = _local_ref(value, bundled)
+        elif key in REFERENCE_LIST_KEYWORDS and isinstance(value, list):
+            result[key] = [_local_ref(item, bundled) if isinstance(item, str) else item for item in value]
+        else:
+            result[key] = _rewrite(value, bundled)
+    return result
+
+
+def build_bundle(schema_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Return notecard.api.json with every schema it depends on inlined under `$defs`."""
+    index = load_schema(INDEX_FILE, schema_dir)
+    filenames = []
+    for filename in request_filenames(schema_dir):
+        filenames.append(filename)
+        filenames.append(response_filename(api_name(filename)))
+    filenames.append(CODES_FILE)
+    bundled = {filename: def_name(filename) for filename in filenames}
+
+    bundle = {key: value for key, value in index.items() if key != "oneOf"}
+    if "$id" in bundle:
+        bundle["$id"] = bundle["$id"].rsplit('/', 1)[0] + "/" + BUNDLE_FILE
+    bundle["oneOf"] = _rewrite(index.get("oneOf", []), bundled)
+    bundle["$defs"] = {}
+    for filename in filenames:
+        schema = load_schema(filename, schema_dir)
+        schema = {key: value for key, value in schema.items() if key not in ("$schema", "$id")}
+        bundle["$defs"][bundled[filename]] = _rewrite(schema, bundled)
+    return bundle
+
+
+def write_bundle(path: str, schema_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Build the bundle and write it to `path`, formatted like the schema files."""
+    bundle = build_bundle(schema_dir)
+    with open(path, 'w') as f:
+        json.dump(bundle, f, indent=4, ensure_ascii=False)
+        f.write("\n")
+    return bundle
+
+
+def binary_path(path: str) -> str:
+    """Return the path of the binary form of the JSON bundle at `path`."""
+    root, extension = os.path.splitext(path)
+    return (root if extension == ".json" else path) + BINARY_SUFFIX
+
+
+def _share_strings(node: Any, strings: Dict[str, str]) -> Any:
+    """Return a copy of `node` in which equal strings are one object, so marshal stores each once."""
+    if isinstance(node, dict):
+        return {strings.setdefault(key, key): _share_strings(value, strings) for key, value in node.items()}
+    if isinstance(node, list):
+        return [_share_strings(item, strings) for item in node]
+    if isinstance(node, str):
+        return strings.setdefault(node, node)
+    return node
+
+
+def write_binary_bundle(path: str) -> str:
+    """Write the binary form of the JSON bundle at `path` next to it and return its path."""
+    with open(path, 'rb') as f:
+        source = f.read()
+    stat = os.stat(path)
+    header = _BINARY_HEADER.pack(BINARY_MAGIC, BINARY_FORMAT, importlib.util.MAGIC_NUMBER,
+                                 stat.st_size, stat.st_mtime_ns, hashlib.sha256(source).digest())
+    data = header + marshal.dumps(_share_strings(json.loads(source), {}))
+
+    output = binary_path(path)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, output)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return output
+
+
+def read_binary_bundle(path: str) -> Optional[Dict[str, Any]]:
+    """Return the bundle from the binary form of the JSON bundle at `path`.
+
+    Returns None if there is no binary form, or if it was written by another
+    Python version or from different JSON. The JSON is only hashed when its
+    size or modification time changed since the binary form was written.
+    """
+    try:
+        with open(binary_path(path), 'rb') as f:
+            data = f.read()
+        stat = os.stat(path)
+    except OSError:
+        return None
+    if len(data) < _BINARY_HEADER.size:
+        return None
+    magic, version, python_magic, size, mtime_ns, digest = _BINARY_HEADER.unpack_from(data)
+    if (magic, version, python_magic) != (BINARY_MAGIC, BINARY_FORMAT, importlib.util.MAGIC_NUMBER):
+        return None
+    if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+        if stat.st_size != size:
+            return None
+        with open(path, 'rb') as f:
+            if hashlib.sha256(f.read()).digest() != digest:
+                return None
+    try:
+        return marshal.loads(memoryview(data)[_BINARY_HEADER.size:])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+
+def load_bundle(path: str, binary: bool = True) -> Dict[str, Any]:
+    """Load a bundle written by `write_bundle`, from its binary form if that is current."""
+    if binary:
+        bundle = read_binary_bundle(path)
+        if bundle is not None:
+            return bundle
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bundle every Notecard API schema into one self-contained file.")
+    parser.add_argument("--schema_dir", default=SCHEMA_DIR, help="Directory containing the schema files.")
+    parser.add_argument("--output", default=BUNDLE_FILE, help="Path of the bundle to write.")
+    parser.add_argument("--binary", action="store_true",
+                        help=f"Also write the bundle's binary form, with the {BINARY_SUFFIX} extension.")
+    args = parser.parse_args()
+
+    bundle = write_bundle(args.output, args.schema_dir)
+    print(f"Wrote {len(bundle['$defs'])} schemas to {args.output}")
+    if args.binary:
+        print(f"Wrote binary bundle to {write_binary_bundle(args.output)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Persistent on-disk cache of compiled schema validators.
+
+Each schema file is compiled on its own and stored as a marshalled code
+object named after a hash of the schema filename and bytes, the compiler
+version and the Python bytecode magic number. A process that finds an entry for the current
+bytes skips JSON parsing and code generation for that schema, so only
+schemas whose source changed are rebuilt.
+
+`ValidatorCache.compile` does the same for a schema already in memory,
+keyed by its canonical JSON, so scoped and runtime variants are cached too.
+
+The cache is opt-in: nothing is written to disk unless it is enabled.
+`Dispatcher` and `get_validator` compile through `default_cache()`, which is
+enabled by setting `NOTECARD_SCHEMA_CACHE_DIR` to the cache directory
+(unless `NOTECARD_SCHEMA_NO_CACHE` is also set). `Dispatcher(cache=True)`
+enables it for one dispatcher, in `default_cache_dir()`.
+
+Entries are written to a temporary file and moved into place with
+`os.replace`, which is atomic, so concurrent readers see either a complete
+entry or none at all. An entry that cannot be read or is not a code object
+is treated as a miss and rewritten.
+"""
+
+import hashlib
+import importlib.util
+import json
+import marshal
+import os
+import tempfile
+import threading
+import types
+from typing import Any, Callable, Dict, Optional
+
+from .compiler import COMPILER_VERSION, compile_source, generate_module, schema_filenames
+from .loader import SCHEMA_DIR
+
+# Set to a directory to enable the process-wide cache there.
+CACHE_DIR_ENV = "NOTECARD_SCHEMA_CACHE_DIR"
+# Set to any non-empty value to ignore CACHE_DIR_ENV and always compile.
+NO_CACHE_ENV = "NOTECARD_SCHEMA_NO_CACHE"
+# Entries made by `ValidatorCache.compile`, which `prune` leaves alone.
+SCHEMA_KEY_PREFIX = "schema-"
+
+
+def default_cache_dir() -> str:
+    """Return the cache directory from the environment or the user cache location."""
+    if os.environ.get(CACHE_DIR_ENV):
+        return os.environ[CACHE_DIR_ENV]
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "notecard-schema")
+
+
+class ValidatorCache:
+    """Loads compiled validators from disk, compiling and storing them on a miss."""
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, filename: str, schema_bytes: bytes) -> str:
+        """Return the cache key for a schema file and its raw bytes."""
+        digest = hashlib.sha256()
+        digest.update(COMPILER_VERSION.encode())
+        digest.update(importlib.util.MAGIC_NUMBER)
+        # The generated module exports its validator under the filename.
+        digest.update(filename.encode() + b"\0")
+        digest.update(schema_bytes)
+        return digest.hexdigest()
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.marshal")
+
+    def _read(self, key: str) -> Optional[types.CodeType]:
+        try:
+            with open(self.path(key), 'rb') as f:
+                code = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            return None
+        return code if isinstance(code, types.CodeType) else None
+
+    def _write(self, key: str, code) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                marshal.dump(code, f)
+            os.replace(tmp_path, self.path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _validator(self, name: str, key: str, schema: Callable[[], Any]) -> Callable[[Any], bool]:
+        """Return the validator stored under `key`, compiling `schema()` as `name` on a miss."""
+        code = self._read(key)
+        if code is not None:
+            try:
+                validator = _run(code)[name]
+            except Exception:
+                # A foreign or damaged entry; rebuild it below.
+                code = None
+            else:
+                self.hits += 1
+                return validator
+        self.misses += 1
+        code = compile_source(generate_module({name: schema()}), name)
+        try:
+            self._write(key, code)
+        except OSError:
+            # A read-only cache still yields a working validator.
+            pass
+        return _run(code)[name]
+
+    def load(self, filename: str, schema_dir: Optional[str] = None) -> Callable[[Any], bool]:
+        """Return the compiled validator for a schema file."""
+        with open(os.path.join(schema_dir or SCHEMA_DIR, filename), 'rb') as f:
+            schema_bytes = f.read()
+        return self._validator(filename, self.key(filename, schema_bytes), lambda: json.loads(schema_bytes))
+
+    def compile(self, schema: Dict[str, Any]) -> Callable[[Any], bool]:
+        """Return the compiled validator for a schema, like `compile_schema` but cached.
+
+        Raises CompileError for schemas the compiler does not support.
+        """
+        canonical = json.dumps(schema, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        key = SCHEMA_KEY_PREFIX + self.key("schema", canonical.encode())
+        return self._validator("schema", key, lambda: schema)
+
+    def load_all(self, schema_dir: Optional[str] = None) -> Dict[str, Callable[[Any], bool]]:
+        """Return compiled validators for every schema file, keyed by filename."""
+        return {filename: self.load(filename, schema_dir) for filename in schema_filenames(schema_dir)}
+
+    def prune(self, schema_dir: Optional[str] = None) -> int:
+        """Remove entries that no longer match any schema file and return how many.
+
+        Entries made by `compile` are not tied to a file and are kept.
+        """
+        current = set()
+        for filename in schema_filenames(schema_dir):
+            with open(os.path.join(schema_dir or SCHEMA_DIR, filename), 'rb') as f:
+                current.add(os.path.basename(self.path(self.key(filename, f.read()))))
+        removed = 0
+        if not os.path.isdir(self.cache_dir):
+            return removed
+        for entry in os.listdir(self.cache_dir):
+            if entry.endswith(".marshal") and not entry.startswith(SCHEMA_KEY_PREFIX) and entry not in current:
+                try:
+                    os.remove(os.path.join(self.cache_dir, entry))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
+
+
+def _run(code: types.CodeType) -> Dict[str, Callable[[Any], bool]]:
+    """Execute a compiled validator module and return its validators."""
+    namespace: Dict[str, Any] = {"__name__": "notecard_validators"}
+    exec(code, namespace)
+    return namespace["VALIDATORS"]
+
+
+_default_cache: Optional[ValidatorCache] = None
+_default_lock = threading.Lock()
+
+
+def default_cache(enable: bool = False) -> Optional[ValidatorCache]:
+    """Return the process-wide cache, or None if it is not enabled.
+
+    It is enabled by `enable`, or by setting `NOTECARD_SCHEMA_CACHE_DIR`
+    without `NOTECARD_SCHEMA_NO_CACHE`.
+    """
+    global _default_cache
+    if not enable and (os.environ.get(NO_CACHE_ENV) or not os.environ.get(CACHE_DIR_ENV)):
+        return None
+    with _default_lock:
+        cache_dir = default_cache_dir()
+        if _default_cache is None or _default_cache.cache_dir != cache_dir:
+            _default_cache = ValidatorCache(cache_dir)
+        return _default_cache
@@ -0,0 +1,273 @@
+"""
+Columnar validation of batches of same-API instances with NumPy.
+
+Most response schemas (`card.voltage`, `card.temp`, `card.power`, ...) are
+flat objects whose properties only carry `type`, range and `enum` checks.
+`ColumnarValidator` turns a batch of such instances into one typed array
+per declared property and runs those checks vectorized over the arrays,
+returning a boolean mask of valid rows plus the fields each invalid row
+failed on.
+
+Pulling values out of the dicts and classifying their types still takes
+one Python-level pass per column; everything after that runs in NumPy.
+Properties with other keywords (`pattern`, nested objects, ...) are checked
+per row with their compiled subschema, and schemas with top-level
+conditionals fall back to the compiled validator for the whole row.
+
+NumPy is optional; it is only imported when a `ColumnarValidator` is built.
+"""
+
+import operator
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+
+from .compiler import SUPPORTED_KEYWORDS, UNSUPPORTED_KEYWORDS, compile_schema
+from .loader import load_schema, response_filename
+from .validator import SchemaValidator
+
+VALIDATION_KEYWORDS = SUPPORTED_KEYWORDS | UNSUPPORTED_KEYWORDS
+
+RANGE_KEYWORDS = frozenset({"minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum"})
+LENGTH_KEYWORDS = frozenset({"minLength", "maxLength"})
+# Keywords checked on typed columns.
+COLUMN_KEYWORDS = frozenset({
+    "type", "enum", "const", "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum",
+    "minLength", "maxLength",
+})
+# Top-level keywords the columnar path understands.
+OBJECT_KEYWORDS = frozenset({"type", "properties", "required", "additionalProperties", "unevaluatedProperties"})
+
+# Field reported for rows that fail as a whole, such as non-objects.
+ROW = "$"
+
+# Integers up to this magnitude convert to float64 exactly; larger ones are
+# checked one by one with the compiled subschema.
+EXACT_INTEGER = 2 ** 53
+
+# Per-value type codes.
+NULL, BOOLEAN, INTEGER, FLOAT, STRING, ARRAY, OBJECT, OTHER = range(8)
+
+
+class _TypeCodes(dict):
+    def __missing__(self, key):
+        return OTHER
+
+
+_TYPE_CODES = _TypeCodes({
+    type(None): NULL, bool: BOOLEAN, int: INTEGER, float: FLOAT,
+    str: STRING, list: ARRAY, dict: OBJECT,
+})
+
+_ALLOWED_CODES = {
+    "null": (NULL,),
+    "boolean": (BOOLEAN,),
+    "integer": (INTEGER,),
+    "number": (INTEGER, FLOAT),
+    "string": (STRING,),
+    "array": (ARRAY,),
+    "object": (OBJECT,),
+}
+
+
+class BatchResult(NamedTuple):
+    """Validity of each row and the fields each invalid row failed on."""
+    mask: Any
+    failures: Dict[int, List[str]]
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError as e:
+        raise ImportError("Columnar validation requires NumPy: pip install numpy") from e
+    return numpy
+
+
+def _enumeration(schema: Dict[str, Any]) -> List[Any]:
+    return schema.get("enum", []) + ([schema["const"]] if "const" in schema else [])
+
+
+def _is_column_schema(schema: Any) -> bool:
+    if isinstance(schema, bool):
+        return True
+    if not isinstance(schema, dict) or not schema.keys() & VALIDATION_KEYWORDS <= COLUMN_KEYWORDS:
+        return False
+    if "enum" in schema and "const" in schema:
+        return False
+    values = _enumeration(schema)
+    # Numeric constants are compared as float64, so they must convert exactly.
+    bounds = values + [schema[keyword] for keyword in RANGE_KEYWORDS if keyword in schema]
+    if any(isinstance(value, int) and not -EXACT_INTEGER <= value <= EXACT_INTEGER for value in bounds):
+        return False
+    # Enumerations are compared as arrays of a single kind.
+    return (all(isinstance(value, str) for value in values)
+            or all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values))
+
+
+class ColumnarValidator:
+    """Validates batches of instances of one flat object schema column by column."""
+
+    def __init__(self, schema: Dict[str, Any]):
+        self.np = _numpy()
+        self.schema = schema
+        self.properties: Dict[str, Any] = schema.get("properties", {})
+        self.required = frozenset(schema.get("required", ()))
+        closed = schema.get("unevaluatedProperties", schema.get("additionalProperties", True))
+        self.declared = frozenset(self.properties) if closed is False else None
+        self.columnar = (schema.get("type") == "object"
+                         and schema.keys() & VALIDATION_KEYWORDS <= OBJECT_KEYWORDS
+                         and closed in (True, False))
+        self.row_checks = {}
+        if self.columnar:
+            self.row_checks = {name: compile_schema(subschema)
+                               for name, subschema in self.properties.items()
+                               if not _is_column_schema(subschema)}
+        # Compiled property subschemas for values the columns cannot hold.
+        self._value_checks: Dict[int, Callable[[Any], bool]] = {}
+        self._validator = SchemaValidator(schema)
+
+    @classmethod
+    def for_api(cls, api: str, schema_dir: Optional[str] = None) -> "ColumnarValidator":
+        """Return a validator for an API's response schema."""
+        return cls(load_schema(response_filename(api), schema_dir))
+
+    def _check_column(self, schema: Any, values: Sequence[Any]) -> Any:
+        """Return a mask of the values in a column that fail its schema."""
+        np = self.np
+        n = len(values)
+        if schema is True:
+            return np.zeros(n, dtype=bool)
+        if schema is False:
+            return np.ones(n, dtype=bool)
+        codes = np.fromiter(map(_TYPE_CODES.__getitem__, map(type, values)), dtype=np.int8, count=n)
+        failed = np.zeros(n, dtype=bool)
+        if "type" in schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            allowed = [code for name in types for code in _ALLOWED_CODES[name]]
+            ok = np.isin(codes, allowed)
+            if "integer" in types and "number" not in types:
+                # Integral floats such as 1.0 are integers in JSON Schema.
+                floats = np.flatnonzero(codes == FLOAT)
+                ok[floats] = [values[i].is_integer() for i in floats]
+            failed |= ~ok
+
+        keys = schema.keys()
+        if keys & RANGE_KEYWORDS or ("enum" in schema or "const" in schema) and not self._string_enum(schema):
+            numeric = np.flatnonzero((codes == INTEGER) | (codes == FLOAT))
+            wide = [i for i in numeric[codes[numeric] == INTEGER]
+                    if not -EXACT_INTEGER <= values[i] <= EXACT_INTEGER]
+            if wide:
+                # float64 would overflow or round these, so check them exactly.
+                check = self._value_check(schema)
+                failed[wide] |= np.array([not check(values[i]) for i in wide])
+                numeric = np.setdiff1d(numeric, wide)
+            if len(numeric) == n:
+                numbers = np.array(values, dtype=np.float64)
+            else:
+                numbers = np.array([values[i] for i in numeric], dtype=np.float64)
+            rejected = np.zeros(len(numeric), dtype=bool)
+            if "minimum" in schema:
+                rejected |= numbers < schema["minimum"]
+            if "maximum" in schema:
+                rejected |= numbers > schema["maximum"]
+            if "exclusiveMinimum" in schema:
+                rejected |= numbers <= schema["exclusiveMinimum"]
+            if "exclusiveMaximum" in schema:
+                rejected |= numbers >= schema["exclusiveMaximum"]
+            failed[numeric[rejected]] = True
+            if "enum" in schema or "const" in schema:
+                # Everything but numbers in the enumeration is rejected.
+                in_enum = np.zeros(n, dtype=bool)
+                in_enum[numeric] = np.isin(numbers, _enumeration(schema))
+                in_enum[wide] = True
+                failed |= ~in_enum
+        if keys & LENGTH_KEYWORDS or self._string_enum(schema):
+            strings = np.flatnonzero(codes == STRING)
+            text = [values[i] for i in strings]
+            if keys & LENGTH_KEYWORDS:
+                # Lengths in code points, as JSON Schema counts them.
+                lengths = np.fromiter(map(len, text), dtype=np.int64, count=len(text))
+                rejected = lengths < schema.get("minLength", 0)
+                if "maxLength" in schema:
+                    rejected |= lengths > schema["maxLength"]
+                failed[strings[rejected]] = True
+            if self._string_enum(schema):
+                in_enum = np.zeros(n, dtype=bool)
+                if text:
+                    in_enum[strings] = np.isin(np.array(text), _enumeration(schema))
+                failed |= ~in_enum
+        return failed
+
+    def _value_check(self, schema: Dict[str, Any]) -> Callable[[Any], bool]:
+        check = self._value_checks.get(id(schema))
+        if check is None:
+            check = self._value_checks[id(schema)] = compile_schema(schema)
+        return check
+
+    @staticmethod
+    def _string_enum(schema: Dict[str, Any]) -> bool:
+        values = _enumeration(schema)
+        return bool(values) and isinstance(values[0], str)
+
+    def validate(self, instances: Sequence[Any]) -> BatchResult:
+        """Validate a batch of instances of this schema."""
+        if not self.columnar:
+            return self._validate_rows(instances)
+        np = self.np
+        valid = np.zeros(len(instances), dtype=bool)
+        failures: Dict[int, List[str]] = {}
+
+        # Rows with the same keys in the same order share a layout, so their
+        # columns can be pulled out together and checked once per layout.
+        layouts: Dict[tuple, Any] = {}
+        if instances and list(map(type, instances)).count(dict) == len(instances):
+            # Batches are mostly homogeneous, so split off the rows laid out
+            # like the first one without a Python-level loop.
+            keys = list(map(tuple, instances))
+            same = np.fromiter(map(keys[0].__eq__, keys), dtype=bool, count=len(keys))
+            layouts[keys[0]] = range(len(keys)) if same.all() else np.flatnonzero(same)
+            for i in np.flatnonzero(~same):
+                layouts.setdefault(keys[i], []).append(int(i))
+        else:
+            for i, row in enumerate(instances):
+                if isinstance(row, dict):
+                    layouts.setdefault(tuple(row), []).append(i)
+                else:
+                    failures[i] = [ROW]
+
+        for keys, indices in layouts.items():
+            rows = instances if len(indices) == len(instances) else [instances[i] for i in indices]
+            layout_fields = sorted(self.required.difference(keys))
+            if self.declared is not None:
+                layout_fields += sorted(key for key in keys if key not in self.declared)
+            row_fields: Dict[int, List[str]] = {}
+            for name in keys:
+                if name not in self.properties:
+                    continue
+                values = list(map(operator.itemgetter(name), rows))
+                if name in self.row_checks:
+                    check = self.row_checks[name]
+                    failed = np.fromiter((not check(value) for value in values), dtype=bool, count=len(values))
+                else:
+                    failed = self._check_column(self.properties[name], values)
+                for j in np.flatnonzero(failed):
+                    row_fields.setdefault(int(j), []).append(name)
+            if layout_fields:
+                for j in range(len(indices)):
+                    failures[int(indices[j])] = sorted(layout_fields + row_fields.get(j, []))
+                continue
+            valid[indices] = True
+            for j, fields in row_fields.items():
+                valid[indices[j]] = False
+                failures[int(indices[j])] = sorted(fields)
+        return BatchResult(valid, dict(sorted(failures.items())))
+
+    def _validate_rows(self, instances: Sequence[Any]) -> BatchResult:
+        np = self.np
+        is_valid = self._validator.is_valid
+        mask = np.fromiter((is_valid(row) for row in instances), dtype=bool, count=len(instances))
+        failures = {}
+        for i in np.flatnonzero(~mask):
+            fields = {str(error.path[0]) if error.path else ROW
+                      for error in self._validator.iter_errors(instances[i])}
+            failures[int(i)] = sorted(fields)
+        return BatchResult(mask, failures)
@@ -0,0 +1,496 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-time compiler from Notecard API schemas to Python validators.
+
+The schemas only use a small subset of draft 2020-12. Rather than walking
+the keyword tree for every instance, this module generates one Python
+function per schema with the checks unrolled, in the style of
+fastjsonschema. Each generated function takes a JSON-decoded instance and
+returns True if it is valid, returning False as soon as a check fails.
+
+Usage: python -m notecard_schema.compiler --output notecard_validators.py
+"""
+
+import argparse
+import glob
+import os
+import re
+from typing import Any, Callable, Dict, List, Optional
+
+from .decision import build_table
+from .loader import SCHEMA_DIR, load_schema
+
+COMPILER_VERSION = "4"
+
+# Keywords that affect validation but are not needed by the Notecard
+# schemas. Compiling a schema that uses one of them is an error rather than
+# a silent divergence from jsonschema.
+UNSUPPORTED_KEYWORDS = frozenset({
+    "$ref", "$dynamicRef", "$recursiveRef", "patternProperties",
+    "dependentRequired", "dependentSchemas", "prefixItems", "contains",
+    "minContains", "maxContains", "uniqueItems", "multipleOf",
+    "propertyNames", "minProperties", "maxProperties", "unevaluatedItems",
+})
+
+SUPPORTED_KEYWORDS = frozenset({
+    "type", "const", "enum", "pattern", "minLength", "maxLength",
+    "minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum",
+    "items", "minItems", "maxItems", "required", "properties",
+    "additionalProperties", "unevaluatedProperties", "allOf", "anyOf",
+    "oneOf", "not", "if", "then", "else",
+})
+
+TYPE_CHECKS = {
+    "string": "isinstance({v}, str)",
+    "integer": "(isinstance({v}, int) and not isinstance({v}, bool)"
+               " or isinstance({v}, float) and {v}.is_integer())",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "boolean": "({v} is True or {v} is False)",
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "null": "{v} is None",
+}
+
+# The instance type each group of keywords applies to.
+STRING_KEYWORDS = ("pattern", "minLength", "maxLength")
+NUMBER_KEYWORDS = ("minimum", "maximum", "exclusiveMinimum", "exclusiveMaximum")
+ARRAY_KEYWORDS = ("items", "minItems", "maxItems")
+OBJECT_KEYWORDS = ("required", "properties", "additionalProperties", "unevaluatedProperties")
+
+IN_PLACE_APPLICATORS = ("allOf", "anyOf", "oneOf", "if", "then", "else")
+
+MODULE_PREAMBLE = '''"""Generated by notecard_schema.compiler. Do not edit."""
+
+import re
+
+
+def _equal(one, two):
+    """JSON equality that keeps booleans distinct from numbers."""
+    if one is two:
+        return True
+    if isinstance(one, str) or isinstance(two, str):
+        return one == two
+    if isinstance(one, list) and isinstance(two, list):
+        return len(one) == len(two) and all(_equal(a, b) for a, b in zip(one, two))
+    if isinstance(one, dict) and isinstance(two, dict):
+        return one.keys() == two.keys() and all(_equal(one[k], two[k]) for k in one)
+    if isinstance(one, bool) or isinstance(two, bool):
+        return False
+    return one == two
+
+
+def _req_or_cmd(data, name):
+    """The `req`/`cmd` oneOf shared by every request schema."""
+    if not isinstance(data, dict):
+        return False
+    return ("req" in data and data["req"] == name) != ("cmd" in data and data["cmd"] == name)
+'''
+
+
+class CompileError(Exception):
+    """Raised when a schema uses a construct the compiler does not support."""
+
+
+def is_trivial(schema: Any) -> bool:
+    """Return True if a schema accepts every instance."""
+    if schema is True:
+        return True
+    return isinstance(schema, dict) and not (schema.keys() & (SUPPORTED_KEYWORDS | UNSUPPORTED_KEYWORDS))
+
+
+def function_name(filename: str) -> str:
+    """Return the generated function name for a schema filename."""
+    stem = filename[:-len(".notecard.api.json")] if filename.endswith(".notecard.api.json") else filename
+    return "validate_" + re.sub(r'\W', '_', stem)
+
+
+def req_cmd_const(branches: Any) -> Optional[str]:
+    """Return the API name if `branches` is the request schema `req`/`cmd` oneOf.
+
+    Every request schema carries the same two-branch `oneOf`, requiring
+    exactly one of `req` or `cmd` and pinning it to the API name. Recognizing
+    it lets the compiler emit one call to a shared helper instead of two
+    generated functions per schema.
+    """
+    if not isinstance(branches, list) or len(branches) != 2:
+        return None
+    names = []
+    for key, branch in zip(("req", "cmd"), branches):
+        if not isinstance(branch, dict) or set(branch) != {"required", "properties"}:
+            return None
+        properties = branch["properties"]
+        if branch["required"] != [key] or list(properties) != [key]:
+            return None
+        if not isinstance(properties[key], dict) or list(properties[key]) != ["const"]:
+            return None
+        names.append(properties[key]["const"])
+    if names[0] != names[1] or not isinstance(names[0], str):
+        return None
+    return names[0]
+
+
+def _applicator_property_names(schema: Dict[str, Any]) -> set:
+    """Collect property names that in-place applicators may mark as evaluated."""
+    names = set()
+    for keyword in IN_PLACE_APPLICATORS:
+        if keyword not in schema:
+            continue
+        subschemas = schema[keyword] if isinstance(schema[keyword], list) else [schema[keyword]]
+        for subschema in subschemas:
+            if not isinstance(subschema, dict):
+                continue
+            if subschema.keys() & {"additionalProperties", "unevaluatedProperties", "patternProperties"}:
+                raise CompileError("unevaluatedProperties cannot be resolved statically")
+            names |= set(subschema.get("properties", {}))
+            names |= _applicator_property_names(subschema)
+    return names
+
+
+def evaluated_properties(schema: Dict[str, Any]) -> frozenset:
+    """Return the property names `unevaluatedProperties` treats as evaluated.
+
+    The result is exact when every property named by an in-place applicator
+    also appears in the schema's own `properties`, which holds for all the
+    Notecard schemas: whichever branch succeeds, the evaluated set is then
+    the instance keys found in `properties`.
+    """
+    own = set(schema.get("properties", {}))
+    if not _applicator_property_names(schema) <= own:
+        raise CompileError("unevaluatedProperties depends on which applicator branch matches")
+    return frozenset(own)
+
+
+class ModuleGenerator:
+    """Accumulates generated validator functions and their constants."""
+
+    def __init__(self):
+        self._constants: List[str] = []
+        self._constant_names: Dict[str, str] = {}
+        self._functions: List[List[str]] = []
+        self._counter = 0
+        self.exported: Dict[str, str] = {}
+
+    def _next(self, prefix: str) -> str:
+        self._counter += 1
+        return f"{prefix}{self._counter}"
+
+    def constant(self, expression: str) -> str:
+        """Return the name of a module-level constant holding an expression."""
+        name = self._constant_names.get(expression)
+        if name is None:
+            name = self._next("_C")
+            self._constant_names[expression] = name
+            self._constants.append(f"{name} = {expression}")
+        return name
+
+    def add_schema(self, filename: str, schema: Dict[str, Any]) -> str:
+        """Generate the validator for a schema file and return its name."""
+        name = function_name(filename)
+        self.function(schema, name)
+        self.exported[filename] = name
+        return name
+
+    def function(self, schema: Any, name: Optional[str] = None) -> str:
+        """Generate a function that returns whether an instance matches a schema."""
+        name = name or self._next("_s")
+        body: List[str] = []
+        self._emit(schema, "data", body, 1, None)
+        self._functions.append([f"def {name}(data):"] + body + ["    return True"])
+        return name
+
+    def source(self) -> str:
+        """Return the complete generated module."""
+        parts = [MODULE_PREAMBLE, "\n".join(self._constants)]
+        parts.extend("\n".join(lines) for lines in self._functions)
+        table = "\n".join(f"    {filename!r}: {name}," for filename, name in self.exported.items())
+        parts.append(f"VALIDATORS = {{\n{table}\n}}")
+        return "\n\n\n".join(part for part in parts if part) + "\n"
+
+    def _equality(self, var: str, value: Any) -> str:
+        """Return an expression testing JSON equality against a constant."""
+        if isinstance(value, str):
+            return f"{var} == {value!r}"
+        if value is True or value is False or value is None:
+            return f"({var} is {value!r})"
+        if isinstance(value, (int, float)):
+            return f"({TYPE_CHECKS['number'].format(v=var)} and {var} == {value!r})"
+        return f"_equal({var}, {self.constant(repr(value))})"
+
+    def _membership(self, var: str, values: List[Any]) -> str:
+        """Return an expression testing JSON equality against any enum member."""
+        if values and all(isinstance(value, str) for value in values):
+            members = self.constant(f"frozenset({sorted(set(values))!r})")
+            return f"(isinstance({var}, str) and {var} in {members})"
+        if values and all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in values):
+            members = self.constant(f"frozenset({sorted(set(values))!r})")
+            return f"({TYPE_CHECKS['number'].format(v=var)} and {var} in {members})"
+        if len(values) == 1:
+            return self._equality(var, values[0])
+        members = self.constant(repr(list(values)))
+        return f"any(_equal({var}, member) for member in {members})"
+
+    def _emit(self, schema: Any, var: str, out: List[str], level: int, known: Optional[str]) -> None:
+        """Append statements to `out` that return False if `var` fails `schema`."""
+        pad = "    " * level
+        if schema is True:
+            return
+        if schema is False:
+            out.append(f"{pad}return False")
+            return
+        if not isinstance(schema, dict):
+            raise CompileError(f"Invalid subschema: {schema!r}")
+        unsupported = schema.keys() & UNSUPPORTED_KEYWORDS
+        if unsupported:
+            raise CompileError(f"Unsupported keywords: {sorted(unsupported)}")
+
+        if "type" in schema:
+            types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+            checks = " or ".join(TYPE_CHECKS[t].format(v=var) for t in types)
+            out.append(f"{pad}if not {checks if len(types) == 1 else f'({checks})'}:")
+            out.append(f"{pad}    return False")
+            if len(types) == 1:
+                known = types[0]
+        if "const" in schema:
+            if isinstance(schema["const"], str):
+                out.append(f"{pad}if {var} != {schema['const']!r}:")
+            else:
+                out.append(f"{pad}if not {self._equality(var, schema['const'])}:")
+            out.append(f"{pad}    return False")
+        if "enum" in schema:
+            out.append(f"{pad}if not {self._membership(var, schema['enum'])}:")
+            out.append(f"{pad}    return False")
+
+        self._emit_group(schema, var, out, level, known, "string", STRING_KEYWORDS, self._emit_string)
+        self._emit_group(schema, var, out, level, known, "number", NUMBER_KEYWORDS, self._emit_number)
+        self._emit_group(schema, var, out, level, known, "array", ARRAY_KEYWORDS, self._emit_array)
+        self._emit_group(schema, var, out, level, known, "object", OBJECT_KEYWORDS, self._emit_object)
+
+        conditional = [keyword for keyword in ("allOf", "anyOf", "oneOf", "not", "if") if keyword in schema]
+        if "oneOf" in schema and req_cmd_const(schema["oneOf"]) is not None:
+            out.append(f"{pad}if not _req_or_cmd({var}, {req_cmd_const(schema['oneOf'])!r}):")
+            out.append(f"{pad}    return False")
+            conditional.remove("oneOf")
+        if (known == "object" and set(conditional) & {"anyOf", "oneOf", "not", "if"}
+                and self._emit_decision_table(schema, conditional, var, out, level)):
+            return
+
+        for subschema in schema.get("allOf", []):
+            self._emit(subschema, var, out, level, known)
+        if "anyOf" in schema:
+            calls = " or ".join(f"{self.function(sub)}({var})" for sub in schema["anyOf"])
+            out.append(f"{pad}if not ({calls}):")
+            out.append(f"{pad}    return False")
+        if "oneOf" in conditional:
+            calls = " + ".join(f"{self.function(sub)}({var})" for sub in schema["oneOf"])
+            out.append(f"{pad}if {calls} != 1:")
+            out.append(f"{pad}    return False")
+        if "not" in schema and is_trivial(schema["not"]):
+            out.append(f"{pad}return False")
+            return
+        if "not" in schema:
+            out.append(f"{pad}if {self.function(schema['not'])}({var}):")
+            out.append(f"{pad}    return False")
+        if "if" in schema and ("then" in schema or "else" in schema):
+            self._emit_conditional(schema, var, out, level, known)
+
+    def _emit_decision_table(self, schema, keywords, var, out, level) -> bool:
+        """Emit conditional keywords on an object as a bitmask table lookup.
+
+        Returns False, emitting nothing, if the keywords cannot be reduced to
+        a decision table.
+        """
+        keywords = tuple(keywords) + tuple(k for k in ("then", "else") if "if" in keywords and k in schema)
+        table = build_table(schema, keywords, SUPPORTED_KEYWORDS | UNSUPPORTED_KEYWORDS)
+        if table is None:
+            return False
+        pad = "    " * level
+        mask = self._next("m")
+        out.append(f"{pad}{mask} = 0")
+        by_property: Dict[str, List[int]] = {}
+        for index, (_, name, _) in enumerate(table.atoms):
+            by_property.setdefault(name, []).append(index)
+        for name, indexes in by_property.items():
+            out.append(f"{pad}if {name!r} in {var}:")
+            present = sum(1 << index for index in indexes if table.atoms[index][0] == "present")
+            if present:
+                out.append(f"{pad}    {mask} |= {present}")
+            matches = [index for index in indexes if table.atoms[index][0] == "match"]
+            if matches:
+                value = self._next("v")
+                out.append(f"{pad}    {value} = {var}[{name!r}]")
+            for index in matches:
+                out.append(f"{pad}    if {self.function(table.atoms[index][2])}({value}):")
+                out.append(f"{pad}        {mask} |= {1 << index}")
+        out.append(f"{pad}if not ({self.constant(hex(table.table))} >> {mask}) & 1:")
+        out.append(f"{pad}    return False")
+        return True
+
+    def _emit_conditional(self, schema, var, out, level, known):
+        pad = "    " * level
+        then_lines: List[str] = []
+        else_lines: List[str] = []
+        self._emit(schema.get("then", True), var, then_lines, level + 1, known)
+        self._emit(schema.get("else", True), var, else_lines, level + 1, known)
+        if not then_lines and not else_lines:
+            return
+        out.append(f"{pad}if {self.function(schema['if'])}({var}):")
+        out.extend(then_lines or [f"{pad}    pass"])
+        if else_lines:
+            out.append(f"{pad}else:")
+            out.extend(else_lines)
+
+    def _emit_group(self, schema, var, out, level, known, group, keywords, emitter):
+        """Emit keywords that only apply to one instance type, guarded by a type check."""
+        if not any(keyword in schema for keyword in keywords):
+            return
+        if known == group or (group == "number" and known == "integer"):
+            emitter(schema, var, out, level)
+            return
+        if known is not None:
+            return
+        lines: List[str] = []
+        emitter(schema, var, lines, level + 1)
+        if lines:
+            out.append(f"{'    ' * level}if {TYPE_CHECKS[group].format(v=var)}:")
+            out.extend(lines)
+
+    def _emit_string(self, schema, var, out, level):
+        pad = "    " * level
+        if "pattern" in schema:
+            regex = self.constant(f"re.compile({schema['pattern']!r})")
+            out.append(f"{pad}if {regex}.search({var}) is None:")
+            out.append(f"{pad}    return False")
+        if "minLength" in schema:
+            out.append(f"{pad}if len({var}) < {schema['minLength']!r}:")
+            out.append(f"{pad}    return False")
+        if "maxLength" in schema:
+            out.append(f"{pad}if len({var}) > {schema['maxLength']!r}:")
+            out.append(f"{pad}    return False")
+
+    def _emit_number(self, schema, var, out, level):
+        pad = "    " * level
+        for keyword, operator in (("minimum", "<"), ("maximum", ">"),
+                                  ("exclusiveMinimum", "<="), ("exclusiveMaximum", ">=")):
+            if keyword in schema:
+                out.append(f"{pad}if {var} {operator} {schema[keyword]!r}:")
+                out.append(f"{pad}    return False")
+
+    def _emit_array(self, schema, var, out, level):
+        pad = "    " * level
+        if "minItems" in schema:
+            out.append(f"{pad}if len({var}) < {schema['minItems']!r}:")
+            out.append(f"{pad}    return False")
+        if "maxItems" in schema:
+            out.append(f"{pad}if len({var}) > {schema['maxItems']!r}:")
+            out.append(f"{pad}    return False")
+        if "items" in schema and not is_trivial(schema["items"]):
+            item = self._next("v")
+            lines: List[str] = []
+            self._emit(schema["items"], item, lines, level + 1, None)
+            # Item schemas that check nothing (such as a lone `if`) emit no loop.
+            if lines:
+                out.append(f"{pad}for {item} in {var}:")
+                out.extend(lines)
+
+    def _emit_object(self, schema, var, out, level):
+        pad = "    " * level
+        for name in schema.get("required", []):
+            out.append(f"{pad}if {name!r} not in {var}:")
+            out.append(f"{pad}    return False")
+        properties = schema.get("properties", {})
+        for name, subschema in properties.items():
+            if is_trivial(subschema):
+                continue
+            value = self._next("v")
+            lines: List[str] = []
+            self._emit(subschema, value, lines, level + 1, None)
+            out.append(f"{pad}if {name!r} in {var}:")
+            out.append(f"{pad}    {value} = {var}[{name!r}]")
+            out.extend(lines)
+        if "additionalProperties" in schema:
+            self._emit_remaining(schema["additionalProperties"], frozenset(properties), var, out, level)
+        elif "unevaluatedProperties" in schema:
+            self._emit_remaining(schema["unevaluatedProperties"], evaluated_properties(schema), var, out, level)
+
+    def _emit_remaining(self, subschema, evaluated, var, out, level):
+        """Apply a subschema to every instance property outside `evaluated`."""
+        pad = "    " * level
+        if is_trivial(subschema):
+            return
+        if subschema is False:
+            if evaluated:
+                names = self.constant(f"frozenset({sorted(evaluated)!r})")
+                out.append(f"{pad}if not {var}.keys() <= {names}:")
+            else:
+                out.append(f"{pad}if {var}:")
+            out.append(f"{pad}    return False")
+            return
+        key, value = self._next("k"), self._next("v")
+        names = self.constant(f"frozenset({sorted(evaluated)!r})")
+        lines: List[str] = []
+        self._emit(subschema, value, lines, level + 2, None)
+        if not lines:
+            return
+        out.append(f"{pad}for {key}, {value} in {var}.items():")
+        out.append(f"{pad}    if {key} not in {names}:")
+        out.extend(lines)
+
+
+def generate_module(schemas: Dict[str, Dict[str, Any]]) -> str:
+    """Generate a validator module for schemas keyed by filename."""
+    generator = ModuleGenerator()
+    for filename, schema in schemas.items():
+        generator.add_schema(filename, schema)
+    return generator.source()
+
+
+def load_module(source: str, filename: str = "<notecard_validators>") -> Dict[str, Callable[[Any], bool]]:
+    """Execute generated source and return its validators keyed by schema filename."""
+    namespace: Dict[str, Any] = {"__name__": "notecard_validators"}
+    exec(compile_source(source, filename), namespace)
+    return namespace["VALIDATORS"]
+
+
+def compile_source(source: str, filename: str = "<notecard_validators>"):
+    """Compile generated source to a code object, raising CompileError if it is not valid Python."""
+    try:
+        return compile(source, filename, "exec")
+    except SyntaxError as error:
+        raise CompileError(f"Generated validator for {filename} does not compile: {error}") from error
+
+
+def compile_schemas(schemas: Dict[str, Dict[str, Any]]) -> Dict[str, Callable[[Any], bool]]:
+    """Compile schemas keyed by filename into validator functions."""
+    return load_module(generate_module(schemas))
+
+
+def compile_schema(schema: Dict[str, Any], filename: str = "schema") -> Callable[[Any], bool]:
+    """Compile a single schema into a validator function."""
+    return compile_schemas({filename: schema})[filename]
+
+
+def schema_filenames(schema_dir: Optional[str] = None) -> List[str]:
+    """Return every `*.notecard.api.json` filename in the schema directory."""
+    pattern = os.path.join(schema_dir or SCHEMA_DIR, "*.notecard.api.json")
+    return sorted(os.path.basename(path) for path in glob.glob(pattern))
+
+
+def load_schemas(schema_dir: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Load every `*.notecard.api.json` schema keyed by filename."""
+    return {filename: load_schema(filename, schema_dir) for filename in schema_filenames(schema_dir)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile Notecard API schemas into a Python validator module.")
+    parser.add_argument("--schema_dir", default=SCHEMA_DIR, help="Directory containing the schema files.")
+    parser.add_argument("--output", default="notecard_validators.py", help="Path of the generated module.")
+    args = parser.parse_args()
+
+    source = generate_module(load_schemas(args.schema_dir))
+    with open(args.output, 'w') as f:
+        f.write(source)
+    print(f"Wrote validators to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Schema coverage over a corpus of Notecard transactions.
+
+Like line coverage, but for schemas: `SchemaCoverage` counts how often
+real traffic reaches each part of the request schemas. It counts:
+
+- each declared property, when an instance has it;
+- each `enum` value, when an instance takes it;
+- each `anyOf`/`oneOf` branch, when an instance matches it;
+- each `if` outcome, split into the `then` and `else` arms.
+
+The coverage points of a schema are enumerated once, when its API is first
+seen, into a plan that mirrors the schema and holds a compiled predicate
+for every branch and `if`. Recording an instance walks the plan alongside
+the instance and increments a flat array of counters, so memory depends
+only on the schemas, never on the size of the corpus.
+
+Usage: python -m notecard_schema.coverage transcript.jsonl --show-missing
+"""
+
+import argparse
+import json
+import sys
+from array import array
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .dispatch import Dispatcher
+from .stream import DEFAULT_MAX_LINE_LENGTH, iter_lines
+from .validator import SchemaValidator
+
+
+def _enum_key(value: Any) -> Any:
+    """Return a hashable key that keeps JSON values distinct as JSON Schema equality does."""
+    if isinstance(value, (dict, list)):
+        return ("json", json.dumps(value, sort_keys=True))
+    return (isinstance(value, bool), value)
+
+
+def _escape(name: str) -> str:
+    return name.replace("~", "~0").replace("/", "~1")
+
+
+class _Node:
+    """The coverage points and compiled predicates of one schema location."""
+
+    __slots__ = ("properties", "enum", "items", "all_of", "branches", "conditional")
+
+    def __init__(self):
+        self.properties: Optional[Dict[str, Tuple[int, Optional["_Node"]]]] = None
+        self.enum: Optional[Dict[Any, int]] = None
+        self.items: Optional["_Node"] = None
+        self.all_of: List["_Node"] = []
+        # One (points, predicates, plans) entry per anyOf/oneOf.
+        self.branches: List[Tuple[List[int], List[Callable[[Any], bool]], List[Optional["_Node"]]]] = []
+        # (predicate, then point, then plan, else point, else plan)
+        self.conditional = None
+
+
+class CoveragePlan:
+    """The coverage points of one schema and their hit counters."""
+
+    def __init__(self, api: str, schema: Dict[str, Any]):
+        self.api = api
+        # (schema pointer, description) for each point.
+        self.points: List[Tuple[str, str]] = []
+        self.root = self._plan(schema, "#", "$")
+        self.counts = array('Q', [0]) * len(self.points)
+        self.transactions = 0
+
+    def _point(self, pointer: str, label: str) -> int:
+        self.points.append((pointer, label))
+        return len(self.points) - 1
+
+    def _predicate(self, schema: Any) -> Callable[[Any], bool]:
+        return SchemaValidator(schema).is_valid
+
+    def _plan(self, schema: Any, pointer: str, where: str) -> Optional[_Node]:
+        if not isinstance(schema, dict):
+            return None
+        node = _Node()
+        if isinstance(schema.get("properties"), dict):
+            node.properties = {}
+            for name, subschema in schema["properties"].items():
+                child_pointer = f"{pointer}/properties/{_escape(name)}"
+                child_where = f"{where}.{name}"
+                index = self._point(child_pointer, child_where)
+                node.properties[name] = (index, self._plan(subschema, child_pointer, child_where))
+        if isinstance(schema.get("enum"), list):
+            node.enum = {}
+            for i, value in enumerate(schema["enum"]):
+                node.enum[_enum_key(value)] = self._point(f"{pointer}/enum/{i}", f"{where} = {json.dumps(value)}")
+        if isinstance(schema.get("items"), dict):
+            node.items = self._plan(schema["items"], f"{pointer}/items", f"{where}[]")
+        for i, subschema in enumerate(schema.get("allOf", [])):
+            plan = self._plan(subschema, f"{pointer}/allOf/{i}", where)
+            if plan is not None:
+                node.all_of.append(plan)
+        for keyword in ("anyOf", "oneOf"):
+            if not isinstance(schema.get(keyword), list):
+                continue
+            points, predicates, plans = [], [], []
+            for i, subschema in enumerate(schema[keyword]):
+                branch_pointer = f"{pointer}/{keyword}/{i}"
+                points.append(self._point(branch_pointer, f"{where} {keyword}[{i}]"))
+                predicates.append(self._predicate(subschema))
+                plans.append(self._plan(subschema, branch_pointer, where))
+            node.branches.append((points, predicates, plans))
+        if "if" in schema:
+            node.conditional = (
+                self._predicate(schema["if"]),
+                self._point(f"{pointer}/then", f"{where} if/then"),
+                self._plan(schema.get("then"), f"{pointer}/then", where),
+                self._point(f"{pointer}/else", f"{where} if/else"),
+                self._plan(schema.get("else"), f"{pointer}/else", where),
+            )
+        return node
+
+    def record(self, instance: Any) -> None:
+        """Count the coverage points an instance reaches."""
+        self.transactions += 1
+        self._walk(self.root, instance)
+
+    def _walk(self, node: Optional[_Node], instance: Any) -> None:
+        if node is None:
+            return
+        counts = self.counts
+        if node.properties is not None and isinstance(instance, dict):
+            properties = node.properties
+            for name, value in instance.items():
+                entry = properties.get(name)
+                if entry is not None:
+                    counts[entry[0]] += 1
+                    self._walk(entry[1], value)
+        if node.enum is not None:
+            try:
+                index = node.enum.get(_enum_key(instance))
+            except TypeError:
+                index = None
+            if index is not None:
+                counts[index] += 1
+        if node.items is not None and isinstance(instance, list):
+            for item in instance:
+                self._walk(node.items, item)
+        for plan in node.all_of:
+            self._walk(plan, instance)
+        for points, predicates, plans in node.branches:
+            for index, predicate, plan in zip(points, predicates, plans):
+                if predicate(instance):
+                    counts[index] += 1
+                    self._walk(plan, instance)
+        if node.conditional is not None:
+            predicate, then_index, then_plan, else_index, else_plan = node.conditional
+            if predicate(instance):
+                counts[then_index] += 1
+                self._walk(then_plan, instance)
+            else:
+                counts[else_index] += 1
+                self._walk(else_plan, instance)
+
+    @property
+    def hit(self) -> int:
+        """Number of points reached at least once."""
+        return sum(1 for count in self.counts if count)
+
+
+class SchemaCoverage:
+    """Aggregates request schema coverage over a stream of transactions."""
+
+    def __init__(self, dispatcher: Optional[Dispatcher] = None):
+        if dispatcher is None:
+            from .scoping import validator_for
+            dispatcher = validator_for()
+        self.dispatcher = dispatcher
+        self.plans: Dict[str, CoveragePlan] = {}
+        # Transactions that name no known API.
+        self.unknown = 0
+
+    def plan(self, api: str) -> CoveragePlan:
+        """Return the (cached) coverage plan for an API."""
+        plan = self.plans.get(api)
+        if plan is None:
+            plan = self.plans[api] = CoveragePlan(api, self.dispatcher.schemas[api])
+        return plan
+
+    def record(self, instance: Any) -> Optional[str]:
+        """Count the coverage points an instance reaches and return its API."""
+        api = self.dispatcher.api_for(instance)
+        if api is None:
+            self.unknown += 1
+        else:
+            self.plan(api).record(instance)
+        return api
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the hit count of every point of every API seen so far."""
+        return {
+            "unknown": self.unknown,
+            "apis": {
+                api: {
+                    "transactions": plan.transactions,
+                    "points": [
+                        {"pointer": pointer, "label": label, "hits": count}
+                        for (pointer, label), count in zip(plan.points, plan.counts)
+                    ],
+                }
+                for api, plan in sorted(self.plans.items())
+            },
+        }
+
+    def report(self, show_missing: bool = False, include_unused: bool = False) -> str:
+        """Return a coverage table, one row per API, like a line coverage report.
+
+        Args:
+            show_missing: List the points of each API that were never reached.
+            include_unused: Also list APIs that received no transactions.
+        """
+        apis = sorted(self.dispatcher.schemas if include_unused else self.plans)
+        width = max([len(api) for api in apis] + [len("TOTAL")])
+        lines = [f"{'API':<{width}}  {'Txns':>8}  {'Points':>6}  {'Hit':>5}  {'Cover':>5}"]
+        lines.append("-" * len(lines[0]))
+        total_points = total_hit = total_transactions = 0
+        for api in apis:
+            plan = self.plan(api)
+            points, hit = len(plan.points), plan.hit
+            total_points += points
+            total_hit += hit
+            total_transactions += plan.transactions
+            lines.append(f"{api:<{width}}  {plan.transactions:>8}  {points:>6}  {hit:>5}  {_percent(hit, points):>5}")
+            if show_missing:
+                lines.extend(f"{'':<{width}}    missing: {label} ({pointer})"
+                             for (pointer, label), count in zip(plan.points, plan.counts) if not count)
+        lines.append("-" * len(lines[0]))
+        lines.append(f"{'TOTAL':<{width}}  {total_transactions:>8}  {total_points:>6}  {total_hit:>5}  "
+                     f"{_percent(total_hit, total_points):>5}")
+        if self.unknown:
+            lines.append(f"{self.unknown} transactions named no known API")
+        if not include_unused:
+            unused = len(self.dispatcher.schemas) - len(self.plans)
+            if unused:
+                lines.append(f"{unused} APIs received no transactions")
+        return "\n".join(lines)
+
+
+def _percent(hit: int, total: int) -> str:
+    return f"{100 * hit // total}%" if total else "100%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report request schema coverage for a JSONL transcript.")
+    parser.add_argument("transcript", help="Path of the JSONL transcript, or - for stdin.")
+    parser.add_argument("--show-missing", action="store_true", help="List the points never reached.")
+    parser.add_argument("--include-unused", action="store_true", help="Also list APIs with no transactions.")
+    parser.add_argument("--json", metavar="PATH", help="Also write every point's hit count as JSON.")
+    args = parser.parse_args()
+
+    coverage = SchemaCoverage()
+    fileobj = sys.stdin.buffer if args.transcript == "-" else open(args.transcript, 'rb')
+    with fileobj:
+        for _, line in iter_lines(fileobj, max_line_length=DEFAULT_MAX_LINE_LENGTH):
+            if line is None or not line.strip():
+                continue
+            try:
+                coverage.record(json.loads(line))
+            except ValueError:
+                continue
+    print(coverage.report(args.show_missing, args.include_unused))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(coverage.to_dict(), f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
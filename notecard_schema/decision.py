@@ -0,0 +1,135 @@
+"""
+Decision tables for the conditional logic in object schemas.
+
+Schemas such as `card.attn` (nested `allOf`/`if`/`then`/`else`/`not`) and
+`web.post`/`web.put` (`not: {anyOf: [{allOf: ...}]}`) only constrain which
+properties are present and whether individual property values match some
+subschema. Such a block is a boolean formula over a handful of atoms:
+
+- "property `p` is present", from `required`;
+- "the value of `p` matches subschema `S`", from `properties`.
+
+`build_table` reduces the block to that formula and evaluates it for every
+combination of atoms ahead of time. At validation time the generated code
+sets one bit per atom and looks the resulting mask up in the precomputed
+table, which is stored as the bits of a single integer.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# Tables grow as 2**atoms, so larger blocks are left to generic evaluation.
+MAX_ATOMS = 12
+
+CONDITIONAL_KEYWORDS = ("allOf", "anyOf", "oneOf", "not", "if", "then", "else")
+FORMULA_KEYWORDS = frozenset(("required", "properties") + CONDITIONAL_KEYWORDS)
+
+TRUE = ("true",)
+FALSE = ("false",)
+
+
+class Ineligible(Exception):
+    """Raised when a schema cannot be reduced to a presence/match formula."""
+
+
+class DecisionTable:
+    """The atoms, formula and truth table for one conditional block."""
+
+    def __init__(self, validation_keywords: frozenset):
+        self._validation_keywords = validation_keywords
+        self.atoms: List[Tuple[str, str, Any]] = []
+        self._atom_index: Dict[str, int] = {}
+        self.formula: Any = TRUE
+        self.table = 0
+
+    def atom(self, kind: str, name: str, schema: Any = None) -> Tuple[str, int]:
+        """Return the formula node for an atom, registering it on first use."""
+        key = json.dumps([kind, name, schema], sort_keys=True)
+        index = self._atom_index.get(key)
+        if index is None:
+            index = len(self.atoms)
+            if index >= MAX_ATOMS:
+                raise Ineligible("too many atoms")
+            self._atom_index[key] = index
+            self.atoms.append((kind, name, schema))
+        return ("atom", index)
+
+    def reduce(self, schema: Any) -> Any:
+        """Return the boolean formula equivalent to a schema applied to an object."""
+        if schema is True:
+            return TRUE
+        if schema is False:
+            return FALSE
+        if not isinstance(schema, dict):
+            raise Ineligible("not a schema")
+        if (schema.keys() & self._validation_keywords) - FORMULA_KEYWORDS:
+            raise Ineligible("uses keywords other than presence and conditionals")
+
+        terms = [self.atom("present", name) for name in schema.get("required", [])]
+        for name, subschema in schema.get("properties", {}).items():
+            if subschema is True or (isinstance(subschema, dict) and not subschema.keys() & self._validation_keywords):
+                continue
+            terms.append(("or", [("not", self.atom("present", name)), self.atom("match", name, subschema)]))
+        terms.extend(self.reduce(subschema) for subschema in schema.get("allOf", []))
+        if "anyOf" in schema:
+            terms.append(("or", [self.reduce(subschema) for subschema in schema["anyOf"]]))
+        if "oneOf" in schema:
+            terms.append(("one", [self.reduce(subschema) for subschema in schema["oneOf"]]))
+        if "not" in schema:
+            terms.append(("not", self.reduce(schema["not"])))
+        if "if" in schema:
+            terms.append(("if", self.reduce(schema["if"]),
+                          self.reduce(schema.get("then", True)),
+                          self.reduce(schema.get("else", True))))
+        return ("and", terms)
+
+    def build(self, formula: Any) -> None:
+        """Evaluate the formula for every atom combination and store the table."""
+        self.formula = formula
+        table = 0
+        for mask in range(1 << len(self.atoms)):
+            if evaluate(formula, mask):
+                table |= 1 << mask
+        self.table = table
+
+    def allows(self, mask: int) -> bool:
+        """Return whether the table accepts an atom combination."""
+        return bool((self.table >> mask) & 1)
+
+
+def evaluate(formula: Any, mask: int) -> bool:
+    """Evaluate a formula with atom values taken from the bits of `mask`."""
+    kind = formula[0]
+    if kind == "atom":
+        return bool((mask >> formula[1]) & 1)
+    if kind == "true":
+        return True
+    if kind == "false":
+        return False
+    if kind == "not":
+        return not evaluate(formula[1], mask)
+    if kind == "and":
+        return all(evaluate(term, mask) for term in formula[1])
+    if kind == "or":
+        return any(evaluate(term, mask) for term in formula[1])
+    if kind == "one":
+        return sum(evaluate(term, mask) for term in formula[1]) == 1
+    if kind == "if":
+        return evaluate(formula[2] if evaluate(formula[1], mask) else formula[3], mask)
+    raise ValueError(f"Unknown formula node: {kind}")
+
+
+def build_table(schema: Dict[str, Any], keywords: Tuple[str, ...],
+                validation_keywords: frozenset) -> Optional[DecisionTable]:
+    """Build a decision table for the given conditional keywords of a schema.
+
+    Returns None when the keywords cannot be reduced to a formula over at
+    most MAX_ATOMS presence/match atoms.
+    """
+    table = DecisionTable(validation_keywords)
+    try:
+        formula = table.reduce({keyword: schema[keyword] for keyword in keywords if keyword in schema})
+    except Ineligible:
+        return None
+    table.build(formula)
+    return table
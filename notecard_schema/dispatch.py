@@ -0,0 +1,203 @@
+"""
+Constant-time dispatch of Notecard requests to their request schema.
+
+`notecard.api.json` is a `oneOf` over every `*.req.notecard.api.json` file,
+and each of those pins `req`/`cmd` to a single `const`. Evaluating the
+`oneOf` therefore means failing every branch but one. The `Dispatcher`
+indexes the request schemas by that `const` and validates an instance
+against the single branch that can match, while reporting results the same
+way the top-level `oneOf` would.
+"""
+
+import difflib
+from typing import Any, Dict, Iterator, Optional, Union
+
+from jsonschema.exceptions import ErrorTree, ValidationError, best_match
+
+from .bundle import load_bundle
+from .cache import ValidatorCache, default_cache
+from .loader import INDEX_FILE, api_name, load_schema, ref_filename
+from .runtime import strip_schema
+from .validator import SchemaValidator
+
+
+class Dispatcher:
+    """Validates Notecard requests against notecard.api.json by `req`/`cmd` lookup."""
+
+    validator_class = SchemaValidator
+
+    def __init__(self, index_schema: Dict[str, Any], schemas: Dict[str, Dict[str, Any]],
+                 cache: Union[None, bool, ValidatorCache] = None):
+        """Build the dispatch table.
+
+        Args:
+            index_schema: The contents of notecard.api.json.
+            schemas: Request schemas keyed by their filename.
+            cache: Where compiled validators are loaded from and stored:
+                None for `default_cache()`, which is off unless
+                `NOTECARD_SCHEMA_CACHE_DIR` is set; True for the process-wide
+                cache even if it is not; False to always compile; or a
+                ValidatorCache.
+        """
+        self.index_schema = index_schema
+        if cache is None or cache is True:
+            self.cache: Optional[ValidatorCache] = default_cache(enable=cache is True)
+        else:
+            self.cache = cache or None
+        self.schemas: Dict[str, Dict[str, Any]] = {}
+        for filename, schema in schemas.items():
+            properties = schema.get("properties", {})
+            consts = {
+                properties.get(key, {}).get("const") for key in ("req", "cmd")
+            }
+            if len(consts) != 1 or None in consts:
+                raise ValueError(f"{filename} does not pin 'req' and 'cmd' to a single const")
+            name = consts.pop()
+            if name in self.schemas:
+                raise ValueError(f"Duplicate request schema for '{name}' in {filename}")
+            if name != api_name(filename):
+                raise ValueError(f"{filename} declares mismatched API name '{name}'")
+            self.schemas[name] = schema
+        self._validators: Dict[str, Any] = {}
+
+    @classmethod
+    def from_directory(cls, schema_dir: Optional[str] = None, runtime: bool = False,
+                       cache: Union[None, bool, ValidatorCache] = None) -> "Dispatcher":
+        """Load notecard.api.json and every request schema it references.
+
+        With `runtime`, keep only the runtime profile of each schema (see
+        `notecard_schema.runtime`). `cache` is passed to the constructor.
+        """
+        index_schema = load_schema(INDEX_FILE, schema_dir)
+        schemas = {}
+        for ref_obj in index_schema.get("oneOf", []):
+            filename = ref_filename(ref_obj["$ref"])
+            schemas[filename] = load_schema(filename, schema_dir)
+        if runtime:
+            index_schema = strip_schema(index_schema)
+            schemas = {filename: strip_schema(schema) for filename, schema in schemas.items()}
+        return cls(index_schema, schemas, cache)
+
+    @classmethod
+    def from_bundle(cls, path: str, binary: bool = True, runtime: bool = False,
+                    cache: Union[None, bool, ValidatorCache] = None) -> "Dispatcher":
+        """Load every request schema from a single bundle written by `notecard_schema.bundle`.
+
+        The bundle's binary form is used when it is current, unless `binary`
+        is False. With `runtime`, keep only the runtime profile of the bundle.
+        `cache` is passed to the constructor.
+        """
+        bundle = load_bundle(path, binary)
+        if runtime:
+            bundle = strip_schema(bundle)
+        schemas = {}
+        for ref_obj in bundle.get("oneOf", []):
+            name = ref_obj["$ref"].rsplit('/', 1)[-1]
+            schemas[f"{name}.notecard.api.json"] = bundle["$defs"][name]
+        return cls(bundle, schemas, cache)
+
+    def api_for(self, instance: Any) -> Optional[str]:
+        """Return the API an instance addresses, or None if it names no known API."""
+        if not isinstance(instance, dict):
+            return None
+        name = instance.get("req", instance.get("cmd"))
+        if isinstance(name, str) and name in self.schemas:
+            return name
+        return None
+
+    def validator_for(self, name: str):
+        """Return the (cached) validator for a single request schema."""
+        validator = self._validators.get(name)
+        if validator is None:
+            validator = self.validator_class(self.schemas[name], cache=self.cache)
+            self._validators[name] = validator
+        return validator
+
+    def warm(self) -> "Dispatcher":
+        """Build the validator for every API now instead of on first use."""
+        for name in self.schemas:
+            self.validator_for(name)
+        return self
+
+    def is_valid(self, instance: Any) -> bool:
+        """Return True if the instance is valid under notecard.api.json.
+
+        Uses the compiled fast path and never constructs error objects.
+        """
+        name = self.api_for(instance)
+        return name is not None and self.validator_for(name).is_valid(instance)
+
+    def iter_errors(self, instance: Any) -> Iterator[ValidationError]:
+        """Yield the top-level `oneOf` error, if any, for an instance.
+
+        The error mirrors the one jsonschema reports for notecard.api.json,
+        except its `context` only holds errors from the dispatched schema
+        instead of every branch.
+        """
+        name = self.api_for(instance)
+        context = []
+        if name is not None:
+            context = list(self.validator_for(name).iter_errors(instance))
+            if not context:
+                return
+        yield ValidationError(
+            f"{instance!r} is not valid under any of the given schemas",
+            validator="oneOf",
+            validator_value=self.index_schema.get("oneOf"),
+            instance=instance,
+            schema=self.index_schema,
+            context=context,
+        )
+
+    def explain(self, instance: Any) -> ErrorTree:
+        """Return the full error tree for an instance (empty if it is valid)."""
+        return ErrorTree(self.iter_errors(instance))
+
+    def suggest(self, name: Any) -> Optional[str]:
+        """Return the known API name closest to a misspelled one, if any is close."""
+        if not isinstance(name, str):
+            return None
+        matches = difflib.get_close_matches(name, self.schemas, n=1, cutoff=0.6)
+        return matches[0] if matches else None
+
+    def best_error(self, instance: Any) -> Optional[ValidationError]:
+        """Return the most relevant error for an instance, or None if it is valid.
+
+        Rather than ranking errors from every `oneOf` branch, this works out
+        the intended API from `req`/`cmd` and returns the best error from that
+        schema alone. When no API matches, the error names the unknown value
+        and the closest known API.
+        """
+        name = self.api_for(instance)
+        if name is not None:
+            validator = self.validator_for(name)
+            if validator.is_valid(instance):
+                return None
+            return best_match(validator.iter_errors(instance))
+
+        message = f"{instance!r} is not valid under any of the given schemas"
+        path = ()
+        if not isinstance(instance, dict):
+            message += " (expected an object)"
+        elif "req" not in instance and "cmd" not in instance:
+            message += " (a 'req' or 'cmd' property is required)"
+        else:
+            key = "req" if "req" in instance else "cmd"
+            path = (key,)
+            message += f" ({instance[key]!r} is not a known Notecard API"
+            suggestion = self.suggest(instance[key])
+            message += f"; did you mean {suggestion!r}?)" if suggestion else ")"
+        return ValidationError(
+            message,
+            validator="oneOf",
+            validator_value=self.index_schema.get("oneOf"),
+            instance=instance,
+            schema=self.index_schema,
+            path=path,
+        )
+
+    def validate(self, instance: Any) -> None:
+        """Raise the most relevant ValidationError if the instance is invalid."""
+        error = self.best_error(instance)
+        if error is not None:
+            raise error
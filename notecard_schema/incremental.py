@@ -0,0 +1,294 @@
+"""
+Incremental validation of Notecard transactions as their bytes arrive.
+
+Over a slow UART a line can take a long time to arrive, and buffering it
+all before validating means a bad transaction is only noticed at the
+newline. `IncrementalValidator` is fed byte chunks and tracks just enough
+of the JSON structure (string, escape and nesting state, plus the keys of
+the top-level object) to reject a line as soon as:
+
+- it does not start with `{`;
+- it grows past `max_line_length`;
+- it is the response `expect_response` announced, and has a top-level
+  property that `unevaluatedProperties: false` (or `additionalProperties:
+  false`) rules out, or whose schema rejects every value.
+
+An early rejection never contradicts full validation, which, like
+`json.loads` and the Notecard, keeps the last copy of a repeated key.
+Checks that depend on a request's API are therefore left to the newline by
+default, since a later `"req"` could replace the one already read. With
+`strict=True`, a repeated top-level property is itself an error, and a
+request is also rejected as soon as:
+
+- its `req` or `cmd` names an unknown API;
+- it has a top-level property its schema rules out as above, such as the
+  unsupported arguments of a scoped validator;
+- it repeats a top-level property.
+
+A rejected line's buffer is freed at once and the rest of the line is
+skipped. Lines that survive are fully validated when their newline arrives.
+"""
+
+import json
+import re
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .compiler import CompileError, evaluated_properties, is_trivial
+from .dispatch import Dispatcher
+from .pairing import PairingValidator, check_response
+from .stream import DEFAULT_MAX_LINE_LENGTH, validate_line
+
+# (API name or None, valid, error messages), as returned by validate_line.
+LineResult = Tuple[Optional[str], bool, List[str]]
+
+_SPECIAL = re.compile(rb'[\n"\\{}\[\],]')
+_STRING_SPECIAL = re.compile(rb'[\n"\\]')
+_WHITESPACE = b' \t\r'
+
+
+def closed_properties(schema: Dict[str, Any]) -> Tuple[Optional[FrozenSet[str]], str]:
+    """Return the top-level property names a schema allows and the keyword that closes it.
+
+    Returns None for the names when the schema allows other properties or the
+    allowed set cannot be determined statically.
+    """
+    if schema.get("unevaluatedProperties") is False:
+        try:
+            return evaluated_properties(schema), "unevaluatedProperties"
+        except CompileError:
+            return None, "unevaluatedProperties"
+    if schema.get("additionalProperties") is False and "patternProperties" not in schema:
+        return frozenset(schema.get("properties", {})), "additionalProperties"
+    return None, ""
+
+
+def forbidden_reason(schema: Any) -> Optional[str]:
+    """Return why a property schema rejects every value, or None if it may accept some."""
+    if schema is False:
+        return "False schema does not allow any value"
+    if isinstance(schema, dict) and "not" in schema and is_trivial(schema["not"]):
+        rest = {key: value for key, value in schema.items() if key != "not"}
+        if not rest or is_trivial(rest):
+            reason = schema["not"].get("description") if isinstance(schema["not"], dict) else None
+            return reason or "No value is allowed"
+    return None
+
+
+class IncrementalValidator:
+    """Validates newline-delimited transactions fed in arbitrary byte chunks."""
+
+    def __init__(self, dispatcher: Optional[Dispatcher] = None, schema_dir: Optional[str] = None,
+                 max_line_length: int = DEFAULT_MAX_LINE_LENGTH, strict: bool = False):
+        """Create an incremental validator.
+
+        Args:
+            dispatcher: The request dispatcher. Defaults to the shared
+                unscoped dispatcher.
+            schema_dir: Directory holding the response schemas.
+            max_line_length: Longest line, in bytes, that is buffered.
+            strict: Reject repeated top-level properties, which lets
+                requests be rejected early by API too.
+        """
+        self.pairing = PairingValidator(dispatcher, schema_dir)
+        self.dispatcher = self.pairing.dispatcher
+        self.max_line_length = max_line_length
+        self.strict = strict
+        self._schema_info: Dict[Tuple[str, str], Tuple[Dict[str, Any], Optional[FrozenSet[str]], str]] = {}
+        self._response_api: Optional[str] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self._buffer = bytearray()
+        self._discarding = False
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._expect_key = False
+        self._string_start = 0
+        self._string_role: Optional[str] = None
+        self._current_key: Optional[str] = None
+        self._keys: List[str] = []
+        self._seen_keys: Set[str] = set()
+        self._api: Optional[str] = None
+        self._schema: Optional[Tuple[Dict[str, Any], Optional[FrozenSet[str]], str]] = None
+        if self._response_api is not None:
+            self._api = self._response_api
+            self._schema = self._info("rsp", self._response_api)
+
+    def _info(self, kind: str, api: str):
+        info = self._schema_info.get((kind, api))
+        if info is None:
+            if kind == "req":
+                schema = self.dispatcher.schemas[api]
+            else:
+                schema = self.pairing.response_validator(api).schema
+            allowed, keyword = closed_properties(schema)
+            if kind == "rsp" and allowed is not None:
+                # Firmware error responses carry `err` whatever the schema says.
+                allowed = allowed | {"err"}
+            info = (schema, allowed, keyword)
+            self._schema_info[(kind, api)] = info
+        return info
+
+    @property
+    def pending(self) -> int:
+        """Number of bytes buffered for the line being received."""
+        return len(self._buffer)
+
+    def expect_response(self, api: Optional[str]) -> None:
+        """Validate the next line as the response to a request for `api` (None for requests).
+
+        Takes effect at the start of the next line.
+        """
+        self._response_api = api
+        if not self._started and not self._buffer:
+            self._reset()
+
+    def feed(self, chunk: bytes) -> List[LineResult]:
+        """Consume a chunk and return results for lines rejected or completed by it."""
+        results = []
+        pos = 0
+        size = len(chunk)
+        while pos < size:
+            if self._discarding:
+                end = chunk.find(b'\n', pos)
+                if end < 0:
+                    break
+                pos = end + 1
+                self._response_api = None
+                self._reset()
+                continue
+            if self._escape:
+                self._escape = False
+                if chunk[pos] != 0x0a:
+                    # A newline always ends the line, even right after a backslash.
+                    self._buffer.append(chunk[pos])
+                    pos += 1
+                continue
+            match = (_STRING_SPECIAL if self._in_string else _SPECIAL).search(chunk, pos)
+            end = match.start() if match else size
+            if not self._started and chunk[pos:end].strip(_WHITESPACE):
+                results.append(self._reject(["$: expected an object"]))
+                continue
+            if len(self._buffer) + end - pos > self.max_line_length:
+                results.append(self._reject([f"Line exceeds {self.max_line_length} bytes"]))
+                continue
+            self._buffer += chunk[pos:end]
+            if match is None:
+                break
+            pos = end + 1
+            byte = chunk[end:end + 1]
+            if byte == b'\n':
+                result = self._finish()
+                if result is not None:
+                    results.append(result)
+                continue
+            self._buffer += byte
+            errors = self._token(byte)
+            if errors:
+                results.append(self._reject(errors))
+        return results
+
+    def _reject(self, errors: List[str]) -> LineResult:
+        api = self._api
+        self._buffer = bytearray()
+        self._discarding = True
+        return api, False, errors
+
+    def _token(self, byte: bytes) -> Optional[List[str]]:
+        """Update the structural state for a special byte, returning errors to reject the line."""
+        if self._in_string:
+            if byte == b'\\':
+                self._escape = True
+                return None
+            self._in_string = False
+            role, self._string_role = self._string_role, None
+            if role is None:
+                return None
+            try:
+                text = json.loads(self._buffer[self._string_start:])
+            except ValueError:
+                # Left for full validation to report.
+                return None
+            if role == "key":
+                self._expect_key = False
+                self._current_key = text
+                return self._on_key(text)
+            return self._on_api(text)
+
+        if not self._started:
+            if byte != b'{':
+                return ["$: expected an object"]
+            self._started = True
+        if byte == b'"':
+            self._in_string = True
+            self._string_start = len(self._buffer) - 1
+            if self._depth == 1:
+                if self._expect_key:
+                    self._string_role = "key"
+                elif self.strict and self._current_key in ("req", "cmd") and self._response_api is None:
+                    self._string_role = "api"
+        elif byte in (b'{', b'['):
+            self._depth += 1
+            self._expect_key = self._depth == 1
+        elif byte in (b'}', b']'):
+            self._depth -= 1
+        elif byte == b',' and self._depth == 1:
+            self._expect_key = True
+            self._current_key = None
+        return None
+
+    def _check_key(self, key: str) -> Optional[List[str]]:
+        schema, allowed, keyword = self._schema
+        reason = forbidden_reason(schema.get("properties", {}).get(key, True))
+        if reason is not None:
+            return [f"$.{key}: {reason}"]
+        if allowed is not None and key not in allowed:
+            kind = "Unevaluated" if keyword == "unevaluatedProperties" else "Additional"
+            return [f"$: {kind} properties are not allowed ({key!r} was unexpected)"]
+        return None
+
+    def _on_key(self, key: str) -> Optional[List[str]]:
+        if self.strict:
+            if key in self._seen_keys:
+                return [f"$: Duplicate property {key!r}"]
+            self._seen_keys.add(key)
+        if self._schema is not None:
+            return self._check_key(key)
+        if self.strict:
+            self._keys.append(key)
+        return None
+
+    def _on_api(self, name: str) -> Optional[List[str]]:
+        if self._api is not None:
+            # Both `req` and `cmd`; full validation reports it.
+            return None
+        if name not in self.dispatcher.schemas:
+            message = f"$.{self._current_key}: {name!r} is not a known Notecard API"
+            suggestion = self.dispatcher.suggest(name)
+            return [message + (f"; did you mean {suggestion!r}?" if suggestion else "")]
+        self._api = name
+        self._schema = self._info("req", name)
+        for key in self._keys:
+            errors = self._check_key(key)
+            if errors:
+                return errors
+        self._keys = []
+        return None
+
+    def _finish(self) -> Optional[LineResult]:
+        line = bytes(self._buffer)
+        if not line.strip():
+            self._reset()
+            return None
+        response_api, self._response_api = self._response_api, None
+        self._reset()
+        if response_api is None:
+            return validate_line(line, self.dispatcher, self.max_line_length)
+        try:
+            message = json.loads(line)
+        except ValueError as e:
+            return response_api, False, [f"Invalid JSON: {e}"]
+        ok, errors = check_response(self.pairing.response_validator(response_api), message)
+        return response_api, ok, errors
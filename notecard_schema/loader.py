@@ -0,0 +1,88 @@
+"""Helpers for locating and loading the Notecard API schema files."""
+
+import functools
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+INDEX_FILE = "notecard.api.json"
+
+
+def _schema_dir() -> str:
+    """Return the directory holding the schema files.
+
+    An installed package carries them as `notecard_schema/schemas` package
+    data; in a source checkout they are in the repository root. The package
+    is installed unzipped, so this is the directory
+    `importlib.resources.files()` would return, found without importing
+    importlib.resources (which takes longer than the rest of the package).
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    packaged = os.path.join(here, "schemas")
+    if os.path.isfile(os.path.join(packaged, INDEX_FILE)):
+        return packaged
+    return os.path.dirname(here)
+
+
+SCHEMA_DIR = _schema_dir()
+
+_SCHEMA_FILE_RE = re.compile(r'^(?P<api>.+)\.(?P<kind>req|rsp)\.notecard\.api\.json$')
+
+
+def load_schema(filename: str, schema_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Load and parse a schema file from the schema directory."""
+    with open(os.path.join(schema_dir or SCHEMA_DIR, filename), 'r') as f:
+        return json.load(f)
+
+
+def ref_filename(ref: str) -> str:
+    """Return the local filename for a `$ref` URL from notecard.api.json."""
+    return ref.split('#', 1)[0].split('/')[-1]
+
+
+def api_name(filename: str) -> Optional[str]:
+    """Extract the API name (e.g. `card.status`) from a schema filename."""
+    match = _SCHEMA_FILE_RE.match(os.path.basename(filename))
+    return match.group('api') if match else None
+
+
+def request_filenames(schema_dir: Optional[str] = None) -> List[str]:
+    """Return the request schema filenames referenced by notecard.api.json."""
+    index = load_schema(INDEX_FILE, schema_dir)
+    return [ref_filename(ref_obj["$ref"]) for ref_obj in index.get("oneOf", []) if "$ref" in ref_obj]
+
+
+def response_filename(api: str) -> str:
+    """Return the response schema filename for an API name."""
+    return f"{api}.rsp.notecard.api.json"
+
+
+def _load_api_schema(api: str, kind: str, schema_dir: Optional[str]) -> Dict[str, Any]:
+    filename = f"{api}.{kind}.notecard.api.json"
+    if api_name(filename) != api or os.path.basename(filename) != filename:
+        raise KeyError(f"Invalid API name {api!r}")
+    try:
+        return load_schema(filename, schema_dir)
+    except FileNotFoundError:
+        raise KeyError(f"No {'request' if kind == 'req' else 'response'} schema for {api!r}") from None
+
+
+@functools.lru_cache(maxsize=None)
+def get_request_schema(api: str, schema_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Return the request schema for an API, loading it on first use.
+
+    The schema is cached and shared between callers, so it must not be
+    modified. Raises KeyError for an unknown API.
+    """
+    return _load_api_schema(api, "req", schema_dir)
+
+
+@functools.lru_cache(maxsize=None)
+def get_response_schema(api: str, schema_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Return the response schema for an API, loading it on first use.
+
+    The schema is cached and shared between callers, so it must not be
+    modified. Raises KeyError for an unknown API.
+    """
+    return _load_api_schema(api, "rsp", schema_dir)
@@ -0,0 +1,115 @@
+"""
+Opt-in memoization of validation results.
+
+Hosts poll a few requests (`card.status`, `hub.sync.status`, `card.voltage`,
+`card.time`) constantly, and most of those bodies are byte-identical.
+`MemoizedValidator` keeps a bounded LRU of results in front of any validator
+with an `is_valid` method, keyed by a digest of the raw transaction bytes
+when the caller has them, or of the instance's canonical JSON otherwise.
+
+Hashing raw bytes is the cheap path. Canonicalizing a decoded instance costs
+about as much as a compiled check of a small request, so memoizing decoded
+instances mainly pays off for large requests or slower validators. Instances
+that JSON cannot represent exactly, such as dicts with non-string keys
+(`{1: x}` serializes like `{"1": x}`) or tuples, are never memoized.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_MAXSIZE = 1024
+
+
+def _is_json(value: Any) -> bool:
+    """Return whether a decoded value round-trips through JSON as the same types."""
+    if isinstance(value, dict):
+        return all(isinstance(key, str) and _is_json(item) for key, item in value.items())
+    if isinstance(value, list):
+        return all(map(_is_json, value))
+    return not isinstance(value, tuple)
+
+
+class MemoizedValidator:
+    """Caches `is_valid` results of a wrapped validator in a bounded LRU."""
+
+    def __init__(self, validator: Any, maxsize: int = DEFAULT_MAXSIZE):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.validator = validator
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._results: "OrderedDict[bytes, bool]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(instance: Any = None, raw: Optional[bytes] = None) -> Optional[bytes]:
+        """Return the memo key for raw bytes or a decoded instance.
+
+        Returns None if the instance cannot be serialized as JSON, or would
+        serialize like a different instance.
+        """
+        if raw is not None:
+            return hashlib.blake2b(raw, digest_size=16, person=b"raw").digest()
+        if not _is_json(instance):
+            return None
+        try:
+            canonical = json.dumps(instance, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        except (TypeError, ValueError):
+            return None
+        return hashlib.blake2b(canonical.encode(), digest_size=16, person=b"json").digest()
+
+    def is_valid(self, instance: Any = None, raw: Optional[bytes] = None) -> bool:
+        """Return whether an instance is valid, reusing earlier results for identical input.
+
+        Args:
+            instance: The decoded transaction. Decoded from `raw` on a miss if omitted.
+            raw: The transaction bytes as received, if available.
+        """
+        key = self.key(instance, raw)
+        if key is not None:
+            with self._lock:
+                result = self._results.get(key)
+                if result is not None:
+                    self._results.move_to_end(key)
+                    self.hits += 1
+                    return result
+        if instance is None and raw is not None:
+            try:
+                instance = json.loads(raw)
+            except ValueError:
+                instance = raw
+        result = self.validator.is_valid(instance)
+        with self._lock:
+            self.misses += 1
+            if key is not None:
+                self._results[key] = result
+                if len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+                    self.evictions += 1
+        return result
+
+    def __getattr__(self, name: str) -> Any:
+        # Everything other than is_valid (validate, explain, ...) goes to the wrapped validator.
+        return getattr(self.validator, name)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit, miss and eviction counters and the current size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._results),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self) -> None:
+        """Drop every memoized result and reset the counters."""
+        with self._lock:
+            self._results.clear()
+            self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,281 @@
+"""
+Optional timing instrumentation for validation.
+
+`instrument` wraps a dispatcher so every `is_valid` call is timed per API,
+and every jsonschema keyword it evaluates is timed per keyword. Keyword
+time is exclusive: the time a `oneOf` spends in its branches is credited to
+the keywords inside them, not to the `oneOf` itself.
+
+The compiled fast path has no keywords, so by default keyword timings only
+cover error reporting (`iter_errors`, `best_error`, `validate`). Pass
+`keywords=True` to route `is_valid` through jsonschema as well, which is
+several times slower but shows where schema evaluation time goes.
+
+Latencies are recorded in fixed power-of-two buckets from 1 µs to about
+1 s, so percentiles are bucket estimates. `ValidationMetrics.snapshot`
+returns the counters as a dict and `write_prometheus` writes them in the
+Prometheus text exposition format, for example for the node_exporter
+textfile collector.
+"""
+
+import bisect
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import jsonschema
+from jsonschema import validators
+
+from .cache import ValidatorCache
+from .dispatch import Dispatcher
+from .validator import SchemaValidator
+
+# Upper bucket bounds in nanoseconds: 1 µs, 2 µs, 4 µs, ... ~1.07 s.
+BUCKET_BOUNDS_NS = tuple(1000 << i for i in range(21))
+
+# Label used for instances that name no known API.
+UNKNOWN_API = "unknown"
+
+_clock = time.perf_counter_ns
+
+
+class Histogram:
+    """Call count, total, maximum and bucketed distribution of latencies.
+
+    A histogram is only written by one thread; `ValidationMetrics` keeps one
+    per thread and merges them when read.
+    """
+
+    __slots__ = ("count", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        # One count per bound, plus one for slower observations.
+        self.buckets = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+
+    def observe(self, elapsed_ns: int) -> None:
+        """Record one latency."""
+        self.count += 1
+        self.total_ns += elapsed_ns
+        self.buckets[bisect.bisect_left(BUCKET_BOUNDS_NS, elapsed_ns)] += 1
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def merge(self, other: "Histogram") -> None:
+        """Add another histogram's observations to this one."""
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def percentile(self, fraction: float) -> float:
+        """Return an estimate, in seconds, of the latency below which `fraction` of calls fall."""
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                lower = BUCKET_BOUNDS_NS[index - 1] if index else 0
+                upper = BUCKET_BOUNDS_NS[index] if index < len(BUCKET_BOUNDS_NS) else self.max_ns
+                # Interpolate within the bucket, never past the slowest call.
+                estimate = lower + (upper - lower) * (rank - seen) / count
+                return min(estimate, self.max_ns) / 1e9
+            seen += count
+        return self.max_ns / 1e9
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum_seconds": self.total_ns / 1e9,
+            "max_seconds": self.max_ns / 1e9,
+            "p50_seconds": self.percentile(0.5),
+            "p90_seconds": self.percentile(0.9),
+            "p99_seconds": self.percentile(0.99),
+        }
+
+
+class _ThreadTables(threading.local):
+    """The calling thread's histograms and keyword timing stack."""
+
+    def __init__(self, registry: List[Tuple[Dict[str, Histogram], Dict[str, Histogram]]],
+                 lock: threading.Lock):
+        self.apis: Dict[str, Histogram] = {}
+        self.keywords: Dict[str, Histogram] = {}
+        self.stack: List[int] = []
+        with lock:
+            registry.append((self.apis, self.keywords))
+
+
+class ValidationMetrics:
+    """Latency histograms per API and per keyword.
+
+    Each thread records into its own histograms, so recording takes no lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._registry: List[Tuple[Dict[str, Histogram], Dict[str, Histogram]]] = []
+        self._tables = _ThreadTables(self._registry, self._lock)
+        self._jsonschema_class = None
+
+    def observe_api(self, api: str, elapsed_ns: int) -> None:
+        apis = self._tables.apis
+        histogram = apis.get(api)
+        if histogram is None:
+            histogram = apis[api] = Histogram()
+        histogram.observe(elapsed_ns)
+
+    def observe_keyword(self, keyword: str, elapsed_ns: int) -> None:
+        keywords = self._tables.keywords
+        histogram = keywords.get(keyword)
+        if histogram is None:
+            histogram = keywords[keyword] = Histogram()
+        histogram.observe(elapsed_ns)
+
+    def _timed(self, keyword: str, function):
+        tables = self._tables
+        observe = self.observe_keyword
+
+        def timed(validator, value, instance, schema):
+            stack = tables.stack
+            stack.append(0)
+            start = _clock()
+            try:
+                errors = function(validator, value, instance, schema)
+                if errors:
+                    yield from errors
+            finally:
+                elapsed = _clock() - start
+                nested = stack.pop()
+                if stack:
+                    stack[-1] += elapsed
+                observe(keyword, elapsed - nested)
+        return timed
+
+    @property
+    def jsonschema_class(self):
+        """A Draft 2020-12 validator class whose keywords record into these metrics."""
+        if self._jsonschema_class is None:
+            base = jsonschema.Draft202012Validator
+            self._jsonschema_class = validators.extend(base, {
+                keyword: self._timed(keyword, function) for keyword, function in base.VALIDATORS.items()
+            })
+        return self._jsonschema_class
+
+    def _merged(self, index: int) -> Dict[str, Histogram]:
+        merged: Dict[str, Histogram] = {}
+        with self._lock:
+            tables = [tables[index] for tables in self._registry]
+        for table in tables:
+            for name, histogram in list(table.items()):
+                merged.setdefault(name, Histogram()).merge(histogram)
+        return dict(sorted(merged.items()))
+
+    @property
+    def apis(self) -> Dict[str, Histogram]:
+        """Histograms of `is_valid` latency per API, merged across threads."""
+        return self._merged(0)
+
+    @property
+    def keywords(self) -> Dict[str, Histogram]:
+        """Histograms of exclusive keyword latency, merged across threads."""
+        return self._merged(1)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Return the counters of every API and keyword as plain data."""
+        return {
+            "apis": {name: histogram.snapshot() for name, histogram in self.apis.items()},
+            "keywords": {name: histogram.snapshot() for name, histogram in self.keywords.items()},
+        }
+
+    def reset(self) -> None:
+        """Drop every recorded observation."""
+        with self._lock:
+            for apis, keywords in self._registry:
+                apis.clear()
+                keywords.clear()
+
+    def to_prometheus(self) -> str:
+        """Return the histograms in the Prometheus text exposition format."""
+        lines: List[str] = []
+        families = (
+            ("notecard_schema_validation_seconds", "Time spent validating requests, by API.", "api", self.apis),
+            ("notecard_schema_keyword_seconds", "Time spent evaluating schema keywords, excluding nested keywords.",
+             "keyword", self.keywords),
+        )
+        for family, help_text, label, table in families:
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} histogram")
+            for name, histogram in table.items():
+                value = _label_value(name)
+                cumulative = 0
+                for bound, bucket in zip(BUCKET_BOUNDS_NS, histogram.buckets):
+                    cumulative += bucket
+                    lines.append(f'{family}_bucket{{{label}="{value}",le="{bound / 1e9:g}"}} {cumulative}')
+                lines.append(f'{family}_bucket{{{label}="{value}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{family}_sum{{{label}="{value}"}} {histogram.total_ns / 1e9!r}')
+                lines.append(f'{family}_count{{{label}="{value}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str) -> None:
+        """Atomically write the Prometheus text format to a file."""
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".prom")
+        try:
+            with os.fdopen(fd, 'w') as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class InstrumentedValidator(SchemaValidator):
+    """A SchemaValidator whose jsonschema keywords record into a ValidationMetrics."""
+
+    def __init__(self, schema: Any, metrics: ValidationMetrics, keywords: bool = False,
+                 cache: Optional[ValidatorCache] = None):
+        self.jsonschema_class = metrics.jsonschema_class
+        check = (lambda instance: self.jsonschema_validator.is_valid(instance)) if keywords else None
+        super().__init__(schema, check, cache)
+
+
+class InstrumentedDispatcher(Dispatcher):
+    """A Dispatcher that times `is_valid` per API."""
+
+    def __init__(self, index_schema: Dict[str, Any], schemas: Dict[str, Dict[str, Any]],
+                 metrics: Optional[ValidationMetrics] = None, keywords: bool = False):
+        super().__init__(index_schema, schemas)
+        self.metrics = metrics or ValidationMetrics()
+        self.validator_class = (
+            lambda schema, cache=None: InstrumentedValidator(schema, self.metrics, keywords, cache))
+
+    def is_valid(self, instance: Any) -> bool:
+        start = _clock()
+        name = self.api_for(instance)
+        result = name is not None and self.validator_for(name).is_valid(instance)
+        self.metrics.observe_api(name or UNKNOWN_API, _clock() - start)
+        return result
+
+
+def instrument(dispatcher: Dispatcher, metrics: Optional[ValidationMetrics] = None,
+               keywords: bool = False) -> InstrumentedDispatcher:
+    """Return an instrumented copy of a dispatcher.
+
+    Args:
+        dispatcher: The dispatcher to copy, such as a scoped one from `validator_for`.
+        metrics: Where to record timings. A new ValidationMetrics by default.
+        keywords: Validate with jsonschema in `is_valid` too, so every call
+            records keyword timings.
+    """
+    schemas = {f"{name}.req.notecard.api.json": schema for name, schema in dispatcher.schemas.items()}
+    return InstrumentedDispatcher(dispatcher.index_schema, schemas, metrics, keywords)
@@ -0,0 +1,176 @@
+"""
+Validation of request/response pairs in Notecard transcripts.
+
+A Notecard answers every `req` transaction with exactly one response and
+never answers a `cmd`. `PairingValidator` follows interleaved transcripts
+from many connections in a single pass, keeping only the API of the
+outstanding `req` for each connection, and validates:
+
+- each request against notecard.api.json, as `validate_stream` does;
+- each response against `<api>.rsp.notecard.api.json` for the request it
+  answers.
+
+Response schemas describe successful responses, so a response carrying an
+`err` string is accepted without schema validation unless its schema
+declares `err` itself. Responses that arrive with no outstanding request
+or answer a request for an unknown API, and requests that are superseded
+or never answered, are reported as errors.
+"""
+
+import json
+from typing import Any, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+from .dispatch import Dispatcher
+from .loader import load_schema, response_filename
+from .stream import DEFAULT_BUFFER_SIZE, DEFAULT_MAX_LINE_LENGTH, check_request, format_error, iter_lines
+from .validator import SchemaValidator
+
+# (connection, "req" or "rsp", API name or None, valid, error messages)
+PairResult = Tuple[Hashable, Optional[str], Optional[str], bool, List[str]]
+
+# Connection id used for JSONL records without a "conn" field.
+DEFAULT_CONNECTION = None
+
+
+def is_error_response(schema: Dict[str, Any], message: Any) -> bool:
+    """Return True if a message is a firmware error response the schema does not describe."""
+    return isinstance(message, dict) and "err" in message and "err" not in schema.get("properties", {})
+
+
+def check_response(validator: SchemaValidator, message: Any) -> Tuple[bool, List[str]]:
+    """Validate a response with its API's response validator and return `(ok, errors)`."""
+    if is_error_response(validator.schema, message):
+        if isinstance(message["err"], str):
+            return True, []
+        return False, ["$.err: error responses must carry an 'err' string"]
+    if validator.is_valid(message):
+        return True, []
+    return False, [format_error(error) for error in validator.iter_errors(message)]
+
+
+class PairingValidator:
+    """Validates each response in a transcript against the schema of the request it answers."""
+
+    def __init__(self, dispatcher: Optional[Dispatcher] = None, schema_dir: Optional[str] = None):
+        if dispatcher is None:
+            from .scoping import validator_for
+            dispatcher = validator_for(schema_dir=schema_dir)
+        self.dispatcher = dispatcher
+        self.schema_dir = schema_dir
+        self._response_validators: Dict[str, SchemaValidator] = {}
+        # Connection id -> API of the request awaiting a response.
+        self._outstanding: Dict[Hashable, Optional[str]] = {}
+
+    def response_validator(self, api: str) -> SchemaValidator:
+        """Return the (cached) validator for an API's response schema."""
+        validator = self._response_validators.get(api)
+        if validator is None:
+            validator = SchemaValidator(load_schema(response_filename(api), self.schema_dir),
+                                        cache=self.dispatcher.cache)
+            self._response_validators[api] = validator
+        return validator
+
+    def _check_request(self, conn: Hashable, message: Any) -> PairResult:
+        api, ok, errors = check_request(self.dispatcher, message)
+        return conn, "req", api, ok, errors
+
+    def _check_response(self, conn: Hashable, api: Optional[str], message: Any) -> PairResult:
+        if api is None:
+            # The request named no known API, so there is no schema to check against.
+            return conn, "rsp", None, False, ["Response to a request for an unknown API"]
+        ok, errors = check_response(self.response_validator(api), message)
+        return conn, "rsp", api, ok, errors
+
+    def feed(self, conn: Hashable, message: Any) -> List[PairResult]:
+        """Process one message from a connection and return its results.
+
+        A message with a `req` or `cmd` property is a request; anything else
+        is a response to the connection's outstanding request.
+        """
+        results = []
+        if isinstance(message, dict) and ("req" in message or "cmd" in message):
+            if conn in self._outstanding:
+                api = self._outstanding.pop(conn)
+                results.append((conn, "req", api, False, [f"No response to {api or 'unknown'} request"]))
+            results.append(self._check_request(conn, message))
+            if "req" in message:
+                self._outstanding[conn] = results[-1][2]
+        elif conn in self._outstanding:
+            results.append(self._check_response(conn, self._outstanding.pop(conn), message))
+        else:
+            results.append((conn, "rsp", None, False, ["Response without an outstanding request"]))
+        return results
+
+    def finish(self) -> List[PairResult]:
+        """Report every request still awaiting a response and reset all connections."""
+        results = [(conn, "req", api, False, [f"No response to {api or 'unknown'} request"])
+                   for conn, api in self._outstanding.items()]
+        self._outstanding.clear()
+        return results
+
+    def validate(self, records: Iterable[Tuple[Hashable, Any]]) -> Iterator[PairResult]:
+        """Validate `(conn, message)` records in transcript order, then report unanswered requests."""
+        for conn, message in records:
+            yield from self.feed(conn, message)
+        yield from self.finish()
+
+
+def connection_key(conn: Any) -> Hashable:
+    """Return a hashable key for a JSON `conn` value.
+
+    Strings and null are used as they are. Every other value becomes a
+    `(type, value)` pair, with arrays as tuples and objects as frozensets of
+    their items, recursively. Equal values share a key, and values of
+    different JSON types, such as `1`, `1.0` and `true`, never do.
+    """
+    if conn is None or isinstance(conn, str):
+        return conn
+    if isinstance(conn, list):
+        return "list", tuple(map(connection_key, conn))
+    if isinstance(conn, dict):
+        return "dict", frozenset((name, connection_key(value)) for name, value in conn.items())
+    return type(conn).__name__, conn
+
+
+def iter_records(fileobj: Any, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                 max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Iterator[Tuple[int, Union[Tuple[Hashable, Any], str]]]:
+    """Yield `(line_no, record)` for a JSONL transcript of `{"conn": ..., "message": ...}` lines.
+
+    `record` is a `(conn, message)` pair, or an error string for lines that
+    cannot be read. `conn` defaults to DEFAULT_CONNECTION when omitted, and
+    is made hashable with `connection_key`.
+    """
+    for line_no, line in iter_lines(fileobj, buffer_size, max_line_length):
+        if line is None:
+            yield line_no, f"Line exceeds {max_line_length} bytes"
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict) or "message" not in record:
+            yield line_no, "Expected an object with a 'message' property"
+            continue
+        yield line_no, (connection_key(record.get("conn", DEFAULT_CONNECTION)), record["message"])
+
+
+def validate_transcript(fileobj: Any, validator: Optional[PairingValidator] = None,
+                        buffer_size: int = DEFAULT_BUFFER_SIZE,
+                        max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Iterator[Tuple[Optional[int], PairResult]]:
+    """Yield `(line_no, result)` for a JSONL transcript of paired requests and responses.
+
+    Unanswered requests are reported at the end with a line number of None.
+    Unreadable lines are reported with a `conn` and direction of None.
+    """
+    validator = validator or PairingValidator()
+    for line_no, record in iter_records(fileobj, buffer_size, max_line_length):
+        if isinstance(record, str):
+            yield line_no, (None, None, None, False, [record])
+            continue
+        for result in validator.feed(*record):
+            yield line_no, result
+    for result in validator.finish():
+        yield None, result
@@ -0,0 +1,134 @@
+"""
+Multiprocess validation of large JSONL transcripts.
+
+`validate_file` memory-maps a transcript, cuts it into byte-range shards
+that end on newline boundaries and validates the shards in a process pool.
+Each worker builds and warms its dispatcher once, in the pool initializer,
+loading its compiled validators from the on-disk cache that the parent
+process fills when the cache is enabled, so shards only pay for validation. Shards are validated with the same code
+as `validate_stream` and merged back in file order, so the results are
+identical to a serial pass.
+
+At most two shards per worker are in flight at a time, which bounds the
+memory held by results waiting to be merged.
+"""
+
+import itertools
+import mmap
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional, Tuple
+
+from .scoping import validator_for
+from .stream import (DEFAULT_BUFFER_SIZE, DEFAULT_MAX_LINE_LENGTH, Result, iter_lines,
+                     validate_lines, validate_stream)
+
+DEFAULT_SHARD_SIZE = 8 * 1024 * 1024
+
+# The worker process's dispatcher, set by the pool initializer.
+_dispatcher = None
+
+
+class ShardReader:
+    """A file-like reader over one byte range of a memory map."""
+
+    def __init__(self, mm: mmap.mmap, start: int, end: int):
+        self.mm = mm
+        self.pos = start
+        self.end = end
+
+    def read(self, size: int = -1) -> bytes:
+        stop = self.end if size < 0 else min(self.pos + size, self.end)
+        data = self.mm[self.pos:stop]
+        self.pos = stop
+        return data
+
+
+def shard_ranges(mm: mmap.mmap, shard_size: int = DEFAULT_SHARD_SIZE) -> Iterator[Tuple[int, int]]:
+    """Yield `(start, end)` byte ranges of about `shard_size` bytes that end after a newline."""
+    size = len(mm)
+    start = 0
+    while start < size:
+        end = start + shard_size
+        if end >= size:
+            end = size
+        else:
+            newline = mm.find(b'\n', end - 1)
+            end = size if newline < 0 else newline + 1
+        yield start, end
+        start = end
+
+
+def _warm(api_version: Optional[str], sku: Optional[str], schema_dir: Optional[str]):
+    """Return the scoped dispatcher with every validator built, through `default_cache()` when enabled."""
+    return validator_for(api_version, sku, schema_dir).warm()
+
+
+def _init_worker(api_version: Optional[str], sku: Optional[str], schema_dir: Optional[str]) -> None:
+    global _dispatcher
+    _dispatcher = _warm(api_version, sku, schema_dir)
+
+
+def _validate_shard(path: str, start: int, end: int, buffer_size: int,
+                    max_line_length: int) -> Tuple[int, List[Result]]:
+    """Validate one shard, returning its line count and results numbered from 1."""
+    line_count = 0
+
+    def counted(lines):
+        nonlocal line_count
+        for line_no, line in lines:
+            line_count = line_no
+            yield line_no, line
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        lines = iter_lines(ShardReader(mm, start, end), buffer_size, max_line_length)
+        results = list(validate_lines(counted(lines), _dispatcher, max_line_length))
+    return line_count, results
+
+
+def validate_file(path: str, jobs: Optional[int] = None, shard_size: int = DEFAULT_SHARD_SIZE,
+                  api_version: Optional[str] = None, sku: Optional[str] = None,
+                  schema_dir: Optional[str] = None, buffer_size: int = DEFAULT_BUFFER_SIZE,
+                  max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Iterator[Result]:
+    """Yield `(line_no, api, ok, errors)` for a JSONL transcript, validating shards in parallel.
+
+    Args:
+        path: The transcript to validate.
+        jobs: Number of worker processes. Defaults to the CPU count; with
+            one job the file is validated serially in this process.
+        shard_size: Approximate number of bytes per shard.
+        api_version: Firmware version to scope validation to, if any.
+        sku: Notecard SKU to scope validation to, if any.
+        schema_dir: Directory holding the schemas.
+        buffer_size: Number of bytes read per chunk within a shard.
+        max_line_length: Longest line, in bytes, that is buffered and validated.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    # Warm here too: forked workers inherit the compiled validators, and
+    # spawned ones find them in the on-disk cache if it is enabled.
+    dispatcher = _warm(api_version, sku, schema_dir)
+    if jobs == 1:
+        with open(path, 'rb') as f:
+            yield from validate_stream(f, dispatcher, buffer_size, max_line_length)
+        return
+    if os.path.getsize(path) == 0:
+        return
+
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+            ProcessPoolExecutor(jobs, initializer=_init_worker,
+                                initargs=(api_version, sku, schema_dir)) as pool:
+        shards = shard_ranges(mm, shard_size)
+
+        def submit(start, end):
+            return pool.submit(_validate_shard, path, start, end, buffer_size, max_line_length)
+
+        pending = deque(submit(start, end) for start, end in itertools.islice(shards, 2 * jobs))
+        base = 0
+        while pending:
+            line_count, results = pending.popleft().result()
+            for start, end in itertools.islice(shards, 1):
+                pending.append(submit(start, end))
+            for line_no, api, ok, errors in results:
+                yield base + line_no, api, ok, errors
+            base += line_count
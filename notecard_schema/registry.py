@@ -0,0 +1,92 @@
+"""
+Offline `referencing.Registry` for the Notecard API schemas.
+
+`notecard.api.json` refers to each request schema by its
+`raw.githubusercontent.com` URL: on `master` in the repository, and on
+`refs/tags/<tag>` in the copy attached to each release. Validating it with
+jsonschema therefore fetches those URLs, unless a registry supplies them.
+
+`offline_registry` returns a registry whose retrieval hook maps any
+`blues/notecard-schema` URL to a local file:
+
+- `master`, `main` and `refs/heads/<branch>` URLs to the schema directory;
+- `refs/tags/<tag>` (or bare `<tag>`) URLs to `<versions_dir>/<tag>/` when
+  that directory exists, and to the schema directory otherwise.
+
+Files are read when first referenced and their resources cached, so
+several validators built from the same registry parse each file once. Any
+other URL raises `NoSuchResource`; the network is never used.
+
+    registry = offline_registry()
+    jsonschema.Draft202012Validator(released_index, registry=registry)
+"""
+
+import json
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+from referencing import Registry, Resource
+from referencing.exceptions import NoSuchResource
+from referencing.jsonschema import DRAFT202012
+
+from .loader import SCHEMA_DIR
+
+_URL_RE = re.compile(
+    r'^https?://raw\.githubusercontent\.com/blues/notecard-schema/'
+    r'(?:(?:master|main|refs/heads/[^/]+)|(?:refs/tags/)?(?P<tag>v?\d[^/]*))'
+    r'/(?P<filename>[^/]+\.json)$'
+)
+
+
+class LocalRetriever:
+    """Retrieval hook that loads `blues/notecard-schema` URLs from local files."""
+
+    def __init__(self, schema_dir: Optional[str] = None, versions_dir: Optional[str] = None):
+        """Create a retriever.
+
+        Args:
+            schema_dir: Directory holding the schema files. Defaults to the
+                package's schemas.
+            versions_dir: Directory with one subdirectory of schema files per
+                release tag (such as `v1.1.2`), used for tagged URLs.
+        """
+        self.schema_dir = schema_dir or SCHEMA_DIR
+        self.versions_dir = versions_dir
+        self._resources: Dict[str, Resource] = {}
+        self._lock = threading.Lock()
+
+    def local_path(self, uri: str) -> Optional[str]:
+        """Return the local file for a schema URL, or None if it is not a notecard-schema URL."""
+        match = _URL_RE.match(uri)
+        if match is None:
+            return None
+        directory = self.schema_dir
+        tag = match.group('tag')
+        if tag is not None and self.versions_dir is not None:
+            tagged = os.path.join(self.versions_dir, tag)
+            if os.path.isdir(tagged):
+                directory = tagged
+        return os.path.join(directory, match.group('filename'))
+
+    def __call__(self, uri: str) -> Resource:
+        path = self.local_path(uri)
+        if path is None:
+            raise NoSuchResource(ref=uri)
+        resource = self._resources.get(path)
+        if resource is None:
+            try:
+                with open(path, 'r') as f:
+                    contents = json.load(f)
+            except FileNotFoundError:
+                raise NoSuchResource(ref=uri) from None
+            resource = Resource.from_contents(contents, default_specification=DRAFT202012)
+            with self._lock:
+                resource = self._resources.setdefault(path, resource)
+        return resource
+
+
+def offline_registry(schema_dir: Optional[str] = None, versions_dir: Optional[str] = None) -> Registry:
+    """Return a registry that resolves every notecard-schema URL from local files, never the network."""
+    return Registry(retrieve=LocalRetriever(schema_dir, versions_dir))
@@ -0,0 +1,236 @@
+"""
+Runtime profile of the schemas, without their documentation.
+
+Most of each schema documents the API for people: `description`s,
+`title`s, `samples`, `annotations`, `sub-descriptions`, `codeRef` and so
+on. None of it affects validation, but a validating process keeps all of it
+in memory. `strip_schema` returns the runtime profile of a schema, which
+keeps:
+
+- the Draft 2020-12 keywords that take part in validation (`type`,
+  `properties`, `oneOf`, `unevaluatedProperties`, `$ref`, ...);
+- `minApiVersion` and `skus`, which `notecard_schema.scoping` reads;
+- the `const`, `minApiVersion` and `skus` of `sub-descriptions` entries
+  that carry a scope, so scoped validators still drop unsupported `enum`
+  values.
+
+Every other keyword is dropped, and every remaining string is interned, so
+the names and values repeated across schemas are stored once per process.
+
+`write_runtime_schemas` writes the runtime profile of every schema file to
+a directory that can be passed as `schema_dir` anywhere a schema directory
+is accepted. Before writing, it checks that each stripped schema keeps every
+validation and scoping keyword of the full schema, at every schema
+position, with the same value, and that it accepts and rejects the full
+schema's samples in the same way. This shows that only keywords outside the
+lists above were dropped; that those keywords do not affect validation
+rests on jsonschema ignoring keywords it does not know. `Dispatcher`'s
+`from_directory` and `from_bundle` also take `runtime=True` to strip the
+schemas as they load. Validation results do not change, but error messages
+that quote a subschema (such as those of `not`) show the stripped one.
+
+Usage: python -m notecard_schema.runtime --output runtime-schemas --report
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterator, Optional
+
+import jsonschema
+
+from .loader import INDEX_FILE, SCHEMA_DIR, api_name, load_schema, request_filenames, response_filename
+
+CODES_FILE = "notecard.codes.json"
+
+# Draft 2020-12 keywords of the core, applicator, unevaluated, validation
+# and format vocabularies.
+VALIDATION_KEYWORDS = frozenset((
+    "$schema", "$id", "$ref", "$defs", "$anchor", "$dynamicRef", "$dynamicAnchor", "$vocabulary",
+    "allOf", "anyOf", "oneOf", "not", "if", "then", "else", "dependentSchemas", "prefixItems", "items",
+    "contains", "properties", "patternProperties", "additionalProperties", "propertyNames",
+    "unevaluatedItems", "unevaluatedProperties",
+    "type", "enum", "const", "multipleOf", "maximum", "exclusiveMaximum", "minimum", "exclusiveMinimum",
+    "maxLength", "minLength", "pattern", "maxItems", "minItems", "uniqueItems", "maxContains",
+    "minContains", "maxProperties", "minProperties", "required", "dependentRequired", "format",
+))
+
+# Annotations read by notecard_schema.scoping.
+SCOPING_KEYWORDS = ("minApiVersion", "skus")
+
+# Keywords whose value is a schema, a list of schemas, or a map of names to schemas.
+SUBSCHEMA_KEYWORDS = frozenset((
+    "not", "if", "then", "else", "items", "contains", "additionalProperties", "propertyNames",
+    "unevaluatedItems", "unevaluatedProperties",
+))
+SUBSCHEMA_LIST_KEYWORDS = frozenset(("allOf", "anyOf", "oneOf", "prefixItems"))
+SUBSCHEMA_MAP_KEYWORDS = frozenset(("properties", "patternProperties", "$defs", "dependentSchemas"))
+
+
+def _intern(value: Any) -> Any:
+    """Return a copy of a JSON value with every string and key interned."""
+    if isinstance(value, str):
+        return sys.intern(value)
+    if isinstance(value, dict):
+        return {sys.intern(key): _intern(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_intern(item) for item in value]
+    return value
+
+
+def strip_schema(schema: Any) -> Any:
+    """Return the runtime profile of a schema, which validates every instance the same way."""
+    if not isinstance(schema, dict):
+        return schema
+    result = {}
+    for key, value in schema.items():
+        if key in SUBSCHEMA_KEYWORDS:
+            result[sys.intern(key)] = strip_schema(value)
+        elif key in SUBSCHEMA_LIST_KEYWORDS and isinstance(value, list):
+            result[sys.intern(key)] = [strip_schema(subschema) for subschema in value]
+        elif key in SUBSCHEMA_MAP_KEYWORDS and isinstance(value, dict):
+            result[sys.intern(key)] = {sys.intern(name): strip_schema(subschema) for name, subschema in value.items()}
+        elif key in VALIDATION_KEYWORDS or key in SCOPING_KEYWORDS:
+            result[sys.intern(key)] = _intern(value)
+    if "enum" in schema and isinstance(schema.get("sub-descriptions"), list):
+        entries = [
+            {sys.intern(field): _intern(entry[field]) for field in ("const",) + SCOPING_KEYWORDS if field in entry}
+            for entry in schema["sub-descriptions"]
+            if isinstance(entry, dict) and "const" in entry and any(field in entry for field in SCOPING_KEYWORDS)
+        ]
+        if entries:
+            result["sub-descriptions"] = entries
+    return result
+
+
+def schema_files(schema_dir: Optional[str] = None) -> Iterator[str]:
+    """Yield notecard.api.json, every request and response schema file and notecard.codes.json."""
+    yield INDEX_FILE
+    for filename in request_filenames(schema_dir):
+        yield filename
+        yield response_filename(api_name(filename))
+    yield CODES_FILE
+
+
+def _changed_keywords(schema: Any, runtime: Any, path: str) -> Iterator[str]:
+    """Yield the schema positions where `runtime` drops, changes or adds a validation or scoping keyword."""
+    if not isinstance(schema, dict) or not isinstance(runtime, dict):
+        if schema != runtime:
+            yield path or "#"
+        return
+    for key, value in schema.items():
+        if key not in VALIDATION_KEYWORDS and key not in SCOPING_KEYWORDS:
+            continue
+        position = f"{path}/{key}"
+        if key not in runtime:
+            yield position
+        elif key in SUBSCHEMA_KEYWORDS:
+            yield from _changed_keywords(value, runtime[key], position)
+        elif key in SUBSCHEMA_LIST_KEYWORDS and isinstance(value, list):
+            if not isinstance(runtime[key], list) or len(runtime[key]) != len(value):
+                yield position
+                continue
+            for index, (subschema, stripped) in enumerate(zip(value, runtime[key])):
+                yield from _changed_keywords(subschema, stripped, f"{position}/{index}")
+        elif key in SUBSCHEMA_MAP_KEYWORDS and isinstance(value, dict):
+            if not isinstance(runtime[key], dict) or set(runtime[key]) != set(value):
+                yield position
+                continue
+            for name, subschema in value.items():
+                yield from _changed_keywords(subschema, runtime[key][name], f"{position}/{name}")
+        elif runtime[key] != value:
+            yield position
+    for key in runtime:
+        if key not in schema:
+            yield f"{path}/{key}"
+
+
+def verify_runtime_schema(schema: Dict[str, Any], runtime: Dict[str, Any]) -> None:
+    """Raise ValueError if a runtime profile changes a validation keyword or the result for a sample.
+
+    Every validation and scoping keyword at a schema position must be kept
+    with the same value; property names and other keys inside `properties`
+    and `$defs` are compared as names, not as keywords. The full schema's
+    samples are then validated against both.
+    """
+    name = schema.get('$id', 'schema')
+    for position in _changed_keywords(schema, runtime, ""):
+        raise ValueError(f"Runtime profile of {name} changes the validation keyword at {position}")
+    full_validator = jsonschema.Draft202012Validator(schema)
+    runtime_validator = jsonschema.Draft202012Validator(runtime)
+    for sample in schema.get("samples", []):
+        try:
+            instance = json.loads(sample["json"])
+        except (KeyError, TypeError, ValueError):
+            continue
+        if full_validator.is_valid(instance) != runtime_validator.is_valid(instance):
+            raise ValueError(f"Runtime profile of {name} changes the result for {sample['json']}")
+
+
+def write_runtime_schemas(output_dir: str, schema_dir: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Write the runtime profile of every schema file to `output_dir` and return them by filename."""
+    os.makedirs(output_dir, exist_ok=True)
+    written = {}
+    for filename in schema_files(schema_dir):
+        schema = load_schema(filename, schema_dir)
+        runtime = strip_schema(schema)
+        verify_runtime_schema(schema, runtime)
+        with open(os.path.join(output_dir, filename), 'w') as f:
+            json.dump(runtime, f, separators=(",", ":"), ensure_ascii=False)
+        written[filename] = runtime
+    return written
+
+
+def deep_size(value: Any) -> int:
+    """Return the bytes held by a JSON value, counting each shared object once."""
+    seen = set()
+    total = 0
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        total += sys.getsizeof(node)
+        if isinstance(node, dict):
+            stack.extend(node.keys())
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            stack.extend(node)
+    return total
+
+
+def memory_report(schema_dir: Optional[str] = None) -> str:
+    """Return the memory held by the full and runtime schemas of one validating process."""
+    full = {filename: load_schema(filename, schema_dir) for filename in schema_files(schema_dir)}
+    runtime = {filename: strip_schema(schema) for filename, schema in full.items()}
+    full_size, runtime_size = deep_size(full), deep_size(runtime)
+    saved = full_size - runtime_size
+    lines = [
+        f"Schemas:          {len(full)}",
+        f"Full schemas:     {full_size / 1024:10.1f} KiB",
+        f"Runtime profile:  {runtime_size / 1024:10.1f} KiB",
+        f"Saved per worker: {saved / 1024:10.1f} KiB ({100 * saved / full_size:.0f}%)",
+    ]
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write the runtime profile of every Notecard API schema.")
+    parser.add_argument("--schema_dir", default=SCHEMA_DIR, help="Directory containing the schema files.")
+    parser.add_argument("--output", help="Directory to write the runtime schemas to.")
+    parser.add_argument("--report", action="store_true", help="Print the memory the runtime profile saves.")
+    args = parser.parse_args()
+    if not args.output and not args.report:
+        parser.error("nothing to do; pass --output and/or --report")
+
+    if args.output:
+        written = write_runtime_schemas(args.output, args.schema_dir)
+        print(f"Wrote {len(written)} runtime schemas to {args.output}")
+    if args.report:
+        print(memory_report(args.schema_dir))
+
+
+if __name__ == "__main__":
+    main()
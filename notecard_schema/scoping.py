@@ -0,0 +1,165 @@
+"""
+Validators scoped to a Notecard firmware version or hardware SKU.
+
+Schemas mark APIs, properties and enumerated values with the `minApiVersion`
+that introduced them and the `skus` that support them, but plain validation
+ignores both. A scoped variant rewrites the schemas for one target:
+
+- APIs the target does not support are dropped from the dispatch table;
+- unsupported properties are replaced with a schema that rejects every
+  value, so supplying them is an error while the rest of the schema is
+  untouched;
+- `enum` values whose `sub-descriptions` entry is unsupported are removed
+  from the `enum`.
+
+Keyword lists matched by a `pattern` (such as `card.attn` `mode`) are left
+as they are, since their `sub-descriptions` cannot be mapped back onto the
+regular expression.
+
+Version variants are built once per normalized version and kept in an LRU
+cache, so a process serving several firmware cohorts filters each schema
+only once. SKU variants are built together for every SKU on first use and
+selected with a dictionary lookup.
+"""
+
+import copy
+import functools
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .dispatch import Dispatcher
+
+VARIANT_CACHE_SIZE = 8
+
+SKUS = ("CELL", "CELL+WIFI", "LORA", "SKYLO", "WIFI")
+
+Version = Tuple[int, int, int]
+
+_VERSION_RE = re.compile(r'^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?$')
+
+SUBSCHEMA_KEYWORDS = ("items", "additionalProperties", "unevaluatedProperties", "not", "if", "then", "else")
+SUBSCHEMA_LIST_KEYWORDS = ("allOf", "anyOf", "oneOf")
+
+
+def parse_version(version: str) -> Version:
+    """Normalize a version string such as `8.2.1`, `v8.2` or `8` to a 3-tuple."""
+    match = _VERSION_RE.match(version.strip())
+    if not match:
+        raise ValueError(f"Invalid API version: {version!r}")
+    return tuple(int(part or 0) for part in match.groups())
+
+
+def forbidden(reason: str) -> Dict[str, Any]:
+    """Return a schema that rejects every value, explaining why in its error message."""
+    # Not `false`: jsonschema drops the instance path from `false` schema errors.
+    return {"not": {"description": reason}}
+
+
+def restrict_schema(schema: Any, supported: Callable[[Dict[str, Any]], bool],
+                    reason: Callable[[Dict[str, Any]], str]) -> Any:
+    """Return a copy of a schema with unsupported properties and enum values forbidden.
+
+    `supported` is called with each property schema and each
+    `sub-descriptions` entry; `reason` describes a node that is not supported.
+    """
+    if not isinstance(schema, dict):
+        return schema
+    result = copy.copy(schema)
+    if "properties" in schema:
+        properties = {}
+        for name, subschema in schema["properties"].items():
+            if isinstance(subschema, dict) and not supported(subschema):
+                properties[name] = forbidden(reason(subschema))
+            else:
+                properties[name] = restrict_schema(subschema, supported, reason)
+        result["properties"] = properties
+    if "enum" in schema and "sub-descriptions" in schema:
+        dropped = [entry for entry in schema["sub-descriptions"]
+                   if "const" in entry and not supported(entry)]
+        if dropped:
+            values = [entry["const"] for entry in dropped]
+            result["enum"] = [value for value in schema["enum"] if value not in values]
+            if not result["enum"]:
+                return forbidden(reason(dropped[0]))
+    for keyword in SUBSCHEMA_KEYWORDS:
+        if keyword in schema:
+            result[keyword] = restrict_schema(schema[keyword], supported, reason)
+    for keyword in SUBSCHEMA_LIST_KEYWORDS:
+        if keyword in schema:
+            result[keyword] = [restrict_schema(subschema, supported, reason) for subschema in schema[keyword]]
+    return result
+
+
+def introduced_by(version: Version) -> Callable[[Dict[str, Any]], bool]:
+    """Return a predicate accepting schema nodes available in a firmware version."""
+    def supported(node: Dict[str, Any]) -> bool:
+        return "minApiVersion" not in node or parse_version(node["minApiVersion"]) <= version
+    return supported
+
+
+def _requires_version(node: Dict[str, Any]) -> str:
+    return f"Requires firmware {node['minApiVersion']} or later"
+
+
+def available_on(sku: str) -> Callable[[Dict[str, Any]], bool]:
+    """Return a predicate accepting schema nodes supported by a Notecard SKU."""
+    def supported(node: Dict[str, Any]) -> bool:
+        return "skus" not in node or sku in node["skus"]
+    return supported
+
+
+def _unsupported_sku(sku: str) -> Callable[[Dict[str, Any]], str]:
+    return lambda node: f"Not supported on {sku} Notecards"
+
+
+def _scope(dispatcher: Dispatcher, supported, reason) -> Dispatcher:
+    schemas = {
+        f"{name}.req.notecard.api.json": restrict_schema(schema, supported, reason)
+        for name, schema in dispatcher.schemas.items()
+        if supported(schema)
+    }
+    return Dispatcher(dispatcher.index_schema, schemas, dispatcher.cache or False)
+
+
+def scope_to_version(dispatcher: Dispatcher, version: Version) -> Dispatcher:
+    """Return a dispatcher restricted to the APIs and arguments of a firmware version."""
+    return _scope(dispatcher, introduced_by(version), _requires_version)
+
+
+def scope_to_sku(dispatcher: Dispatcher, sku: str) -> Dispatcher:
+    """Return a dispatcher restricted to the APIs and arguments a Notecard SKU supports."""
+    if sku not in SKUS:
+        raise ValueError(f"Unknown SKU {sku!r}; expected one of {', '.join(SKUS)}")
+    return _scope(dispatcher, available_on(sku), _unsupported_sku(sku))
+
+
+@functools.lru_cache(maxsize=None)
+def _base_dispatcher(schema_dir: Optional[str]) -> Dispatcher:
+    return Dispatcher.from_directory(schema_dir)
+
+
+@functools.lru_cache(maxsize=None)
+def sku_validators(schema_dir: Optional[str] = None) -> Dict[str, Dispatcher]:
+    """Return a dispatcher for every SKU, built together on first call."""
+    base = _base_dispatcher(schema_dir)
+    return {sku: scope_to_sku(base, sku) for sku in SKUS}
+
+
+@functools.lru_cache(maxsize=VARIANT_CACHE_SIZE)
+def _version_variant(version: Version, sku: Optional[str], schema_dir: Optional[str]) -> Dispatcher:
+    base = _base_dispatcher(schema_dir) if sku is None else sku_validators(schema_dir)[sku]
+    return scope_to_version(base, version)
+
+
+def validator_for(api_version: Optional[str] = None, sku: Optional[str] = None,
+                  schema_dir: Optional[str] = None) -> Dispatcher:
+    """Return a dispatcher for notecard.api.json, optionally scoped to a firmware version and SKU.
+
+    Version variants are cached by normalized version, so `8.2` and `8.2.0`
+    share one dispatcher.
+    """
+    if sku is not None and sku not in SKUS:
+        raise ValueError(f"Unknown SKU {sku!r}; expected one of {', '.join(SKUS)}")
+    if api_version is None:
+        return _base_dispatcher(schema_dir) if sku is None else sku_validators(schema_dir)[sku]
+    return _version_variant(parse_version(api_version), sku, schema_dir)
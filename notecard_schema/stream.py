@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Streaming validation of JSONL transcripts of Notecard requests.
+
+`validate_stream` reads a file object in fixed-size chunks, splits it into
+lines and validates each one against the request schema its `req`/`cmd`
+names. Memory use is bounded by the read buffer plus the longest accepted
+line, however large the transcript is; lines longer than `max_line_length`
+are reported as errors and skipped without being buffered.
+
+Usage: python -m notecard_schema.stream transcript.jsonl
+"""
+
+import argparse
+import contextlib
+import json
+import sys
+from typing import Any, BinaryIO, Iterable, Iterator, List, Optional, Tuple, Union
+
+from jsonschema.exceptions import ValidationError
+
+from .dispatch import Dispatcher
+
+DEFAULT_BUFFER_SIZE = 64 * 1024
+DEFAULT_MAX_LINE_LENGTH = 1024 * 1024
+
+# (line number, API name or None, valid, error messages)
+Result = Tuple[int, Optional[str], bool, List[str]]
+
+
+def iter_lines(fileobj: Union[BinaryIO, Any], buffer_size: int = DEFAULT_BUFFER_SIZE,
+               max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Iterator[Tuple[int, Optional[bytes]]]:
+    """Yield `(line_no, line)` pairs, with `line` None for lines over `max_line_length` bytes.
+
+    Accepts binary or text file objects. Line numbers start at 1.
+    """
+    pending = bytearray()
+    overflow = False
+    line_no = 0
+    while True:
+        chunk = fileobj.read(buffer_size)
+        if not chunk:
+            break
+        if isinstance(chunk, str):
+            chunk = chunk.encode('utf-8')
+        start = 0
+        while True:
+            end = chunk.find(b'\n', start)
+            if end < 0:
+                break
+            line_no += 1
+            if overflow or len(pending) + end - start > max_line_length:
+                yield line_no, None
+            else:
+                pending += chunk[start:end]
+                yield line_no, bytes(pending)
+            pending.clear()
+            overflow = False
+            start = end + 1
+        if not overflow:
+            if len(pending) + len(chunk) - start > max_line_length:
+                overflow = True
+                pending.clear()
+            else:
+                pending += chunk[start:]
+    if pending or overflow:
+        yield line_no + 1, None if overflow else bytes(pending)
+
+
+def format_error(error: ValidationError) -> str:
+    """Return a one-line description of a validation error with its location."""
+    return f"{error.json_path}: {error.message}"
+
+
+def validate_line(line: Optional[bytes], dispatcher: Dispatcher,
+                  max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Tuple[Optional[str], bool, List[str]]:
+    """Validate one transcript line and return `(api, ok, errors)`."""
+    if line is None:
+        return None, False, [f"Line exceeds {max_line_length} bytes"]
+    try:
+        instance = json.loads(line)
+    except ValueError as e:
+        return None, False, [f"Invalid JSON: {e}"]
+    return check_request(dispatcher, instance)
+
+
+def check_request(dispatcher: Dispatcher, instance: Any) -> Tuple[Optional[str], bool, List[str]]:
+    """Validate a parsed request and return `(api, ok, errors)`.
+
+    Requests for a known API report every error from its schema; others
+    report the dispatcher's best error, which names the unknown API.
+    """
+    api = dispatcher.api_for(instance)
+    if dispatcher.is_valid(instance):
+        return api, True, []
+    if api is not None:
+        errors = dispatcher.validator_for(api).iter_errors(instance)
+    else:
+        errors = [dispatcher.best_error(instance)]
+    return api, False, [format_error(error) for error in errors]
+
+
+def validate_stream(fileobj: Union[BinaryIO, Any], dispatcher: Optional[Dispatcher] = None,
+                    buffer_size: int = DEFAULT_BUFFER_SIZE,
+                    max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Iterator[Result]:
+    """Yield `(line_no, api, ok, errors)` for every non-blank line of a JSONL stream.
+
+    Args:
+        fileobj: A binary or text file object.
+        dispatcher: The request dispatcher to validate with. Defaults to the
+            shared unscoped dispatcher.
+        buffer_size: Number of bytes or characters read per chunk.
+        max_line_length: Longest line, in bytes, that is buffered and validated.
+    """
+    if dispatcher is None:
+        from .scoping import validator_for
+        dispatcher = validator_for()
+    yield from validate_lines(iter_lines(fileobj, buffer_size, max_line_length), dispatcher, max_line_length)
+
+
+def validate_lines(lines: Iterable[Tuple[int, Optional[bytes]]], dispatcher: Dispatcher,
+                   max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Iterator[Result]:
+    """Validate the `(line_no, line)` pairs from `iter_lines`, skipping blank lines."""
+    for line_no, line in lines:
+        if line is not None and not line.strip():
+            continue
+        api, ok, errors = validate_line(line, dispatcher, max_line_length)
+        yield line_no, api, ok, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate a JSONL transcript of Notecard requests.")
+    parser.add_argument("transcript", help="Path of the JSONL transcript, or - for stdin.")
+    parser.add_argument("--max-line-length", type=int, default=DEFAULT_MAX_LINE_LENGTH,
+                        help="Longest line, in bytes, to validate.")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of worker processes; 0 uses every CPU.")
+    args = parser.parse_args()
+    if args.jobs != 1 and args.transcript == "-":
+        parser.error("--jobs requires a file, not stdin")
+
+    total = invalid = 0
+    with contextlib.ExitStack() as stack:
+        if args.jobs != 1:
+            from .parallel import validate_file
+            results = validate_file(args.transcript, jobs=args.jobs or None, max_line_length=args.max_line_length)
+        else:
+            if args.transcript == "-":
+                fileobj = sys.stdin.buffer
+            else:
+                fileobj = stack.enter_context(open(args.transcript, 'rb'))
+            results = validate_stream(fileobj, max_line_length=args.max_line_length)
+        for line_no, api, ok, errors in results:
+            total += 1
+            if not ok:
+                invalid += 1
+                for error in errors:
+                    print(f"{args.transcript}:{line_no}: {api or '?'}: {error}")
+    print(f"Validated {total} transactions, {invalid} invalid")
+    sys.exit(1 if invalid else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Schema validator with a compiled boolean fast path.
+
+Almost every Notecard transaction is valid, so the common question is just
+"is this valid?". `SchemaValidator.is_valid` answers it with the compiled
+function from `notecard_schema.compiler`, which returns as soon as a check
+fails and never builds `ValidationError` objects. The jsonschema validator
+is only constructed, and errors only materialized, when `iter_errors`,
+`explain` or `validate` is called.
+"""
+
+import functools
+from typing import Any, Callable, Iterator, Optional
+
+import jsonschema
+from jsonschema.exceptions import ErrorTree, ValidationError, best_match
+
+from .cache import ValidatorCache, default_cache
+from .compiler import CompileError, compile_schema
+from .loader import get_request_schema
+
+
+class SchemaValidator:
+    """Validates instances against a single schema."""
+
+    jsonschema_class = jsonschema.Draft202012Validator
+
+    def __init__(self, schema: Any, check: Optional[Callable[[Any], bool]] = None,
+                 cache: Optional[ValidatorCache] = None):
+        """Create a validator.
+
+        Args:
+            schema: The schema to validate against.
+            check: A compiled validator for the schema. Compiled on demand
+                when omitted; schemas the compiler does not support fall
+                back to jsonschema.
+            cache: On-disk cache to load the compiled validator from, and
+                store it in, instead of compiling it in this process.
+        """
+        self.schema = schema
+        self._validator = None
+        if check is None:
+            try:
+                check = cache.compile(schema) if cache is not None else compile_schema(schema)
+            except CompileError:
+                check = self.jsonschema_validator.is_valid
+        # Bound as an instance attribute so calls skip a method lookup.
+        self.is_valid = check
+
+    @property
+    def jsonschema_validator(self):
+        """The jsonschema validator used to materialize errors, built on first use."""
+        if self._validator is None:
+            self._validator = self.jsonschema_class(self.schema)
+        return self._validator
+
+    def iter_errors(self, instance: Any) -> Iterator[ValidationError]:
+        """Yield every validation error for an instance."""
+        if self.is_valid(instance):
+            return
+        yield from self.jsonschema_validator.iter_errors(instance)
+
+    def explain(self, instance: Any) -> ErrorTree:
+        """Return the full error tree for an instance (empty if it is valid)."""
+        return ErrorTree(self.iter_errors(instance))
+
+    def validate(self, instance: Any) -> None:
+        """Raise the most relevant ValidationError if the instance is invalid."""
+        error = best_match(self.iter_errors(instance))
+        if error is not None:
+            raise error
+
+
+@functools.lru_cache(maxsize=None)
+def get_validator(api: str) -> SchemaValidator:
+    """Return the validator for an API's request schema, loading and compiling it on first use.
+
+    The compiled validator comes from the on-disk cache when it is enabled.
+    Raises KeyError for an unknown API.
+    """
+    return SchemaValidator(get_request_schema(api), cache=default_cache())
@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Benchmark schema validation and compare the results with a stored baseline.
+
+For every request and response schema file, the benchmark measures:
+
+- load: reading and parsing the schema file;
+- build: constructing its SchemaValidator (compiling the fast path);
+- latency: a single `is_valid` call on one of the schema's samples;
+- throughput: `is_valid` calls per second over a batch of its samples.
+
+The instances are the schema's own `samples`, so each API is measured with
+representative transactions. A final `notecard.api.json` row measures the
+whole dispatcher: loading every request schema, building every validator,
+and dispatching the samples of all request schemas.
+
+Timings are compared with scripts/benchmark_baseline.json and the script
+exits with status 1 if any of them regressed by more than the tolerance.
+Each file is measured next to a fixed calibration loop, and the baseline is
+scaled by the calibration's change, so a busier or slower machine is not
+mistaken for a regression; files that still look slower are measured again
+before being reported.
+Re-record the baseline on the same machine after an intended change with
+--update-baseline. A baseline recorded on another Python minor version or
+machine architecture is not compared against, since interpreter changes
+move these timings far more than the tolerance allows; record one with the
+interpreter CI uses.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from importlib import metadata
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from notecard_schema import Dispatcher, SchemaValidator  # noqa: E402
+from notecard_schema.loader import INDEX_FILE, SCHEMA_DIR, api_name, request_filenames, response_filename  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+DEFAULT_TOLERANCE = 0.3
+DEFAULT_BATCH_SIZE = 10000
+# Files that look slower are measured again this many times; a metric fails
+# only if it is slower every time.
+DEFAULT_RETRIES = 3
+
+# Metric name -> (True if larger values are better, smallest change per
+# operation in microseconds that is not timer noise). Machine-wide noise is
+# handled by the calibration loop and the retries, not by these floors.
+METRICS = {
+    "load_ms": (False, 5.0),
+    "build_ms": (False, 5.0),
+    "latency_us": (False, 0.1),
+    "throughput_per_s": (True, 0.1),
+}
+
+_clock = time.perf_counter_ns
+
+
+def sample_instances(schema: Dict[str, Any]) -> List[Any]:
+    """Return the instances given by a schema's `samples`."""
+    instances = []
+    for sample in schema.get("samples", []):
+        sample_json = json.loads(sample["json"])
+        instances.extend(sample_json if isinstance(sample_json, list) else [sample_json])
+    return instances
+
+
+def best_ns(function: Callable[[], Any], repeat: int) -> int:
+    """Return the fastest of `repeat` timed calls, in nanoseconds.
+
+    Like timeit, the garbage collector is paused while timing.
+    """
+    best = None
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = _clock()
+            function()
+            elapsed = _clock() - start
+            if best is None or elapsed < best:
+                best = elapsed
+    finally:
+        gc.enable()
+    return best
+
+
+def median_latency_ns(is_valid: Callable[[Any], bool], instances: List[Any], repeat: int) -> float:
+    """Return the median time of a single `is_valid` call over the instances."""
+    timings = []
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            for instance in instances:
+                start = _clock()
+                is_valid(instance)
+                timings.append(_clock() - start)
+    finally:
+        gc.enable()
+    return statistics.median(timings)
+
+
+def throughput(is_valid: Callable[[Any], bool], instances: List[Any], batch_size: int, repeat: int) -> float:
+    """Return `is_valid` calls per second over a batch cycling through the instances."""
+    batch = (instances * (batch_size // len(instances) + 1))[:batch_size]
+
+    def run():
+        for instance in batch:
+            is_valid(instance)
+    return batch_size / (best_ns(run, repeat) / 1e9)
+
+
+def calibrate(repeat: int) -> float:
+    """Return the time of a fixed pure-Python workload, in milliseconds, as a measure of machine speed."""
+    document = json.dumps([{"req": "note.add", "body": {"temp": i, "id": str(i)}} for i in range(100)])
+
+    def workload():
+        for _ in range(10):
+            sorted(json.loads(document), key=lambda item: str(item["body"]["temp"]))
+    return best_ns(workload, repeat) / 1e6
+
+
+def load(filename: str, schema_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(schema_dir, filename), 'r') as f:
+        return json.load(f)
+
+
+def benchmark_file(filename: str, schema_dir: str, repeat: int, batch_size: int) -> Dict[str, float]:
+    """Return the metrics of one schema file."""
+    schema = load(filename, schema_dir)
+    result = {
+        "calibration_ms": calibrate(repeat),
+        "load_ms": best_ns(lambda: load(filename, schema_dir), repeat) / 1e6,
+        "build_ms": best_ns(lambda: SchemaValidator(schema), repeat) / 1e6,
+    }
+    instances = sample_instances(schema)
+    if instances:
+        is_valid = SchemaValidator(schema).is_valid
+        result["latency_us"] = median_latency_ns(is_valid, instances, repeat) / 1e3
+        result["throughput_per_s"] = throughput(is_valid, instances, batch_size, repeat)
+    return result
+
+
+def benchmark_dispatcher(schema_dir: str, repeat: int, batch_size: int) -> Dict[str, float]:
+    """Return the metrics of the whole dispatcher over every request schema's samples."""
+    instances = []
+    for filename in request_filenames(schema_dir):
+        instances.extend(sample_instances(load(filename, schema_dir)))
+    dispatcher = Dispatcher.from_directory(schema_dir)
+    return {
+        "calibration_ms": calibrate(repeat),
+        "load_ms": best_ns(lambda: Dispatcher.from_directory(schema_dir), repeat) / 1e6,
+        # Compiled in process, as build_ms is for single files, not loaded from the on-disk cache.
+        "build_ms": best_ns(lambda: Dispatcher(dispatcher.index_schema, {
+            f"{name}.req.notecard.api.json": schema for name, schema in dispatcher.schemas.items()
+        }, cache=False).warm(), repeat) / 1e6,
+        "latency_us": median_latency_ns(dispatcher.warm().is_valid, instances, repeat) / 1e3,
+        "throughput_per_s": throughput(dispatcher.is_valid, instances, batch_size, repeat),
+    }
+
+
+def run(schema_dir: str, repeat: int, batch_size: int, match: Optional[str] = None) -> Dict[str, Any]:
+    """Run the benchmark and return its results, keyed by schema file."""
+    filenames = []
+    for filename in request_filenames(schema_dir):
+        filenames.append(filename)
+        filenames.append(response_filename(api_name(filename)))
+    files = {}
+    for filename in filenames:
+        if match and match not in filename:
+            continue
+        if os.path.exists(os.path.join(schema_dir, filename)):
+            files[filename] = benchmark_file(filename, schema_dir, repeat, batch_size)
+    if not match or match in INDEX_FILE:
+        files[INDEX_FILE] = benchmark_dispatcher(schema_dir, repeat, batch_size)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "jsonschema": metadata.version("jsonschema"),
+            "machine": platform.machine(),
+        },
+        "files": files,
+    }
+
+
+def environment_mismatch(results: Dict[str, Any], baseline: Dict[str, Any]) -> Optional[str]:
+    """Return why the baseline's environment cannot be compared with this run, or None if it can."""
+    current, recorded = results["environment"], baseline.get("environment", {})
+    if recorded.get("python", "").split(".")[:2] != current["python"].split(".")[:2]:
+        return f"Python {recorded.get('python', 'unknown')}, this run uses {current['python']}"
+    if recorded.get("machine") != current["machine"]:
+        return f"{recorded.get('machine', 'an unknown machine')}, this run is on {current['machine']}"
+    return None
+
+
+def file_regressions(filename: str, metrics: Dict[str, float], expected: Dict[str, float],
+                     tolerance: float) -> Dict[str, str]:
+    """Return a description of every metric of one file that regressed past the tolerance, keyed by metric.
+
+    The baseline is first scaled by how much slower the calibration loop
+    ran than when the baseline was recorded, so that the whole machine
+    being busier does not count as a regression. A faster calibration is
+    not used to tighten the baseline, since the calibration loop and the
+    validators do not speed up together.
+    """
+    speed = 1.0
+    if metrics.get("calibration_ms") and expected.get("calibration_ms"):
+        speed = max(1.0, metrics["calibration_ms"] / expected["calibration_ms"])
+    regressions = {}
+    for metric, (higher_is_better, min_delta_us) in METRICS.items():
+        if metric not in metrics or metric not in expected:
+            continue
+        value = metrics[metric]
+        if higher_is_better:
+            base = expected[metric] / speed
+            slower = value * (1 + tolerance) < base
+            delta_us = (1 / value - 1 / base) * 1e6 if value else float("inf")
+        else:
+            base = expected[metric] * speed
+            slower = value > base * (1 + tolerance)
+            delta_us = (value - base) * (1e3 if metric.endswith("_ms") else 1)
+        if slower and delta_us > min_delta_us:
+            regressions[metric] = f"{filename}: {metric} {value:.6g} vs baseline {base:.6g} (calibration x{speed:.2f})"
+    return regressions
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> Dict[str, Dict[str, str]]:
+    """Return the regressions of every file that has a baseline, keyed by file."""
+    regressions = {}
+    for filename, metrics in results["files"].items():
+        expected = baseline.get("files", {}).get(filename)
+        if expected is not None:
+            found = file_regressions(filename, metrics, expected, tolerance)
+            if found:
+                regressions[filename] = found
+    return regressions
+
+
+def confirm(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float, schema_dir: str,
+            repeat: int, batch_size: int, retries: int = DEFAULT_RETRIES) -> Dict[str, Dict[str, str]]:
+    """Measure the files that look slower again and return the regressions that persist.
+
+    A noisy neighbour or a frequency change can slow a single measurement
+    down; a real regression survives the retries, so a metric is reported
+    only if every measurement of it regressed.
+    """
+    regressions = compare(results, baseline, tolerance)
+    for _ in range(retries):
+        for filename in list(regressions):
+            if filename == INDEX_FILE:
+                again = benchmark_dispatcher(schema_dir, repeat, batch_size)
+            else:
+                again = benchmark_file(filename, schema_dir, repeat, batch_size)
+            found = file_regressions(filename, again, baseline["files"][filename], tolerance)
+            persisting = {metric: found[metric] for metric in regressions[filename] if metric in found}
+            if len(persisting) < len(regressions[filename]):
+                results["files"][filename] = again
+            regressions[filename] = persisting
+            if not regressions[filename]:
+                del regressions[filename]
+    return regressions
+
+
+def format_table(results: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> str:
+    """Return the results as a table, with the change from the baseline where known."""
+    files = results["files"]
+    width = max([len(filename) for filename in files] + [len("Schema")])
+    lines = [f"{'Schema':<{width}}  {'Load ms':>14}  {'Build ms':>14}  {'Latency us':>14}  {'Calls/s':>16}"]
+    lines.append("-" * len(lines[0]))
+    base_files = (baseline or {}).get("files", {})
+    for filename, metrics in files.items():
+        cells = []
+        for metric, cell_width in zip(METRICS, (14, 14, 14, 16)):
+            value = metrics.get(metric)
+            base = base_files.get(filename, {}).get(metric)
+            text = "-" if value is None else f"{value:.0f}" if metric == "throughput_per_s" else f"{value:.3f}"
+            if value is not None and base:
+                text = f"{value / base - 1:+.0%} {text}"
+            cells.append(f"{text:>{cell_width}}")
+        lines.append(f"{filename:<{width}}  " + "  ".join(cells))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark schema validation against a stored baseline.")
+    parser.add_argument("--schema-dir", default=SCHEMA_DIR, help="Directory containing the schema files.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Path of the baseline JSON file.")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed slowdown as a fraction of the baseline (default: %(default)s).")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetitions per measurement (default: %(default)s).")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Calls per throughput batch (default: %(default)s).")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help="Times to measure an apparently slower file again (default: %(default)s).")
+    parser.add_argument("--match", help="Only benchmark schema files whose name contains this string.")
+    parser.add_argument("--output", help="Also write the results as JSON to this path.")
+    args = parser.parse_args()
+
+    results = run(args.schema_dir, args.repeat, args.batch_size, args.match)
+    if args.update_baseline:
+        print(format_table(results))
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    baseline = None
+    mismatch = None
+    regressions = []
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        mismatch = environment_mismatch(results, baseline)
+        if mismatch is not None:
+            baseline = None
+    if baseline is not None:
+        regressions = confirm(results, baseline, args.tolerance, args.schema_dir,
+                              args.repeat, args.batch_size, args.retries)
+    print(format_table(results, baseline))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    if mismatch is not None:
+        print(f"\nBaseline {args.baseline} was recorded on {mismatch}; not comparing.")
+        print("Run with --update-baseline on this interpreter to record a comparable one.")
+        return
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one.")
+        return
+    if regressions:
+        print(f"\n{sum(map(len, regressions.values()))} regression(s) beyond {args.tolerance:.0%} of the baseline:")
+        for found in regressions.values():
+            for regression in found.values():
+                print(f"  {regression}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%} of the baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark loading the bundled schema from JSON and from its binary form.
+
+Builds `notecard.api.bundle.json` and its `.marshal` binary form from the
+schema directory in a temporary directory, then times:
+
+- json: parsing the JSON bundle;
+- files: parsing every request and response schema file on its own;
+- binary: `load_bundle` reading the current binary form;
+- binary (hashed): the same after the JSON was touched, so its size and
+  modification time no longer match and its content hash is checked;
+- dispatcher (json) / dispatcher (binary): `Dispatcher.from_bundle`
+  without and with the binary form.
+"""
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from notecard_schema import Dispatcher  # noqa: E402
+from notecard_schema.bundle import BUNDLE_FILE, load_bundle, write_binary_bundle, write_bundle  # noqa: E402
+from notecard_schema.loader import SCHEMA_DIR, api_name, load_schema, request_filenames, response_filename  # noqa: E402
+
+
+def measure(function, repeat):
+    """Return the wall time of each of `repeat` calls in milliseconds, with GC paused."""
+    times = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter_ns()
+            function()
+            times.append((time.perf_counter_ns() - start) / 1e6)
+    finally:
+        gc.enable()
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading the bundled schema from JSON and binary form.")
+    parser.add_argument("--repeat", type=int, default=50, help="Loads per measurement (default: %(default)s).")
+    parser.add_argument("--schema-dir", default=SCHEMA_DIR, help="Schema directory (default: repository root).")
+    args = parser.parse_args()
+
+    filenames = []
+    for filename in request_filenames(args.schema_dir):
+        filenames.extend((filename, response_filename(api_name(filename))))
+
+    with tempfile.TemporaryDirectory(prefix="notecard-bundle-bench-") as directory:
+        path = os.path.join(directory, BUNDLE_FILE)
+        write_bundle(path, args.schema_dir)
+        binary = write_binary_bundle(path)
+
+        def touch():
+            os.utime(path, ns=(time.time_ns(), time.time_ns()))
+
+        cases = [
+            ("json", lambda: load_bundle(path, binary=False), None),
+            ("files", lambda: [load_schema(filename, args.schema_dir) for filename in filenames], None),
+            ("binary", lambda: load_bundle(path), None),
+            ("binary (hashed)", lambda: load_bundle(path), touch),
+            ("dispatcher (json)", lambda: Dispatcher.from_bundle(path, binary=False), None),
+            ("dispatcher (binary)", lambda: Dispatcher.from_bundle(path), None),
+        ]
+        print(f"JSON bundle:   {os.path.getsize(path) / 1024:8.1f} KiB")
+        print(f"Binary bundle: {os.path.getsize(binary) / 1024:8.1f} KiB")
+        print(f"\n{'Load':<20}  {'Min ms':>8}  {'Median ms':>9}  {'vs json':>7}")
+        for name, function, setup in cases:
+            if setup is not None:
+                setup()
+            times = measure(function, args.repeat)
+            median = statistics.median(times)
+            if name == "json":
+                json_median = median
+            speedup = f"{json_median / median:.1f}x"
+            print(f"{name:<20}  {min(times):>8.2f}  {median:>9.2f}  {speedup:>7}")
+
+
+if __name__ == "__main__":
+    main()
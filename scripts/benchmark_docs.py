@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark the documentation generators stage by stage.
+
+Runs `generate_mdx_from_schema.py --all --tidy` and `generate_docs.py`
+in-process several times, writing to a temporary directory with their
+output suppressed, and reports the wall time of each run and the stage
+breakdown of the fastest one. Unlike their `--profile` option, no cProfile
+overhead is added, so the stage timings are representative.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import tempfile
+import time
+
+import generate_docs
+import generate_mdx_from_schema
+from stage_timer import TIMER
+
+SCHEMA_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run(name, function, repeat, top):
+    """Time `function(output_dir)` `repeat` times and print a report."""
+    walls = []
+    fastest = None
+    for _ in range(repeat):
+        with tempfile.TemporaryDirectory(prefix="notecard-docs-bench-") as output_dir:
+            TIMER.reset()
+            TIMER.enabled = True
+            start = time.perf_counter_ns()
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    function(output_dir)
+            finally:
+                TIMER.enabled = False
+            wall = time.perf_counter_ns() - start
+        walls.append(wall)
+        if fastest is None or wall < fastest[0]:
+            fastest = (wall, TIMER.copy())
+
+    print(f"=== {name} ===")
+    print(f"{repeat} runs: min {min(walls) / 1e6:.2f} ms, median {statistics.median(walls) / 1e6:.2f} ms\n")
+    print(fastest[1].report(fastest[0], top))
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the documentation generators stage by stage.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per generator (default: %(default)s).")
+    parser.add_argument("--top", type=int, default=10, help="Slowest APIs to list (default: %(default)s).")
+    args = parser.parse_args()
+
+    run("generate_mdx_from_schema.py --all --tidy",
+        lambda output_dir: generate_mdx_from_schema.main(
+            ["--all", "--tidy", "--schema_dir", SCHEMA_DIR, "--output_dir", output_dir]),
+        args.repeat, args.top)
+    run("generate_docs.py", lambda output_dir: generate_docs.main(["--output_dir", output_dir]), args.repeat, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
+import argparse
 import json
 import requests
 import os
 import re
 
+from stage_timer import TIMER, run_profiled
+
 def inject_absolute_urls(text, base_url="https://dev.blues.io"):
     """Convert relative links to absolute URLs by prepending the base URL."""
     if not text:
@@ -235,12 +238,23 @@ def generate_markdown_for_schema(schema, schema_type, workspace_root=None):
 
     return "\n".join(md_parts)
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the Markdown API reference in docs/index.md from the schemas.")
+    parser.add_argument("-o", "--output_dir", help="Directory to write index.md to. Defaults to docs/ in the repository root.")
+    parser.add_argument("--profile", nargs="?", const="generate_docs.prof", metavar="PATH", help="Report per-stage and per-API timings and write a cProfile dump to PATH (default: generate_docs.prof).")
+    args = parser.parse_args(argv)
+    if args.profile:
+        run_profiled(lambda: generate(args.output_dir), args.profile)
+    else:
+        generate(args.output_dir)
+
+def generate(output_dir=None):
+    """Generate index.md (in docs/ by default) from the schemas in the repository root."""
     script_dir = os.path.dirname(os.path.abspath(__file__))
     workspace_root = os.path.dirname(script_dir)
 
     main_schema_path = os.path.join(workspace_root, "notecard.api.json")
-    output_dir = os.path.join(workspace_root, "docs")
+    output_dir = output_dir or os.path.join(workspace_root, "docs")
     output_md_path = os.path.join(output_dir, "index.md")
 
     try:
@@ -283,7 +297,9 @@ def main():
     for ref in all_schema_refs:
         # Convert URL to local path
         local_path = os.path.join(workspace_root, ref.split('/')[-1])
-        schema_content = load_schema(local_path)
+        TIMER.api = get_base_api_name(ref)
+        with TIMER.stage("load"):
+            schema_content = load_schema(local_path)
         if schema_content:
             all_schemas_data.append((ref, schema_content))
             fetched_count += 1
@@ -327,6 +343,7 @@ def main():
 
     # Sort API groups alphabetically
     for base_name in sorted(grouped_schemas.keys()):
+        TIMER.api = base_name
         markdown_output.append(f"### `{base_name}`")
 
         # Add version info if available (from request schema)
@@ -355,7 +372,8 @@ def main():
         if grouped_schemas[base_name]['request']:
             ref, schema = grouped_schemas[base_name]['request']
             try:
-                markdown_output.append(generate_markdown_for_schema(schema, 'request', workspace_root))
+                with TIMER.stage("request"):
+                    markdown_output.append(generate_markdown_for_schema(schema, 'request', workspace_root))
             except Exception as e:
                 print(f"Error generating markdown for request {ref}: {e}")
 
@@ -363,13 +381,15 @@ def main():
         if grouped_schemas[base_name]['response']:
             ref, schema = grouped_schemas[base_name]['response']
             try:
-                markdown_output.append(generate_markdown_for_schema(schema, 'response', workspace_root))
+                with TIMER.stage("response"):
+                    markdown_output.append(generate_markdown_for_schema(schema, 'response', workspace_root))
             except Exception as e:
                 print(f"Error generating markdown for response {ref}: {e}")
 
+    TIMER.api = None
     try:
         os.makedirs(output_dir, exist_ok=True) # Create output directory if it doesn't exist
-        with open(output_md_path, 'w') as f:
+        with TIMER.stage("write"), open(output_md_path, 'w') as f:
             f.write("\n".join(markdown_output))
             # Ensure newline at end of file
             if not markdown_output[-1].endswith('\n'):
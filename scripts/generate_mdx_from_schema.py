@@ -4,6 +4,8 @@ import argparse
 import html
 import re
 
+from stage_timer import TIMER, run_profiled
+
 def generate_sku_badges(skus):
     """Generate badge HTML for SKUs."""
     if not skus:
@@ -82,18 +84,21 @@ def generate_mdx_content(schema_data, api_base_name, response_schema_data=None):
     # Generate annotations block
     annotations_block = generate_annotations_mdx(schema_data.get("annotations", []))
 
-    arguments_mdx_content = generate_arguments_mdx(schema_data.get("properties", {}), schema_data)
-    example_requests_block = generate_examples_mdx(schema_data.get("samples", []))
+    with TIMER.stage("arguments"):
+        arguments_mdx_content = generate_arguments_mdx(schema_data.get("properties", {}), schema_data)
+    with TIMER.stage("examples"):
+        example_requests_block = generate_examples_mdx(schema_data.get("samples", []))
 
     # Prepare data for response sections, ensuring defaults if response_schema_data is None or incomplete
     effective_response_schema_data = response_schema_data if response_schema_data is not None else {}
     response_properties = effective_response_schema_data.get("properties", {})
     response_samples = effective_response_schema_data.get("samples", [])
 
-    # generate_response_members_mdx always returns the block
-    response_members_block = generate_response_members_mdx(response_properties, effective_response_schema_data)
-    # generate_example_response_mdx returns block only if samples exist
-    example_response_block = generate_example_response_mdx(response_samples)
+    with TIMER.stage("response"):
+        # generate_response_members_mdx always returns the block
+        response_members_block = generate_response_members_mdx(response_properties, effective_response_schema_data)
+        # generate_example_response_mdx returns block only if samples exist
+        example_response_block = generate_example_response_mdx(response_samples)
 
     # Check for top-level minApiVersion in both request and response schemas
     req_min_version = schema_data.get("minApiVersion")
@@ -755,9 +760,10 @@ def generate_single_mdx(api_base_name, schema_dir, output_dir, tidy=False, all_a
 
     schema_data = None
     response_schema_data = None
+    TIMER.api = api_base_name
 
     try:
-        with open(req_schema_path, "r") as f:
+        with TIMER.stage("load"), open(req_schema_path, "r") as f:
             schema_data = json.load(f)
     except json.JSONDecodeError:
         print(f"Error: Could not parse JSON from request schema {req_schema_path}")
@@ -765,7 +771,7 @@ def generate_single_mdx(api_base_name, schema_dir, output_dir, tidy=False, all_a
 
     if os.path.isfile(rsp_schema_path):
         try:
-            with open(rsp_schema_path, "r") as f:
+            with TIMER.stage("load"), open(rsp_schema_path, "r") as f:
                 response_schema_data = json.load(f)
         except json.JSONDecodeError:
             print(f"Warning: Could not parse JSON from response schema {rsp_schema_path}. Response sections might be empty or based on defaults.")
@@ -790,10 +796,12 @@ def generate_single_mdx(api_base_name, schema_dir, output_dir, tidy=False, all_a
 
     mdx_output = generate_mdx_content(schema_data, api_base_name, response_schema_data)
 
-    with open(output_mdx_path, "w") as f:
-        f.write(mdx_output.strip())
-    with open(output_mdx_path, "a") as f:
-        f.write("\n")
+    with TIMER.stage("write"):
+        with open(output_mdx_path, "w") as f:
+            f.write(mdx_output.strip())
+        with open(output_mdx_path, "a") as f:
+            f.write("\n")
+    TIMER.api = None
     print(f"MDX file generated at {output_mdx_path}")
     return True
 
@@ -878,15 +886,23 @@ def generate_category_main_mdx(category_name, category_apis, output_dir, prev_ca
     print(f"Category MDX file generated at {category_main_path}")
     return True
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(description="Generate MDX file(s) from Notecard API schema(s).")
     parser.add_argument("api_base_name", nargs='?', help="Base name of the Notecard API (e.g., card.contact, hub.set). Not required when using --all.")
     parser.add_argument("--all", action="store_true", help="Generate MDX files for all APIs found in the schema directory.")
     parser.add_argument("--schema_dir", default=".", help="Directory where schema files are located. Defaults to current directory.")
     parser.add_argument("-o", "--output_dir", default="./docs", help="Directory to save the generated MDX file(s). Defaults to './docs/'.")
     parser.add_argument("--tidy", action="store_true", help="Generate files in organized directory structure with category folders and _main.mdx files (following blues.dev structure).")
+    parser.add_argument("--profile", nargs="?", const="generate_mdx_from_schema.prof", metavar="PATH", help="Report per-stage and per-API timings and write a cProfile dump to PATH (default: generate_mdx_from_schema.prof).")
+
+    args = parser.parse_args(argv)
+    if args.profile:
+        run_profiled(lambda: generate(parser, args), args.profile)
+    else:
+        generate(parser, args)
 
-    args = parser.parse_args()
+def generate(parser, args):
+    """Generate the MDX file(s) selected by the parsed command-line arguments."""
 
     schema_dir = args.schema_dir
     output_dir = args.output_dir
@@ -913,6 +929,7 @@ def main():
 
         # Generate category-level _main.mdx files if using tidy structure
         if tidy:
+            TIMER.api = None
             print(f"\nGenerating category-level _main.mdx files...")
             categories = {}
 
@@ -935,7 +952,9 @@ def main():
                 next_category = category_items[i+1][0] if i < len(category_items) - 1 else None
 
                 print(f"Generating category file for {category_name}...")
-                if generate_category_main_mdx(category_name, category_apis, output_dir, prev_category, next_category):
+                with TIMER.stage("category"):
+                    generated = generate_category_main_mdx(category_name, category_apis, output_dir, prev_category, next_category)
+                if generated:
                     category_success += 1
 
             print(f"Generated {category_success}/{len(categories)} category files successfully.")
@@ -0,0 +1,117 @@
+"""
+Stage timing and cProfile helpers for the documentation scripts.
+
+`generate_mdx_from_schema.py` and `generate_docs.py` wrap each stage of their
+work (schema load, argument and example generation, file writes, ...) in
+`TIMER.stage(name)`. Timing is off unless the script is run with
+`--profile`, in which case a per-stage and per-API breakdown is printed at
+the end and a cProfile dump is written alongside it.
+"""
+
+import contextlib
+import cProfile
+import io
+import pstats
+import time
+from typing import Any, Callable, Dict, Optional
+
+_clock = time.perf_counter_ns
+
+
+class StageTimer:
+    """Accumulates wall time per stage, and per API within each stage."""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        # API the stages being timed belong to, or None for shared work.
+        self.api: Optional[str] = None
+        self.totals: Dict[str, int] = {}
+        self.calls: Dict[str, int] = {}
+        self.per_api: Dict[str, Dict[str, int]] = {}
+
+    def reset(self) -> None:
+        """Drop every recorded timing."""
+        self.api = None
+        self.totals.clear()
+        self.calls.clear()
+        self.per_api.clear()
+
+    def copy(self) -> "StageTimer":
+        """Return a disabled copy of the recorded timings."""
+        copy = StageTimer()
+        copy.totals, copy.calls = dict(self.totals), dict(self.calls)
+        copy.per_api = {api: dict(stages) for api, stages in self.per_api.items()}
+        return copy
+
+    def stage(self, name: str):
+        """Return a context manager that times its body as stage `name`."""
+        if not self.enabled:
+            return contextlib.nullcontext()
+        return self._timed(name)
+
+    @contextlib.contextmanager
+    def _timed(self, name: str):
+        start = _clock()
+        try:
+            yield
+        finally:
+            elapsed = _clock() - start
+            self.totals[name] = self.totals.get(name, 0) + elapsed
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if self.api is not None:
+                stages = self.per_api.setdefault(self.api, {})
+                stages[name] = stages.get(name, 0) + elapsed
+
+    def report(self, wall_ns: Optional[int] = None, top: Optional[int] = None) -> str:
+        """Return the stage totals and the per-API breakdown, slowest APIs first."""
+        lines = []
+        total = wall_ns if wall_ns else sum(self.totals.values())
+        width = max([len(name) for name in self.totals] + [len("Stage")])
+        lines.append(f"{'Stage':<{width}}  {'Calls':>6}  {'Total ms':>10}  {'Share':>6}")
+        for name, elapsed in sorted(self.totals.items(), key=lambda item: -item[1]):
+            share = f"{100 * elapsed / total:.1f}%" if total else "-"
+            lines.append(f"{name:<{width}}  {self.calls[name]:>6}  {elapsed / 1e6:>10.2f}  {share:>6}")
+        if wall_ns:
+            untimed = wall_ns - sum(self.totals.values())
+            share = f"{100 * untimed / wall_ns:.1f}%"
+            lines.append(f"{'(untimed)':<{width}}  {'':>6}  {untimed / 1e6:>10.2f}  {share:>6}")
+            lines.append(f"{'(wall)':<{width}}  {'':>6}  {wall_ns / 1e6:>10.2f}")
+
+        if self.per_api:
+            stages = [name for name in self.totals if any(name in api_stages for api_stages in self.per_api.values())]
+            api_width = max(len(api) for api in self.per_api)
+            lines.append("")
+            lines.append(f"{'API':<{api_width}}  " + "  ".join(f"{name:>10}" for name in stages) + f"  {'Total ms':>10}")
+            ranked = sorted(self.per_api.items(), key=lambda item: -sum(item[1].values()))
+            for api, api_stages in ranked[:top]:
+                cells = "  ".join(f"{api_stages.get(name, 0) / 1e6:>10.2f}" for name in stages)
+                lines.append(f"{api:<{api_width}}  {cells}  {sum(api_stages.values()) / 1e6:>10.2f}")
+        return "\n".join(lines)
+
+
+# Shared by the documentation scripts; enabled by their --profile option.
+TIMER = StageTimer()
+
+
+def run_profiled(function: Callable[[], Any], output_path: str, top: int = 20) -> Any:
+    """Run `function` under cProfile with stage timing enabled and report both.
+
+    The raw profile is dumped to `output_path` for pstats, snakeviz or
+    similar tools; the `top` functions by cumulative time are printed.
+    """
+    TIMER.enabled = True
+    profiler = cProfile.Profile()
+    start = _clock()
+    try:
+        return profiler.runcall(function)
+    finally:
+        wall_ns = _clock() - start
+        TIMER.enabled = False
+        profiler.dump_stats(output_path)
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(top)
+        print("\n=== Stage timings (under cProfile, so inflated) ===")
+        print(TIMER.report(wall_ns))
+        print(f"\n=== Top {top} functions by cumulative time ===")
+        print(stream.getvalue().strip())
+        print(f"\ncProfile data written to {output_path}")
@@ -18,8 +18,9 @@ import argparse
 
 
 class DocsUpdater:
-    def __init__(self, repo_url="https://github.com/blues/blues.dev.git", dry_run=False, clone_dir=None, branch=None, existing_repo=None):
+    def __init__(self, repo_url="https://github.com/blues/blues.dev.git", dry_run=False, clone_dir=None, branch=None, existing_repo=None, profile=None):
         self.repo_url = repo_url
+        self.profile = profile
         self.dry_run = dry_run
         self.clone_dir = clone_dir
         self.branch = branch
@@ -181,6 +182,9 @@ class DocsUpdater:
                 "--schema_dir", schema_dir,
                 "--output_dir", output_dir
             ]
+            if self.profile:
+                # Stage timings are printed with the generation output below.
+                cmd += ["--profile", os.path.abspath(self.profile)]
 
             result = subprocess.run(cmd, check=True, capture_output=True, text=True)
             print("MDX generation completed successfully")
@@ -434,6 +438,14 @@ def main():
         help="Path to existing blues.dev repository directory (skips cloning)"
     )
 
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        const="generate_mdx_from_schema.prof",
+        metavar="PATH",
+        help="Pass --profile to the MDX generator: report per-stage timings and write a cProfile dump to PATH"
+    )
+
     args = parser.parse_args()
 
     if args.push and not args.commit:
@@ -468,7 +480,8 @@ def main():
             dry_run=args.dry_run,
             clone_dir=args.dir,
             branch=args.branch,
-            existing_repo=args.existing_repo
+            existing_repo=args.existing_repo,
+            profile=args.profile
         )
         updater.update_docs(
             schema_dir=args.schema_dir,
@@ -145,6 +145,24 @@ else
     echo "   ✗ Invalid JSON syntax"
 fi
 
+echo ""
+echo "Step 3: Testing bundled schema generation..."
+echo "============================================"
+
+BUNDLE_FILE="notecard.api.bundle.test.json"
+python3 -m notecard_schema.bundle --output "$BUNDLE_FILE"
+
+echo ""
+echo "5. Checking the bundle has no external \$ref:"
+EXTERNAL_COUNT=$(grep -c '"\$ref": "[^#]' "$BUNDLE_FILE" || true)
+if [ "$EXTERNAL_COUNT" -eq 0 ]; then
+    echo "   ✓ Every \$ref is local"
+else
+    echo "   ✗ Found $EXTERNAL_COUNT external references"
+fi
+
+rm -f "$BUNDLE_FILE"
+
 echo ""
 echo "=== Test Complete ==="
 echo ""
@@ -1,16 +1,33 @@
+import glob
 import pytest
 import json
 import os
-from referencing import Registry, Resource
-import urllib.request
+import sys
+from referencing import Resource
 
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
+# Make the notecard_schema package importable without installing it.
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from notecard_schema.cache import CACHE_DIR_ENV  # noqa: E402
+from notecard_schema.loader import api_name, load_schema, request_filenames  # noqa: E402
+from notecard_schema.registry import offline_registry  # noqa: E402
+
+@pytest.fixture(scope='session', autouse=True)
+def validator_cache_dir(tmp_path_factory):
+    """Enables the on-disk validator cache in a temporary directory for the whole session."""
+    cache_dir = tmp_path_factory.mktemp("validator-cache")
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv(CACHE_DIR_ENV, str(cache_dir))
+        yield str(cache_dir)
+
 @pytest.fixture(scope='module')
 def schema(request):
     """Loads the JSON schema specified by the test module's SCHEMA_FILE.
-    If the schema is 'notecard.api.json', its remote $refs are also fetched
-    and added to a registry. Returns a tuple (schema_dict, registry).
+    If the schema is 'notecard.api.json', a tuple (schema_dict, registry) is
+    returned, where the registry resolves its remote $refs from local files.
     """
     schema_filename = getattr(request.module, "SCHEMA_FILE", None)
     if not schema_filename:
@@ -24,43 +41,10 @@ def schema(request):
     with open(schema_file_path, 'r') as f:
         main_schema_content = json.load(f)
 
-    main_resource = Resource.from_contents(main_schema_content)
-    # Initialize registry using the @ operator with the main resource.
-    # This assumes main_resource has an $id.
-    registry = main_resource @ Registry()
-
-    # If this is notecard.api.json, load its remote $refs from local files
-    # and add them to the registry to prevent live HTTP requests during validation
-    # and to avoid DeprecationWarnings from jsonschema.
-    if schema_filename == "notecard.api.json" and "oneOf" in main_schema_content:
-        for ref_obj in main_schema_content.get("oneOf", []):
-            if "$ref" in ref_obj:
-                ref_url = ref_obj["$ref"]
-                if ref_url.startswith(("http://", "https://")):
-                    # Extract filename from URL and look for it locally
-                    filename = ref_url.split('/')[-1]
-                    local_file_path = os.path.join(project_root, filename)
-
-                    try:
-                        # Check if registry already has this specific URL resolved
-                        registry.contents(ref_url)
-                        # If above doesn't raise, it means something is at ref_url URI in registry
-                    except KeyError:
-                        # Load the local file instead of fetching remote
-                        if os.path.exists(local_file_path):
-                            try:
-                                with open(local_file_path, 'r') as f:
-                                    ref_content_dict = json.load(f)
-                                ref_resource = Resource.from_contents(ref_content_dict)
-                                registry = ref_resource @ registry
-                            except (json.JSONDecodeError, IOError) as e:
-                                pytest.fail(f"Error loading local file {filename}: {e}")
-                        else:
-                            # If local file doesn't exist, skip it instead of failing
-                            # This allows tests to run even if some referenced schemas are missing
-                            continue
-
     if schema_filename == "notecard.api.json":
+        # Resolve its remote $refs, master or tagged, from the local files
+        # instead of fetching them.
+        registry = Resource.from_contents(main_schema_content) @ offline_registry(project_root)
         return main_schema_content, registry
     else:
         # For all other schema files, return only the schema content
@@ -87,3 +71,55 @@ def schema_samples(request):
         pytest.skip("No samples found in the schema to validate.")
 
     return samples
+
+def iter_sample_instances(schema):
+    """Yields every JSON instance from a schema's samples."""
+    for sample in schema.get("samples", []):
+        sample_json = json.loads(sample["json"])
+        yield from sample_json if isinstance(sample_json, list) else [sample_json]
+
+@pytest.fixture(scope='session')
+def sample_instances():
+    """Returns a function that yields every JSON instance from a schema's samples."""
+    return iter_sample_instances
+
+@pytest.fixture(scope='session')
+def request_instances():
+    """Builds valid and invalid requests from the samples of every request schema."""
+    instances = [{}, [], "card.status", None, {"req": "card.unknown"}, {"req": 1}, {"cmd": ["card.status"]}]
+    for filename in request_filenames():
+        for instance in iter_sample_instances(load_schema(filename)):
+            instances.append(instance)
+            instances.append({**instance, "unexpected": True})
+            if "req" in instance:
+                instances.append({**instance, "cmd": instance["req"]})
+                rest = {k: v for k, v in instance.items() if k != "req"}
+                instances.append({"cmd": instance["req"], **rest})
+    return instances
+
+# Values of every JSON type, each put in place of every property of a sample.
+PROPERTY_VALUES = [None, True, -1, 1.5, "x", [], {}]
+
+@pytest.fixture(scope='session')
+def schema_instances():
+    """Builds valid and invalid instances for every per-API schema from its samples and properties."""
+    instances = {}
+    for path in sorted(glob.glob(os.path.join(project_root, "*.notecard.api.json"))):
+        filename = os.path.basename(path)
+        if api_name(filename) is None:
+            continue
+        schema = load_schema(filename)
+        samples = list(iter_sample_instances(schema))
+        found = [{}, [], None, "x", {"unexpected": True}]
+        for sample in samples:
+            found.append(sample)
+            found.append({**sample, "unexpected": True})
+            found.extend({k: v for k, v in sample.items() if k != key} for key in sample)
+        base = samples[0] if samples and isinstance(samples[0], dict) else {}
+        for key, subschema in schema.get("properties", {}).items():
+            values = PROPERTY_VALUES + subschema.get("enum", [])
+            if "const" in subschema:
+                values = values + [subschema["const"]]
+            found.extend({**base, key: value} for value in values)
+        instances[filename] = found
+    return instances
@@ -0,0 +1,138 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, Future
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from notecard_schema import Dispatcher
+from notecard_schema.aio import AsyncValidator
+
+@pytest.fixture(scope="module")
+def dispatcher():
+    return Dispatcher.from_directory()
+
+class RecordingDispatcher:
+    """Records which thread each is_valid call runs on."""
+    def __init__(self, dispatcher):
+        self.dispatcher = dispatcher
+        self.threads = []
+
+    def warm(self):
+        return self
+
+    def is_valid(self, instance):
+        self.threads.append(threading.current_thread().name)
+        return self.dispatcher.is_valid(instance)
+
+    def best_error(self, instance):
+        return self.dispatcher.best_error(instance)
+
+def test_is_valid_and_validate(dispatcher):
+    """Tests that the async API agrees with the dispatcher."""
+    async def main():
+        async with AsyncValidator(dispatcher) as validator:
+            assert await validator.is_valid({"req": "card.status"})
+            assert not await validator.is_valid({"req": "hub.set", "mode": "sometimes"})
+            await validator.validate({"req": "card.status"})
+            with pytest.raises(ValidationError) as excinfo:
+                await validator.validate({"req": "hub.set", "mode": "sometimes"})
+            return excinfo.value
+    error = asyncio.run(main())
+    assert list(error.path) == ["mode"]
+
+def test_validate_many_preserves_order(dispatcher):
+    """Tests that validate_many returns one result per instance, in order."""
+    instances = [{"req": "card.status"}, {"req": "card.stauts"}, {"cmd": "card.time"}, 5]
+    async def main():
+        async with AsyncValidator(dispatcher) as validator:
+            return await validator.validate_many(instances)
+    errors = asyncio.run(main())
+    assert errors[0] is None and errors[2] is None
+    assert "did you mean 'card.status'?" in errors[1].message
+    assert errors[3].message.endswith("(expected an object)")
+
+def test_small_batches_run_on_the_loop(dispatcher):
+    """Tests that a batch within the latency budget is checked on the event loop."""
+    recording = RecordingDispatcher(dispatcher)
+    async def main():
+        async with AsyncValidator(recording) as validator:
+            return await asyncio.gather(*(validator.is_valid({"req": "card.status"}) for _ in range(10)))
+    assert asyncio.run(main()) == [True] * 10
+    assert recording.threads == ["MainThread"] * 10
+
+def test_zero_budget_offloads_to_executor(dispatcher):
+    """Tests that checks run off the event loop once the latency budget is spent."""
+    recording = RecordingDispatcher(dispatcher)
+    async def main():
+        async with AsyncValidator(recording, latency_budget_ms=0, max_batch=4) as validator:
+            return await asyncio.gather(*(validator.is_valid({"req": "card.status"}) for _ in range(10)))
+    assert asyncio.run(main()) == [True] * 10
+    assert recording.threads
+    assert all(name.startswith("notecard-schema") for name in recording.threads)
+
+class SlowDispatcher(RecordingDispatcher):
+    """Takes about 0.1 ms per check."""
+    def is_valid(self, instance):
+        deadline = time.perf_counter() + 0.0001
+        while time.perf_counter() < deadline:
+            pass
+        return super().is_valid(instance)
+
+def test_loop_is_not_held_past_the_budget(dispatcher):
+    """Tests that a large validate_many does not stall a concurrent task for much longer than the budget."""
+    slow = SlowDispatcher(dispatcher)
+    async def main():
+        gaps = []
+        done = asyncio.Event()
+        async def ticker():
+            last = time.perf_counter()
+            while not done.is_set():
+                await asyncio.sleep(0)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+        async with AsyncValidator(slow, latency_budget_ms=1, max_batch=16) as validator:
+            task = asyncio.ensure_future(ticker())
+            await asyncio.sleep(0)
+            errors = await validator.validate_many([{"req": "card.status"}] * 3000)
+            done.set()
+            await task
+        return errors, gaps
+    errors, gaps = asyncio.run(main())
+    assert errors == [None] * 3000
+    assert "MainThread" in slow.threads
+    # Charged per batch, the budget would hold the loop for about 190 ms.
+    assert max(gaps) < 0.05
+
+class HoldingExecutor(Executor):
+    """Holds submitted work without running it."""
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+def test_cancelled_offload_cancels_waiters(dispatcher):
+    """Tests that waiters are cancelled, not left pending, when offloaded work is cancelled."""
+    executor = HoldingExecutor()
+    async def main():
+        validator = AsyncValidator(dispatcher, latency_budget_ms=0, executor=executor)
+        waiters = [asyncio.ensure_future(validator.is_valid({"req": "card.status"})) for _ in range(3)]
+        while not executor.futures:
+            await asyncio.sleep(0)
+        executor.futures[0].cancel()
+        return await asyncio.wait_for(asyncio.gather(*waiters, return_exceptions=True), 5)
+    results = asyncio.run(main())
+    assert len(results) == 3
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+def test_invalid_arguments(dispatcher):
+    """Tests that negative budgets and empty batches are rejected."""
+    with pytest.raises(ValueError):
+        AsyncValidator(dispatcher, latency_budget_ms=-1)
+    with pytest.raises(ValueError):
+        AsyncValidator(dispatcher, max_batch=0)
@@ -0,0 +1,85 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scripts'))
+
+import benchmark  # noqa: E402
+
+ENVIRONMENT = {"python": "3.13.0", "jsonschema": "4.25.1", "machine": "x86_64"}
+BASE = {"calibration_ms": 1.0, "load_ms": 0.05, "build_ms": 1.0, "latency_us": 2.0, "throughput_per_s": 500000.0}
+
+def run_results(**metrics):
+    return {"environment": dict(ENVIRONMENT), "files": {"card.time.req.notecard.api.json": {**BASE, **metrics}}}
+
+def test_unchanged_timings_pass():
+    """Tests that timings equal to the baseline, or within the tolerance, are not regressions."""
+    assert benchmark.file_regressions("f", BASE, BASE, 0.3) == {}
+    assert benchmark.file_regressions("f", {**BASE, "latency_us": 2.5, "throughput_per_s": 400000.0}, BASE, 0.3) == {}
+
+def test_slower_metrics_are_regressions():
+    """Tests that each metric slower than the tolerance is reported, keyed by metric."""
+    slower = {**BASE, "load_ms": 0.1, "build_ms": 2.0, "latency_us": 3.0, "throughput_per_s": 300000.0}
+    found = benchmark.file_regressions("f", slower, BASE, 0.3)
+    assert set(found) == {"load_ms", "build_ms", "latency_us", "throughput_per_s"}
+    assert found["latency_us"].startswith("f: latency_us 3 vs baseline 2")
+
+def test_changes_below_the_noise_floor_pass():
+    """Tests that a relative slowdown smaller than the absolute noise floor is not reported."""
+    expected = {**BASE, "latency_us": 0.1}
+    assert benchmark.file_regressions("f", {**expected, "latency_us": 0.19}, expected, 0.3) == {}
+    assert "latency_us" in benchmark.file_regressions("f", {**expected, "latency_us": 0.25}, expected, 0.3)
+
+def test_calibration_only_relaxes_the_baseline():
+    """Tests that a slower calibration loop scales the baseline, and a faster one does not tighten it."""
+    busy = {**BASE, "calibration_ms": 2.0, "latency_us": 3.5}
+    assert benchmark.file_regressions("f", busy, BASE, 0.3) == {}
+    quiet = {**BASE, "calibration_ms": 0.5, "latency_us": 2.5}
+    assert benchmark.file_regressions("f", quiet, BASE, 0.3) == {}
+
+def test_compare_skips_files_without_a_baseline():
+    """Tests that compare reports regressed files only, and ignores files the baseline lacks."""
+    results = run_results(latency_us=4.0)
+    results["files"]["new.req.notecard.api.json"] = {**BASE, "latency_us": 100.0}
+    regressions = benchmark.compare(results, run_results(), 0.3)
+    assert list(regressions) == ["card.time.req.notecard.api.json"]
+    assert list(regressions["card.time.req.notecard.api.json"]) == ["latency_us"]
+    assert benchmark.compare(run_results(), run_results(), 0.3) == {}
+
+def test_confirm_keeps_only_metrics_slower_every_time(monkeypatch):
+    """Tests that a metric is reported only if every retry is also slower."""
+    retries = iter([{**BASE, "latency_us": 4.0, "load_ms": 0.1}, {**BASE, "latency_us": 4.0}])
+    monkeypatch.setattr(benchmark, "benchmark_file", lambda *args: next(retries))
+    results = run_results(latency_us=4.0, build_ms=2.0)
+    regressions = benchmark.confirm(results, run_results(), 0.3, "", 1, 1, retries=2)
+    assert list(regressions["card.time.req.notecard.api.json"]) == ["latency_us"]
+
+@pytest.mark.parametrize("recorded, mismatch", [
+    ({**ENVIRONMENT, "python": "3.13.5"}, False),
+    ({**ENVIRONMENT, "python": "3.11.7"}, True),
+    ({**ENVIRONMENT, "machine": "arm64"}, True),
+    ({}, True),
+])
+def test_environment_mismatch(recorded, mismatch):
+    """Tests that a baseline from another Python minor version or architecture cannot be compared."""
+    baseline = {"environment": recorded, "files": {}}
+    assert (benchmark.environment_mismatch(run_results(), baseline) is not None) == mismatch
+
+def test_mismatched_baseline_is_not_compared(tmp_path, monkeypatch, capsys):
+    """Tests that a slower run passes, with a notice, against a baseline from another Python minor version."""
+    baseline = run_results()
+    baseline["environment"]["python"] = "3.11.7"
+    path = tmp_path / "baseline.json"
+    path.write_text(json.dumps(baseline))
+    monkeypatch.setattr(benchmark, "run", lambda *args: run_results(latency_us=20.0))
+    monkeypatch.setattr(sys, "argv", ["benchmark.py", "--baseline", str(path)])
+    benchmark.main()
+    assert "recorded on Python 3.11.7, this run uses 3.13.0; not comparing" in capsys.readouterr().out
+    baseline["environment"]["python"] = "3.13.2"
+    path.write_text(json.dumps(baseline))
+    monkeypatch.setattr(benchmark, "confirm", lambda *args: benchmark.compare(args[0], args[1], args[2]))
+    with pytest.raises(SystemExit) as excinfo:
+        benchmark.main()
+    assert excinfo.value.code == 1
@@ -0,0 +1,149 @@
+import json
+import os
+import shutil
+
+import jsonschema
+import pytest
+
+from notecard_schema import Dispatcher
+from notecard_schema.bundle import (BUNDLE_FILE, binary_path, build_bundle, def_name, load_bundle,
+                                    read_binary_bundle, write_binary_bundle, write_bundle)
+from notecard_schema.loader import INDEX_FILE, load_schema, request_filenames
+
+@pytest.fixture(scope="module")
+def bundle_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("bundle") / BUNDLE_FILE
+    write_bundle(str(path))
+    return path
+
+@pytest.fixture(scope="module")
+def bundle(bundle_path):
+    with open(bundle_path) as f:
+        return json.load(f)
+
+def iter_refs(node):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "$ref":
+                yield value
+            elif key == "codeRef":
+                yield from value
+            else:
+                yield from iter_refs(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from iter_refs(item)
+
+def resolve(bundle, ref):
+    node = bundle
+    for part in ref[2:].split('/'):
+        node = node[part.replace("~1", "/").replace("~0", "~")]
+    return node
+
+def test_bundle_contains_every_schema(bundle):
+    """Tests that every request and response schema and the error codes are bundled."""
+    index = load_schema(INDEX_FILE)
+    assert len(bundle["$defs"]) == 2 * len(request_filenames()) + 1
+    assert "notecard.codes" in bundle["$defs"]
+    assert bundle["$defs"]["card.time.rsp"]["properties"] == load_schema("card.time.rsp.notecard.api.json")["properties"]
+    assert bundle["version"] == index["version"]
+    assert bundle["$id"].endswith("/" + BUNDLE_FILE)
+    for schema in bundle["$defs"].values():
+        assert "$id" not in schema and "$schema" not in schema
+
+def test_every_reference_is_local(bundle):
+    """Tests that every $ref and codeRef is a JSON pointer that resolves inside the bundle."""
+    refs = list(iter_refs(bundle))
+    assert len(refs) > len(request_filenames())
+    for ref in refs:
+        assert ref.startswith("#/"), ref
+        resolve(bundle, ref)
+    assert resolve(bundle, "#/$defs/notecard.codes/$defs/auth")["const"] == "{auth}"
+
+def test_bundle_validates_without_a_registry(bundle, request_instances):
+    """Tests that the bundle alone gives the same results as the dispatched schemas."""
+    validator = jsonschema.Draft202012Validator(bundle)
+    dispatcher = Dispatcher.from_directory()
+    for instance in request_instances:
+        assert validator.is_valid(instance) == dispatcher.is_valid(instance), instance
+
+def test_dispatcher_from_bundle(bundle_path, request_instances):
+    """Tests that a Dispatcher loaded from the bundle matches one loaded from the directory."""
+    from_bundle = Dispatcher.from_bundle(str(bundle_path))
+    from_directory = Dispatcher.from_directory()
+    assert set(from_bundle.schemas) == set(from_directory.schemas)
+    for instance in request_instances:
+        assert from_bundle.is_valid(instance) == from_directory.is_valid(instance), instance
+
+def test_external_reference_is_rejected(tmp_path):
+    """Tests that a reference to a schema outside the bundle is an error."""
+    for filename in [INDEX_FILE, "notecard.codes.json"] + [
+            name for ref in load_schema(INDEX_FILE)["oneOf"]
+            for name in (ref["$ref"].split('/')[-1], ref["$ref"].split('/')[-1].replace(".req.", ".rsp."))]:
+        (tmp_path / filename).write_text(json.dumps(load_schema(filename)))
+    schema = load_schema("card.time.req.notecard.api.json")
+    schema["properties"]["extra"] = {"$ref": "https://example.com/other.json"}
+    (tmp_path / "card.time.req.notecard.api.json").write_text(json.dumps(schema))
+    with pytest.raises(ValueError, match="other.json"):
+        build_bundle(str(tmp_path))
+
+def test_def_name():
+    assert def_name("card.time.req.notecard.api.json") == "card.time.req"
+    assert def_name("notecard.codes.json") == "notecard.codes"
+
+@pytest.fixture
+def binary_bundle_path(tmp_path, bundle_path):
+    path = tmp_path / BUNDLE_FILE
+    shutil.copy(bundle_path, path)
+    write_binary_bundle(str(path))
+    return path
+
+def test_binary_bundle_round_trip(binary_bundle_path, bundle):
+    """Tests that the binary form loads the same bundle as the JSON."""
+    assert os.path.basename(binary_path(str(binary_bundle_path))) == "notecard.api.bundle.marshal"
+    assert read_binary_bundle(str(binary_bundle_path)) == bundle
+    assert load_bundle(str(binary_bundle_path)) == bundle
+    assert set(Dispatcher.from_bundle(str(binary_bundle_path)).schemas) == set(Dispatcher.from_directory().schemas)
+
+def test_binary_bundle_survives_touch(binary_bundle_path):
+    """Tests that the binary form is still used when the JSON's timestamp changes but its content does not."""
+    stat = os.stat(binary_bundle_path)
+    os.utime(binary_bundle_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert read_binary_bundle(str(binary_bundle_path)) is not None
+
+def test_stale_binary_bundle_falls_back_to_json(binary_bundle_path):
+    """Tests that the binary form is ignored once the JSON it was made from changes."""
+    bundle = json.loads(binary_bundle_path.read_text())
+    bundle["version"] = "0.0.0"
+    binary_bundle_path.write_text(json.dumps(bundle))
+    assert read_binary_bundle(str(binary_bundle_path)) is None
+    assert load_bundle(str(binary_bundle_path))["version"] == "0.0.0"
+
+    # Same size, different content.
+    text = binary_bundle_path.read_text().replace('"0.0.0"', '"0.0.1"')
+    write_binary_bundle(str(binary_bundle_path))
+    binary_bundle_path.write_text(text)
+    assert read_binary_bundle(str(binary_bundle_path)) is None
+    assert load_bundle(str(binary_bundle_path))["version"] == "0.0.1"
+
+@pytest.mark.parametrize("offset", [0, 4, 6])
+def test_binary_bundle_from_other_format_or_python_is_ignored(binary_bundle_path, bundle, offset):
+    """Tests that a binary form with a different magic, format version or Python magic number is ignored."""
+    path = binary_path(str(binary_bundle_path))
+    with open(path, 'r+b') as f:
+        f.seek(offset)
+        byte = f.read(1)
+        f.seek(offset)
+        f.write(bytes([byte[0] ^ 0xFF]))
+    assert read_binary_bundle(str(binary_bundle_path)) is None
+    assert load_bundle(str(binary_bundle_path)) == bundle
+
+def test_truncated_or_missing_binary_bundle_is_ignored(binary_bundle_path, bundle):
+    """Tests that a damaged or absent binary form falls back to the JSON."""
+    path = binary_path(str(binary_bundle_path))
+    with open(path, 'r+b') as f:
+        f.truncate(os.path.getsize(path) // 2)
+    assert read_binary_bundle(str(binary_bundle_path)) is None
+    os.remove(path)
+    assert read_binary_bundle(str(binary_bundle_path)) is None
+    assert load_bundle(str(binary_bundle_path)) == bundle
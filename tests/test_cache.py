@@ -0,0 +1,125 @@
+import marshal
+import os
+import shutil
+import pytest
+
+from notecard_schema import Dispatcher, get_validator
+from notecard_schema.cache import CACHE_DIR_ENV, NO_CACHE_ENV, ValidatorCache, default_cache
+from notecard_schema.compiler import schema_filenames
+from notecard_schema.loader import SCHEMA_DIR
+
+@pytest.fixture
+def schema_dir(tmp_path):
+    """Copies a handful of schemas into a scratch directory."""
+    directory = tmp_path / "schemas"
+    directory.mkdir()
+    for filename in ("card.status.req.notecard.api.json", "note.add.req.notecard.api.json", "hub.set.req.notecard.api.json"):
+        shutil.copy(os.path.join(SCHEMA_DIR, filename), directory / filename)
+    return str(directory)
+
+def test_second_load_is_served_from_cache(tmp_path, schema_dir):
+    """Tests that a fresh cache instance loads every validator without compiling."""
+    cache_dir = str(tmp_path / "cache")
+    first = ValidatorCache(cache_dir)
+    first.load_all(schema_dir)
+    assert (first.hits, first.misses) == (0, 3)
+
+    second = ValidatorCache(cache_dir)
+    validators = second.load_all(schema_dir)
+    assert (second.hits, second.misses) == (3, 0)
+    assert validators["card.status.req.notecard.api.json"]({"req": "card.status"})
+    assert not validators["card.status.req.notecard.api.json"]({"req": "card.status", "extra": 1})
+
+def test_only_changed_schema_is_rebuilt(tmp_path, schema_dir):
+    """Tests that editing one schema recompiles only that schema."""
+    cache_dir = str(tmp_path / "cache")
+    ValidatorCache(cache_dir).load_all(schema_dir)
+
+    path = os.path.join(schema_dir, "card.status.req.notecard.api.json")
+    with open(path) as f:
+        content = f.read()
+    with open(path, 'w') as f:
+        f.write(content.replace('"unevaluatedProperties": false', '"unevaluatedProperties": true'))
+
+    cache = ValidatorCache(cache_dir)
+    validators = cache.load_all(schema_dir)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert validators["card.status.req.notecard.api.json"]({"req": "card.status", "extra": 1})
+
+def test_corrupt_entry_is_recompiled(tmp_path, schema_dir):
+    """Tests that an unreadable cache entry is treated as a miss."""
+    cache = ValidatorCache(str(tmp_path / "cache"))
+    cache.load_all(schema_dir)
+    for entry in os.listdir(cache.cache_dir):
+        with open(os.path.join(cache.cache_dir, entry), 'wb') as f:
+            f.write(b"\x00")
+
+    cache = ValidatorCache(cache.cache_dir)
+    validators = cache.load_all(schema_dir)
+    assert cache.misses == 3
+    assert validators["note.add.req.notecard.api.json"]({"req": "note.add", "body": {"temp": 1}})
+
+def test_prune_removes_stale_entries(tmp_path, schema_dir):
+    """Tests that prune drops entries for schemas that no longer exist."""
+    cache = ValidatorCache(str(tmp_path / "cache"))
+    cache.load_all(schema_dir)
+    os.remove(os.path.join(schema_dir, "hub.set.req.notecard.api.json"))
+    assert cache.prune(schema_dir) == 1
+    assert len(os.listdir(cache.cache_dir)) == len(schema_filenames(schema_dir))
+
+def test_entry_that_is_not_code_is_rewritten(tmp_path, schema_dir):
+    """Tests that a readable entry holding something other than a code object is a miss and is replaced."""
+    cache = ValidatorCache(str(tmp_path / "cache"))
+    cache.load_all(schema_dir)
+    for entry in os.listdir(cache.cache_dir):
+        with open(os.path.join(cache.cache_dir, entry), 'wb') as f:
+            marshal.dump({"not": "code"}, f)
+
+    cache = ValidatorCache(cache.cache_dir)
+    validators = cache.load_all(schema_dir)
+    assert cache.misses == 3
+    assert validators["card.status.req.notecard.api.json"]({"req": "card.status"})
+    cache = ValidatorCache(cache.cache_dir)
+    cache.load_all(schema_dir)
+    assert (cache.hits, cache.misses) == (3, 0)
+
+def test_compile_caches_schemas_in_memory(tmp_path):
+    """Tests that compile stores in-memory schemas by content and prune keeps those entries."""
+    schema = {"type": "object", "properties": {"a": {"type": "integer"}}, "required": ["a"]}
+    first = ValidatorCache(str(tmp_path / "cache"))
+    assert first.compile(schema)({"a": 1})
+    second = ValidatorCache(first.cache_dir)
+    check = second.compile(dict(reversed(list(schema.items()))))
+    assert (second.hits, second.misses) == (1, 0)
+    assert check({"a": 1}) and not check({"a": "1"})
+    assert second.prune(str(tmp_path)) == 0
+
+def test_dispatcher_loads_validators_from_cache(tmp_path):
+    """Tests that a dispatcher built after another with the same cache compiles nothing."""
+    cache_dir = str(tmp_path / "cache")
+    Dispatcher.from_directory(cache=ValidatorCache(cache_dir)).warm()
+    cache = ValidatorCache(cache_dir)
+    dispatcher = Dispatcher.from_directory(cache=cache).warm()
+    assert cache.misses == 0 and cache.hits == len(dispatcher.schemas)
+    assert dispatcher.is_valid({"req": "card.status"})
+    assert not dispatcher.is_valid({"req": "card.status", "extra": 1})
+
+def test_cache_is_opt_in(monkeypatch, tmp_path):
+    """Tests that nothing is cached unless the environment or the caller enables it."""
+    monkeypatch.delenv(CACHE_DIR_ENV)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert default_cache() is None
+    assert Dispatcher.from_directory().cache is None
+    cache = Dispatcher.from_directory(cache=True).cache
+    assert cache is default_cache(enable=True)
+    assert cache.cache_dir == str(tmp_path / "notecard-schema")
+
+def test_cache_opt_out(monkeypatch, validator_cache_dir):
+    """Tests that the cache can be turned off per dispatcher and for the whole process."""
+    assert Dispatcher.from_directory(cache=False).cache is None
+    assert Dispatcher.from_directory().cache is default_cache()
+    assert default_cache().cache_dir == validator_cache_dir
+    monkeypatch.setenv(NO_CACHE_ENV, "1")
+    assert default_cache() is None
+    assert Dispatcher.from_directory().cache is None
+    assert get_validator("card.status").is_valid({"req": "card.status"})
@@ -0,0 +1,106 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from notecard_schema.columnar import ColumnarValidator
+from notecard_schema.loader import api_name, load_schema, request_filenames, response_filename
+from notecard_schema.validator import SchemaValidator
+
+def response_batch(schema):
+    """Returns sample responses plus mutations that break each declared property."""
+    rows = []
+    for sample in schema.get("samples", []):
+        response = json.loads(sample["json"])
+        rows.extend(response if isinstance(response, list) else [response])
+    rows = [row for row in rows if isinstance(row, dict)] or [{}]
+    mutations = [None, True, 1, 1.5, -1e9, "", "x" * 300, [], {}]
+    batch = list(rows)
+    for row in rows:
+        for name in row:
+            for value in mutations:
+                batch.append(dict(row, **{name: value}))
+            batch.append({key: value for key, value in row.items() if key != name})
+        batch.append(dict(row, undeclared=1))
+    batch.extend([None, "card.voltage", 5])
+    return batch
+
+@pytest.mark.parametrize("api", [api_name(filename) for filename in request_filenames()])
+def test_mask_matches_row_validation(api):
+    """Tests that the columnar mask agrees with per-row validation for every response schema."""
+    schema = load_schema(response_filename(api))
+    batch = response_batch(schema)
+    result = ColumnarValidator(schema).validate(batch)
+    expected = [SchemaValidator(schema).is_valid(row) for row in batch]
+    assert result.mask.tolist() == expected
+    assert sorted(result.failures) == [i for i, ok in enumerate(expected) if not ok]
+
+def test_failing_fields_are_reported():
+    """Tests that each invalid row reports the fields it failed on."""
+    validator = ColumnarValidator.for_api("card.voltage")
+    assert validator.columnar
+    result = validator.validate([
+        {"value": 3.9, "mode": "normal", "usb": True, "hours": 3},
+        {"value": "high", "hours": 1.5},
+        {"value": 3.9, "hours": 2.0, "extra": 1},
+        "3.9",
+        {"usb": 1},
+    ])
+    assert result.mask.tolist() == [True, False, False, False, False]
+    assert result.failures == {1: ["hours", "value"], 2: ["extra"], 3: ["$"], 4: ["usb"]}
+
+def test_range_and_enum_columns():
+    """Tests vectorized range, length and enum checks."""
+    validator = ColumnarValidator({
+        "type": "object",
+        "properties": {
+            "level": {"type": "integer", "minimum": 0, "exclusiveMaximum": 10},
+            "mode": {"type": "string", "enum": ["on", "off"]},
+            "code": {"enum": [1, 2.5]},
+            "name": {"type": "string", "maxLength": 3},
+        },
+        "required": ["level"],
+    })
+    result = validator.validate([
+        {"level": 0, "mode": "on", "code": 1.0, "name": "abc"},
+        {"level": 10},
+        {"level": -1, "mode": "dim"},
+        {"mode": "off", "code": True},
+        {"level": 5, "name": "abcd", "code": 3},
+    ])
+    assert result.mask.tolist() == [True, False, False, False, False]
+    assert result.failures == {1: ["level"], 2: ["level", "mode"], 3: ["code", "level"], 4: ["code", "name"]}
+
+def test_integers_beyond_float64_are_checked_exactly():
+    """Tests that huge integers neither overflow nor lose precision in range and enum checks."""
+    schema = {
+        "type": "object",
+        "properties": {
+            "big": {"type": "integer", "maximum": 2 ** 53},
+            "id": {"enum": [2 ** 53 + 1]},
+        },
+    }
+    instances = [
+        {"big": 10 ** 400, "id": 2 ** 53 + 1},
+        {"big": -(10 ** 400), "id": 2 ** 53},
+        {"big": 2 ** 53 + 1, "id": 2 ** 53 + 2},
+        {"big": 2 ** 53, "id": 2 ** 53 + 1},
+    ]
+    result = ColumnarValidator(schema).validate(instances)
+    reference = SchemaValidator(schema)
+    assert result.mask.tolist() == [reference.is_valid(instance) for instance in instances] == [False, False, False, True]
+    assert result.failures == {0: ["big"], 1: ["id"], 2: ["big", "id"]}
+
+def test_conditional_schemas_fall_back_to_rows():
+    """Tests that schemas with top-level conditionals are validated row by row."""
+    schema = {
+        "type": "object",
+        "properties": {"a": {"type": "integer"}, "b": {"type": "integer"}},
+        "oneOf": [{"required": ["a"]}, {"required": ["b"]}],
+    }
+    validator = ColumnarValidator(schema)
+    assert not validator.columnar
+    result = validator.validate([{"a": 1}, {"a": 1, "b": 2}, {"a": "x"}])
+    assert result.mask.tolist() == [True, False, False]
+    assert result.failures == {1: ["$"], 2: ["a"]}
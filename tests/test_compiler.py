@@ -0,0 +1,120 @@
+import pytest
+import jsonschema
+
+from notecard_schema.compiler import (
+    CompileError,
+    compile_schema,
+    compile_schemas,
+    generate_module,
+    load_module,
+    load_schemas,
+    req_cmd_const,
+)
+
+@pytest.fixture(scope='module')
+def schemas():
+    return load_schemas()
+
+@pytest.fixture(scope='module')
+def compiled(schemas):
+    return compile_schemas(schemas)
+
+def test_compiles_every_schema(schemas, compiled):
+    """Tests that every schema file compiles to a validator."""
+    assert set(compiled) == set(schemas)
+
+def test_conformance_with_samples(schemas, compiled, sample_instances):
+    """Tests that compiled validators agree with jsonschema on every sample."""
+    checked = 0
+    for filename, schema in schemas.items():
+        reference = jsonschema.Draft202012Validator(schema)
+        for instance in sample_instances(schema):
+            assert compiled[filename](instance) == reference.is_valid(instance), (filename, instance)
+            checked += 1
+    assert checked > 0
+
+def test_conformance_with_schema_instances(schemas, compiled, schema_instances):
+    """Tests that compiled validators agree with jsonschema on valid and invalid variants of every sample."""
+    assert schema_instances
+    for filename, values in schema_instances.items():
+        reference = jsonschema.Draft202012Validator(schemas[filename])
+        for instance in values:
+            assert compiled[filename](instance) == reference.is_valid(instance), (filename, instance)
+
+@pytest.mark.parametrize("schema, instance", [
+    ({"type": "integer"}, 3.0),
+    ({"type": "integer"}, True),
+    ({"type": "number", "minimum": 1}, False),
+    ({"minimum": 3}, True),
+    ({"const": 1}, True),
+    ({"const": True}, 1),
+    ({"enum": [1, 2]}, 2.0),
+    ({"enum": ["a", "b"]}, ["a"]),
+    ({"type": ["string", "object"], "oneOf": [{"const": "-"}, {"type": "object", "required": ["a"]}]}, {"a": 1}),
+    ({"properties": {"a": {}}, "allOf": [{"properties": {"a": {"type": "string"}}}], "unevaluatedProperties": False}, {"a": "x", "b": 1}),
+    ({"items": {"type": "string"}, "minItems": 1}, []),
+    ({"additionalProperties": {"type": "integer"}}, {"x": 1, "y": "2"}),
+    ({"if": {"required": ["a"]}, "then": {"required": ["b"]}, "else": {"not": {"required": ["b"]}}}, {"b": 1}),
+])
+def test_conformance_with_keyword_edge_cases(schema, instance):
+    """Tests that compiled keyword checks agree with jsonschema on type edge cases."""
+    assert compile_schema(schema)(instance) == jsonschema.Draft202012Validator(schema).is_valid(instance)
+
+@pytest.mark.parametrize("schema, instance", [
+    ({"items": {"if": {"minimum": 1}}}, [0, 2]),
+    ({"items": {"type": "integer", "minLength": 2}}, [1, "a"]),
+    ({"additionalProperties": {"if": {"minimum": 1}}}, {"a": 0}),
+    ({"properties": {"a": {}}, "unevaluatedProperties": {"if": {"required": ["x"]}}}, {"a": 1, "b": {}}),
+])
+def test_subschemas_that_check_nothing_compile(schema, instance):
+    """Tests that items and property subschemas with no emitted checks compile instead of breaking the loop."""
+    assert compile_schema(schema)(instance) == jsonschema.Draft202012Validator(schema).is_valid(instance)
+
+def test_generated_syntax_error_is_a_compile_error():
+    """Tests that generated source which is not valid Python raises CompileError, so callers fall back."""
+    with pytest.raises(CompileError):
+        load_module("def broken(:\n")
+
+def test_unsupported_keyword_is_rejected():
+    """Tests that unsupported keywords fail compilation instead of being ignored."""
+    with pytest.raises(CompileError):
+        compile_schema({"uniqueItems": True})
+
+def test_dynamic_unevaluated_properties_is_rejected():
+    """Tests that unevaluatedProperties depending on a branch fails compilation."""
+    with pytest.raises(CompileError):
+        compile_schema({"anyOf": [{"properties": {"a": {}}}], "unevaluatedProperties": False})
+
+def test_generated_module_is_importable(schemas):
+    """Tests that the generated module source exports a validator table."""
+    source = generate_module({"card.status.req.notecard.api.json": schemas["card.status.req.notecard.api.json"]})
+    namespace = {}
+    exec(source, namespace)
+    validate = namespace["validate_card_status_req"]
+    assert validate({"req": "card.status"})
+    assert not validate({"req": "card.status", "extra": 1})
+    assert namespace["VALIDATORS"]["card.status.req.notecard.api.json"] is validate
+
+def test_req_cmd_idiom_is_recognized(schemas):
+    """Tests that the req/cmd oneOf shared by request schemas compiles to one helper call."""
+    schema = schemas["card.status.req.notecard.api.json"]
+    assert req_cmd_const(schema["oneOf"]) == "card.status"
+    # web.post adds a required route and a not clause, so it is not the bare idiom.
+    assert req_cmd_const(schemas["web.post.req.notecard.api.json"]["oneOf"]) is None
+    source = generate_module({"card.status.req.notecard.api.json": schema})
+    assert "_req_or_cmd(data, 'card.status')" in source
+    assert "def _s" not in source
+
+@pytest.mark.parametrize("instance", [
+    {"req": "card.status"},
+    {"cmd": "card.status"},
+    {"req": "card.status", "cmd": "card.status"},
+    {"req": "card.status", "cmd": "card.time"},
+    {"req": "card.time"},
+    {},
+    "card.status",
+])
+def test_req_cmd_idiom_conformance(schemas, instance):
+    """Tests that the shared req/cmd check agrees with jsonschema on the bare oneOf."""
+    one_of = {"oneOf": schemas["card.status.req.notecard.api.json"]["oneOf"]}
+    assert compile_schema(one_of)(instance) == jsonschema.Draft202012Validator(one_of).is_valid(instance)
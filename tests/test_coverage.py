@@ -0,0 +1,82 @@
+import io
+import json
+
+import pytest
+
+from notecard_schema import Dispatcher
+from notecard_schema.coverage import CoveragePlan, SchemaCoverage
+
+@pytest.fixture(scope="module")
+def dispatcher():
+    return Dispatcher.from_directory()
+
+def hits(coverage, api):
+    plan = coverage.plan(api)
+    return {pointer: count for (pointer, _), count in zip(plan.points, plan.counts)}
+
+def test_properties_and_enum_values(dispatcher):
+    """Tests that properties and enum values are counted per transaction."""
+    coverage = SchemaCoverage(dispatcher)
+    coverage.record({"req": "hub.set", "mode": "periodic", "outbound": 60})
+    coverage.record({"req": "hub.set", "mode": "continuous"})
+    coverage.record({"cmd": "hub.set", "mode": "periodic"})
+    counts = hits(coverage, "hub.set")
+    modes = dispatcher.schemas["hub.set"]["properties"]["mode"]["enum"]
+    assert counts["#/properties/mode"] == 3
+    assert counts["#/properties/outbound"] == 1
+    assert counts[f"#/properties/mode/enum/{modes.index('periodic')}"] == 2
+    assert counts[f"#/properties/mode/enum/{modes.index('continuous')}"] == 1
+    assert counts[f"#/properties/mode/enum/{modes.index('off')}"] == 0
+    assert counts["#/oneOf/0"] == 2 and counts["#/oneOf/1"] == 1
+    assert coverage.plan("hub.set").transactions == 3
+
+def test_enum_keeps_booleans_distinct():
+    """Tests that enum matching follows JSON Schema equality."""
+    plan = CoveragePlan("x", {"enum": [1, True, "1", [1]]})
+    for instance in (1, 1.0, True, "1", [1], [True], False):
+        plan.record(instance)
+    assert list(plan.counts) == [2, 1, 1, 1]
+
+def test_conditional_arms():
+    """Tests that if/then/else outcomes are counted separately."""
+    plan = CoveragePlan("x", {
+        "if": {"properties": {"a": {"const": 1}}, "required": ["a"]},
+        "then": {"properties": {"b": {"type": "string"}}},
+        "else": {"anyOf": [{"required": ["b"]}, {"required": ["c"]}]},
+    })
+    for instance in ({"a": 1, "b": "x"}, {"b": 1, "c": 2}, {}):
+        plan.record(instance)
+    counts = {pointer: count for (pointer, _), count in zip(plan.points, plan.counts)}
+    assert counts == {
+        "#/then": 1,
+        "#/then/properties/b": 1,
+        "#/else": 2,
+        "#/else/anyOf/0": 1,
+        "#/else/anyOf/1": 1,
+    }
+
+def test_report(dispatcher):
+    """Tests the coverage table and missing points."""
+    coverage = SchemaCoverage(dispatcher)
+    coverage.record({"req": "card.voltage", "mode": "lipo"})
+    coverage.record({"req": "card.stauts"})
+    report = coverage.report(show_missing=True)
+    assert report.splitlines()[0].split() == ["API", "Txns", "Points", "Hit", "Cover"]
+    assert "card.voltage" in report
+    assert "missing: $.usb (#/properties/usb)" in report
+    assert "1 transactions named no known API" in report
+    assert f"{len(dispatcher.schemas) - 1} APIs received no transactions" in report
+    data = coverage.to_dict()
+    assert data["unknown"] == 1
+    assert list(data["apis"]) == ["card.voltage"]
+    json.dumps(data)
+
+def test_counters_do_not_grow_with_the_corpus(dispatcher):
+    """Tests that recording more transactions does not allocate more counters."""
+    coverage = SchemaCoverage(dispatcher)
+    coverage.record({"req": "note.add", "body": {"temp": 1}})
+    size = len(coverage.plan("note.add").counts)
+    for i in range(1000):
+        coverage.record({"req": "note.add", "body": {"temp": i}, "file": f"{i}.qo"})
+    assert len(coverage.plan("note.add").counts) == size
+    assert coverage.plan("note.add").transactions == 1001
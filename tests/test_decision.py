@@ -0,0 +1,65 @@
+import itertools
+import pytest
+import jsonschema
+
+from notecard_schema.compiler import SUPPORTED_KEYWORDS, UNSUPPORTED_KEYWORDS, compile_schema
+from notecard_schema.decision import MAX_ATOMS, build_table
+from notecard_schema.loader import load_schema
+
+VALIDATION_KEYWORDS = SUPPORTED_KEYWORDS | UNSUPPORTED_KEYWORDS
+
+def combinations(options):
+    """Yields every instance built from one choice per property (None omits it)."""
+    names = list(options)
+    for values in itertools.product(*(options[name] for name in names)):
+        yield {name: value for name, value in zip(names, values) if value is not None}
+
+@pytest.mark.parametrize("api", ["web.post", "web.put"])
+def test_web_body_payload_exclusion(api):
+    """Tests that the compiled body/payload/binary rules agree with jsonschema for every combination."""
+    schema = load_schema(f"{api}.req.notecard.api.json")
+    compiled = compile_schema(schema)
+    reference = jsonschema.Draft202012Validator(schema)
+    options = {
+        "req": [None, api],
+        "cmd": [None, api],
+        "route": [None, "MyRoute", 5],
+        "body": [None, {"temp": 1}],
+        "payload": [None, "aGVsbG8="],
+        "binary": [None, True, False],
+    }
+    for instance in combinations(options):
+        assert compiled(instance) == reference.is_valid(instance), instance
+
+def test_card_attn_conditionals():
+    """Tests that the compiled card.attn if/then/else rules agree with jsonschema for every combination."""
+    schema = load_schema("card.attn.req.notecard.api.json")
+    compiled = compile_schema(schema)
+    reference = jsonschema.Draft202012Validator(schema)
+    options = {
+        "req": ["card.attn"],
+        "mode": [None, "arm", "watchdog", "sleep", "arm,files", "files,sleep", "rearm,watchdog"],
+        "seconds": [None, -1, 0, 30, 60, 120],
+        "files": [None, ["data.qo"]],
+    }
+    for instance in combinations(options):
+        assert compiled(instance) == reference.is_valid(instance), instance
+
+def test_table_for_mutual_exclusion():
+    """Tests the truth table of a body/payload mutual exclusion."""
+    schema = {"not": {"allOf": [{"required": ["body"]}, {"required": ["payload"]}]}}
+    table = build_table(schema, ("not",), VALIDATION_KEYWORDS)
+    assert [atom[1] for atom in table.atoms] == ["body", "payload"]
+    assert [table.allows(mask) for mask in range(4)] == [True, True, True, False]
+
+def test_ineligible_keywords_have_no_table():
+    """Tests that conditionals using other keywords are left to generic evaluation."""
+    schema = {"anyOf": [{"type": "object"}, {"required": ["a"]}]}
+    assert build_table(schema, ("anyOf",), VALIDATION_KEYWORDS) is None
+
+def test_too_many_atoms_have_no_table():
+    """Tests that oversized conditionals are left to generic evaluation."""
+    schema = {"anyOf": [{"required": [f"p{i}"]} for i in range(MAX_ATOMS + 1)]}
+    assert build_table(schema, ("anyOf",), VALIDATION_KEYWORDS) is None
+    instance = {f"p{MAX_ATOMS}": 1}
+    assert compile_schema({"type": "object", **schema})(instance)
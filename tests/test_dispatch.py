@@ -0,0 +1,92 @@
+import pytest
+import jsonschema
+
+from notecard_schema import Dispatcher
+from notecard_schema.loader import request_filenames
+
+SCHEMA_FILE = "notecard.api.json"
+
+@pytest.fixture(scope='module')
+def dispatcher():
+    return Dispatcher.from_directory()
+
+def test_dispatch_table_covers_every_request_schema(dispatcher):
+    """Tests that every request schema is indexed by its API name."""
+    assert len(dispatcher.schemas) == len(request_filenames())
+    assert "card.status" in dispatcher.schemas
+
+def test_api_for(dispatcher):
+    """Tests API lookup from 'req' and 'cmd'."""
+    assert dispatcher.api_for({"req": "note.add"}) == "note.add"
+    assert dispatcher.api_for({"cmd": "hub.set"}) == "hub.set"
+    assert dispatcher.api_for({"req": "card.unknown"}) is None
+    assert dispatcher.api_for({"req": {"nested": True}}) is None
+    assert dispatcher.api_for("note.add") is None
+
+def test_dispatch_matches_oneof_semantics(schema, dispatcher, request_instances):
+    """Tests that dispatching agrees with validating against the full oneOf."""
+    schema_dict, registry = schema
+    reference = jsonschema.Draft202012Validator(schema_dict, registry=registry)
+    for instance in request_instances:
+        assert dispatcher.is_valid(instance) == reference.is_valid(instance), instance
+
+def test_invalid_empty_object(dispatcher):
+    """Tests that an empty object matches none of the request schemas."""
+    with pytest.raises(jsonschema.ValidationError) as excinfo:
+        dispatcher.validate({})
+    assert "is not valid under any of the given schemas" in str(excinfo.value)
+    assert excinfo.value.context == []
+
+def test_invalid_both_req_and_cmd(dispatcher):
+    """Tests that supplying both req and cmd matches none of the request schemas."""
+    error = next(dispatcher.iter_errors({"req": "card.status", "cmd": "card.status"}))
+    assert "is not valid under any of the given schemas" in error.message
+    assert any("is valid under each of" in suberror.message for suberror in error.context)
+
+def test_error_context_only_holds_dispatched_schema_errors(dispatcher):
+    """Tests that error context comes from the dispatched schema alone."""
+    error = next(dispatcher.iter_errors({"req": "card.status", "extra": "field"}))
+    messages = [suberror.message for suberror in error.context]
+    assert messages == ["Unevaluated properties are not allowed ('extra' was unexpected)"]
+
+def test_validate_reports_dispatched_schema_error(dispatcher):
+    """Tests that validate reports the intended API's error instead of the generic oneOf message."""
+    with pytest.raises(jsonschema.ValidationError) as excinfo:
+        dispatcher.validate({"req": "card.status", "extra": "field"})
+    assert excinfo.value.message == "Unevaluated properties are not allowed ('extra' was unexpected)"
+
+def test_validate_reports_wrong_type(dispatcher):
+    """Tests that a wrongly typed argument is reported against the intended API."""
+    with pytest.raises(jsonschema.ValidationError) as excinfo:
+        dispatcher.validate({"req": "note.add", "sync": "yes"})
+    assert excinfo.value.message == "'yes' is not of type 'boolean'"
+    assert list(excinfo.value.path) == ["sync"]
+
+def test_validate_suggests_closest_api(dispatcher):
+    """Tests that a misspelled req suggests the closest known API."""
+    with pytest.raises(jsonschema.ValidationError) as excinfo:
+        dispatcher.validate({"req": "card.stauts"})
+    assert "'card.stauts' is not a known Notecard API; did you mean 'card.status'?" in excinfo.value.message
+    assert list(excinfo.value.path) == ["req"]
+
+def test_validate_unknown_api_without_suggestion(dispatcher):
+    """Tests that an unrelated req value is reported without a suggestion."""
+    with pytest.raises(jsonschema.ValidationError) as excinfo:
+        dispatcher.validate({"cmd": "xyzzy"})
+    assert excinfo.value.message.endswith("('xyzzy' is not a known Notecard API)")
+
+def test_best_error_agrees_with_is_valid(dispatcher, request_instances):
+    """Tests that best_error returns an error exactly when the instance is invalid."""
+    for instance in request_instances:
+        assert (dispatcher.best_error(instance) is None) == dispatcher.is_valid(instance), instance
+
+def test_valid_request_has_no_errors(dispatcher):
+    """Tests that a valid request yields no errors."""
+    dispatcher.validate({"req": "card.status"})
+    assert list(dispatcher.iter_errors({"cmd": "hub.sync"})) == []
+
+def test_warm_builds_every_validator():
+    """Tests that warm builds a validator for every API up front."""
+    dispatcher = Dispatcher.from_directory()
+    assert dispatcher.warm() is dispatcher
+    assert dispatcher._validators.keys() == dispatcher.schemas.keys()
@@ -0,0 +1,124 @@
+import json
+
+import pytest
+
+from notecard_schema import Dispatcher
+from notecard_schema.incremental import IncrementalValidator
+from notecard_schema.scoping import validator_for
+from notecard_schema.stream import validate_line
+
+@pytest.fixture(scope="module")
+def dispatcher():
+    return Dispatcher.from_directory()
+
+def feed_bytes(validator, data, size=1):
+    results = []
+    for i in range(0, len(data), size):
+        results.extend(validator.feed(data[i:i + size]))
+    return results
+
+def test_unknown_api_is_rejected_before_the_newline(dispatcher):
+    """Tests that in strict mode an unknown req is rejected as soon as its value is complete."""
+    validator = IncrementalValidator(dispatcher, strict=True)
+    assert validator.feed(b'{"req":"card.sta') == []
+    assert validator.pending > 0
+    results = validator.feed(b'uts","x":')
+    assert results == [(None, False, ["$.req: 'card.stauts' is not a known Notecard API; did you mean 'card.status'?"])]
+    assert validator.pending == 0
+    # The rest of the rejected line is skipped.
+    assert validator.feed(b'"' + b'a' * 1000 + b'"}\n') == []
+    assert validator.feed(b'{"req":"card.status"}\n') == [("card.status", True, [])]
+
+def test_unevaluated_property_is_rejected_early(dispatcher):
+    """Tests that in strict mode properties ruled out by unevaluatedProperties are rejected when their key arrives."""
+    validator = IncrementalValidator(dispatcher, strict=True)
+    results = validator.feed(b'{"req":"card.status","bogus":')
+    assert results == [("card.status", False, ["$: Unevaluated properties are not allowed ('bogus' was unexpected)"])]
+
+def test_keys_before_req_are_checked_once_the_api_is_known(dispatcher):
+    """Tests that in strict mode keys seen before req are checked when the API arrives."""
+    validator = IncrementalValidator(dispatcher, strict=True)
+    assert validator.feed(b'{"bogus":{"req":"x"},') == []
+    assert validator.feed(b'"cmd":"card.status"')[0][1] is False
+
+def test_nested_keys_and_escapes_are_ignored(dispatcher):
+    """Tests that nested objects and escaped quotes do not confuse the tokenizer."""
+    validator = IncrementalValidator(dispatcher)
+    line = b'{"req":"note.add","body":{"bogus":"a\\"b,\\"c\\":1"},"file":"x\\u0079.qo"}\n'
+    assert feed_bytes(validator, line) == [("note.add", True, [])]
+
+DUPLICATE_KEY_LINES = [
+    b'{"req":"card.time","req":"card.status"}',
+    b'{"req":"card.stauts","req":"card.status"}',
+    b'{"req":"card.status","req":"card.stauts"}',
+    b'{"req":"card.status","file":"x.qo","req":"note.add"}',
+    b'{"req":"note.add","body":{"a":1,"a":2}}',
+    b'{"req":"card.status","req":"card.status"}',
+]
+
+@pytest.mark.parametrize("size", [1, 4096])
+def test_duplicate_keys_get_the_line_verdict(dispatcher, size):
+    """Tests that by default repeated keys get the same last-wins verdict as whole-line validation."""
+    results = feed_bytes(IncrementalValidator(dispatcher), b'\n'.join(DUPLICATE_KEY_LINES) + b'\n', size)
+    assert [ok for _, ok, _ in results] == [validate_line(line, dispatcher)[1] for line in DUPLICATE_KEY_LINES]
+    assert [ok for _, ok, _ in results] == [True, True, False, True, True, True]
+
+def test_requests_wait_for_the_newline_by_default(dispatcher):
+    """Tests that by default a request is not rejected by API before its newline, as a later req may replace it."""
+    validator = IncrementalValidator(dispatcher)
+    assert validator.feed(b'{"req":"card.stauts",') == []
+    assert validator.feed(b'"req":"card.status"}\n') == [("card.status", True, [])]
+
+def test_duplicate_keys_are_rejected_in_strict_mode(dispatcher):
+    """Tests that in strict mode a repeated top-level key is rejected, whichever copy an early verdict read."""
+    validator = IncrementalValidator(dispatcher, strict=True)
+    assert validator.feed(b'{"req":"card.time","req":"card.status"}\n') == [
+        ("card.time", False, ["$: Duplicate property 'req'"])]
+    assert validator.feed(b'{"req":"card.stauts","req":"card.status"}\n')[0][1] is False
+    assert validator.feed(b'{"req":"note.add","body":{"a":1,"a":2}}\n') == [("note.add", True, [])]
+
+def test_newline_after_backslash_ends_the_line(dispatcher):
+    """Tests that a backslash right before a newline does not merge two lines."""
+    validator = IncrementalValidator(dispatcher)
+    for size in (1, 4096):
+        results = feed_bytes(validator, b'{"req":"note.add","file":"a\\\n{"req":"card.time"}\n', size)
+        assert [(api, ok) for api, ok, _ in results] == [(None, False), ("card.time", True)]
+
+def test_non_object_is_rejected(dispatcher):
+    """Tests that a line not starting with an object is rejected at its first byte."""
+    validator = IncrementalValidator(dispatcher)
+    assert validator.feed(b'  [') == [(None, False, ["$: expected an object"])]
+    assert validator.feed(b'1,2]\n\n{"req":"card.time"}\n') == [("card.time", True, [])]
+
+def test_line_length_limit(dispatcher):
+    """Tests that lines over the limit are rejected without buffering them."""
+    validator = IncrementalValidator(dispatcher, max_line_length=16)
+    assert validator.feed(b'{"req":"card.status"}\n') == [(None, False, ["Line exceeds 16 bytes"])]
+
+def test_scoped_dispatcher_rejects_unsupported_arguments():
+    """Tests that in strict mode arguments a scoped validator forbids are rejected early."""
+    validator = IncrementalValidator(validator_for("8.2.1"), strict=True)
+    results = validator.feed(b'{"req":"note.add","limit":')
+    assert results == [("note.add", False, ["$.limit: Requires firmware 9.1.1 or later"])]
+
+def test_responses(dispatcher):
+    """Tests that expected responses are checked against the response schema."""
+    validator = IncrementalValidator(dispatcher)
+    validator.expect_response("card.voltage")
+    assert validator.feed(b'{"value":4.2}\n') == [("card.voltage", True, [])]
+    validator.expect_response("card.voltage")
+    assert validator.feed(b'{"err":"no voltage {io}"}\n') == [("card.voltage", True, [])]
+    validator.expect_response("card.voltage")
+    assert validator.feed(b'{"volts":') == [("card.voltage", False, ["$: Unevaluated properties are not allowed ('volts' was unexpected)"])]
+    # The expectation only covers one line.
+    assert validator.feed(b'}\n{"req":"card.time"}\n') == [("card.time", True, [])]
+
+@pytest.mark.parametrize("strict", [False, True])
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_results_agree_with_line_validation(dispatcher, size, strict, request_instances):
+    """Tests that every sample and test instance gets the same verdict as whole-line validation."""
+    lines = [json.dumps(instance).encode() for instance in request_instances]
+    results = feed_bytes(IncrementalValidator(dispatcher, strict=strict), b'\n'.join(lines) + b'\n', size)
+    assert len(results) == len(lines)
+    for line, (api, ok, _) in zip(lines, results):
+        assert ok == validate_line(line, dispatcher)[1], line
@@ -0,0 +1,94 @@
+import pytest
+
+from notecard_schema import Dispatcher
+from notecard_schema.memo import MemoizedValidator
+
+class CountingValidator:
+    """Counts how often the wrapped validator actually runs."""
+    def __init__(self):
+        self.calls = 0
+
+    def is_valid(self, instance):
+        self.calls += 1
+        return isinstance(instance, dict) and instance.get("req") == "card.status"
+
+    def explain(self, instance):
+        return "explained"
+
+def test_identical_instances_are_validated_once():
+    """Tests that repeated identical instances hit the memo."""
+    inner = CountingValidator()
+    memo = MemoizedValidator(inner)
+    assert memo.is_valid({"req": "card.status"})
+    assert memo.is_valid({"req": "card.status"})
+    assert not memo.is_valid({"req": "card.time"})
+    assert not memo.is_valid({"req": "card.time"})
+    assert inner.calls == 2
+    assert memo.stats() == {"hits": 2, "misses": 2, "evictions": 0, "size": 2, "maxsize": 1024}
+
+def test_key_is_canonical():
+    """Tests that key order and whitespace do not affect the memo key."""
+    assert MemoizedValidator.key({"a": 1, "b": [1, 2]}) == MemoizedValidator.key({"b": [1, 2], "a": 1})
+    assert MemoizedValidator.key({"a": 1}) != MemoizedValidator.key({"a": True})
+
+def test_raw_bytes_are_used_when_available():
+    """Tests that raw transaction bytes key the memo and are decoded on a miss."""
+    inner = CountingValidator()
+    memo = MemoizedValidator(inner)
+    raw = b'{"req":"card.status"}'
+    assert memo.is_valid(raw=raw)
+    assert memo.is_valid(raw=raw)
+    assert not memo.is_valid(raw=b'{"req":')
+    assert inner.calls == 2
+
+def test_lru_eviction():
+    """Tests that the least recently used entry is evicted at capacity."""
+    inner = CountingValidator()
+    memo = MemoizedValidator(inner, maxsize=2)
+    memo.is_valid({"req": "a"})
+    memo.is_valid({"req": "b"})
+    memo.is_valid({"req": "a"})
+    memo.is_valid({"req": "c"})
+    assert memo.stats()["evictions"] == 1
+    memo.is_valid({"req": "a"})
+    memo.is_valid({"req": "b"})
+    assert memo.hits == 2
+    assert memo.stats()["size"] == 2
+
+def test_unserializable_instance_is_not_memoized():
+    """Tests that instances without a JSON form bypass the memo."""
+    inner = CountingValidator()
+    memo = MemoizedValidator(inner)
+    assert not memo.is_valid({"req": {1, 2}})
+    assert not memo.is_valid({"req": {1, 2}})
+    assert inner.calls == 2
+    assert memo.stats()["size"] == 0
+
+def test_non_json_types_are_not_memoized():
+    """Tests that non-string keys and tuples bypass the memo instead of colliding with their JSON form."""
+    for instance in ({1: "a"}, {"req": {None: 1}}, {"req": (1, 2)}, [{2.5: True}]):
+        assert MemoizedValidator.key(instance) is None, instance
+    inner = CountingValidator()
+    memo = MemoizedValidator(inner)
+    memo.is_valid({"1": "a"})
+    memo.is_valid({1: "a"})
+    memo.is_valid({1: "a"})
+    assert inner.calls == 3
+    assert memo.stats()["size"] == 1
+
+def test_other_methods_are_delegated():
+    """Tests that methods other than is_valid reach the wrapped validator."""
+    assert MemoizedValidator(CountingValidator()).explain({}) == "explained"
+
+def test_wraps_dispatcher():
+    """Tests memoizing the notecard.api.json dispatcher."""
+    memo = MemoizedValidator(Dispatcher.from_directory(), maxsize=16)
+    assert memo.is_valid({"req": "card.status"})
+    assert not memo.is_valid({"req": "card.status", "extra": 1})
+    assert memo.is_valid({"req": "card.status"})
+    assert memo.hits == 1
+
+def test_invalid_maxsize():
+    """Tests that the memo must have room for at least one entry."""
+    with pytest.raises(ValueError):
+        MemoizedValidator(CountingValidator(), maxsize=0)
@@ -0,0 +1,86 @@
+import threading
+
+import pytest
+from jsonschema.exceptions import ValidationError
+
+from notecard_schema import Dispatcher
+from notecard_schema.metrics import BUCKET_BOUNDS_NS, Histogram, ValidationMetrics, instrument
+
+@pytest.fixture(scope="module")
+def dispatcher():
+    return Dispatcher.from_directory()
+
+def test_api_timings(dispatcher):
+    """Tests that is_valid calls are counted per API."""
+    instrumented = instrument(dispatcher)
+    assert instrumented.is_valid({"req": "card.status"})
+    assert instrumented.is_valid({"cmd": "card.status"})
+    assert not instrumented.is_valid({"req": "hub.set", "mode": "sometimes"})
+    assert not instrumented.is_valid({"req": "card.stauts"})
+    snapshot = instrumented.metrics.snapshot()
+    assert {name: stats["count"] for name, stats in snapshot["apis"].items()} == {
+        "card.status": 2, "hub.set": 1, "unknown": 1,
+    }
+    assert snapshot["apis"]["card.status"]["sum_seconds"] > 0
+    # The compiled fast path evaluates no keywords.
+    assert snapshot["keywords"] == {}
+
+def test_keyword_timings(dispatcher):
+    """Tests that error reporting, and is_valid in keyword mode, time jsonschema keywords."""
+    instrumented = instrument(dispatcher)
+    with pytest.raises(ValidationError):
+        instrumented.validate({"req": "hub.set", "mode": "sometimes"})
+    assert "enum" in instrumented.metrics.keywords
+
+    instrumented = instrument(dispatcher, keywords=True)
+    assert instrumented.is_valid({"req": "hub.set", "mode": "periodic"})
+    keywords = instrumented.metrics.keywords
+    assert keywords["oneOf"].count >= 1
+    assert keywords["unevaluatedProperties"].count == 1
+    assert keywords["enum"].count >= 1
+
+def test_keyword_time_is_exclusive(dispatcher):
+    """Tests that applicators are not charged for the keywords nested in them."""
+    metrics = ValidationMetrics()
+    validator = metrics.jsonschema_class({"properties": {"a": {"type": "string"}}})
+    assert validator.is_valid({"a": "x"})
+    keywords = metrics.keywords
+    assert keywords["properties"].count == keywords["type"].count == 1
+    assert metrics._tables.stack == []
+
+def test_threads_are_merged(dispatcher):
+    """Tests that observations from several threads are all counted."""
+    instrumented = instrument(dispatcher)
+    def work():
+        for _ in range(500):
+            instrumented.is_valid({"req": "card.time"})
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert instrumented.metrics.apis["card.time"].count == 2000
+    instrumented.metrics.reset()
+    assert instrumented.metrics.apis == {}
+
+def test_percentiles():
+    """Tests bucketed percentile estimates."""
+    histogram = Histogram()
+    for elapsed in [500] * 90 + [3000] * 9 + [BUCKET_BOUNDS_NS[-1] * 2]:
+        histogram.observe(elapsed)
+    assert histogram.percentile(0.5) <= 1e-6
+    assert 2e-6 <= histogram.percentile(0.95) <= 4e-6
+    assert histogram.percentile(1.0) == BUCKET_BOUNDS_NS[-1] * 2 / 1e9
+    assert Histogram().percentile(0.5) == 0.0
+
+def test_prometheus_output(dispatcher, tmp_path):
+    """Tests the Prometheus text format written to a file."""
+    instrumented = instrument(dispatcher)
+    instrumented.is_valid({"req": "card.status"})
+    path = tmp_path / "notecard_schema.prom"
+    instrumented.metrics.write_prometheus(str(path))
+    text = path.read_text()
+    assert "# TYPE notecard_schema_validation_seconds histogram" in text
+    assert 'notecard_schema_validation_seconds_bucket{api="card.status",le="+Inf"} 1' in text
+    assert 'notecard_schema_validation_seconds_count{api="card.status"} 1' in text
+    assert list(tmp_path.iterdir()) == [path]
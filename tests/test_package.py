@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import notecard_schema
+from notecard_schema import get_request_schema, get_response_schema, get_validator
+from notecard_schema.loader import SCHEMA_DIR, load_schema
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def test_get_request_schema():
+    """Tests that a request schema is loaded once and then shared."""
+    schema = get_request_schema("note.add")
+    assert schema == load_schema("note.add.req.notecard.api.json")
+    assert get_request_schema("note.add") is schema
+
+def test_get_response_schema():
+    """Tests that a response schema is loaded by API name."""
+    assert get_response_schema("card.time") == load_schema("card.time.rsp.notecard.api.json")
+
+@pytest.mark.parametrize("api", ["card.unknown", "../notecard", "note.add.req", ""])
+def test_unknown_api_raises_key_error(api):
+    """Tests that unknown or malformed API names raise KeyError."""
+    with pytest.raises(KeyError):
+        get_request_schema(api)
+    with pytest.raises(KeyError):
+        get_response_schema(api)
+
+def test_get_validator():
+    """Tests that the validator for an API is built once and validates its requests."""
+    validator = get_validator("note.add")
+    assert validator is get_validator("note.add")
+    assert validator.is_valid({"req": "note.add", "body": {"temp": 21.5}})
+    assert not validator.is_valid({"req": "note.add", "unexpected": True})
+    assert validator.schema is get_request_schema("note.add")
+
+def test_lazy_exports():
+    """Tests that the public names resolve and unknown names raise AttributeError."""
+    assert set(notecard_schema.__all__) <= set(dir(notecard_schema))
+    for name in notecard_schema.__all__:
+        assert getattr(notecard_schema, name) is not None
+    with pytest.raises(AttributeError):
+        notecard_schema.not_a_name
+
+def test_import_is_lazy():
+    """Tests that importing the package reads no schema and does not import jsonschema."""
+    code = (
+        "import builtins, sys\n"
+        "opened = []\n"
+        "real_open = builtins.open\n"
+        "builtins.open = lambda path, *a, **k: (opened.append(str(path)), real_open(path, *a, **k))[1]\n"
+        "import notecard_schema\n"
+        "assert 'jsonschema' not in sys.modules, 'jsonschema imported'\n"
+        "notecard_schema.get_request_schema('card.time')\n"
+        "schemas = [path for path in opened if path.endswith('.json')]\n"
+        "assert len(schemas) == 1 and schemas[0].endswith('card.time.req.notecard.api.json'), schemas\n"
+    )
+    subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
+
+def test_schema_dir_is_the_checkout_without_packaged_data():
+    """Tests that a source checkout loads the schemas from the repository root."""
+    if os.path.isdir(os.path.join(os.path.dirname(notecard_schema.__file__), "schemas")):
+        pytest.skip("running against an installed package")
+    assert SCHEMA_DIR == PROJECT_ROOT
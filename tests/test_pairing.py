@@ -0,0 +1,151 @@
+import io
+import json
+import os
+
+import pytest
+
+from notecard_schema import Dispatcher
+from notecard_schema.cache import SCHEMA_KEY_PREFIX, ValidatorCache
+from notecard_schema.loader import api_name, load_schema, request_filenames, response_filename
+from notecard_schema.pairing import PairingValidator, connection_key, validate_transcript
+from notecard_schema.stream import check_request
+
+@pytest.fixture(scope="module")
+def dispatcher():
+    return Dispatcher.from_directory()
+
+@pytest.fixture
+def pairing(dispatcher):
+    return PairingValidator(dispatcher)
+
+def response_samples():
+    for filename in request_filenames():
+        api = api_name(filename)
+        for sample in load_schema(response_filename(api)).get("samples", []):
+            response = json.loads(sample["json"])
+            for message in response if isinstance(response, list) else [response]:
+                yield api, message
+
+@pytest.mark.parametrize("api,response", list(response_samples()))
+def test_response_samples_pair_with_their_request(pairing, api, response):
+    """Tests that every response sample validates as the answer to its API's request."""
+    pairing.feed("conn", {"req": api})
+    assert pairing.feed("conn", response)[0] == ("conn", "rsp", api, True, [])
+    assert pairing.finish() == []
+
+def test_invalid_response_is_reported(pairing):
+    """Tests that a response is checked against the request's response schema."""
+    pairing.feed(1, {"req": "card.time"})
+    conn, direction, api, ok, errors = pairing.feed(1, {"time": "noon"})[0]
+    assert (conn, direction, api, ok) == (1, "rsp", "card.time", False)
+    assert errors[0].startswith("$.time:")
+
+def test_error_responses_are_accepted(pairing):
+    """Tests that firmware error responses are not held to the success schema."""
+    pairing.feed(1, {"req": "card.time"})
+    assert pairing.feed(1, {"err": "time is not yet set {no-time}"}) == [(1, "rsp", "card.time", True, [])]
+    pairing.feed(1, {"req": "card.time"})
+    assert not pairing.feed(1, {"err": 5})[0][3]
+
+def test_cmd_expects_no_response(pairing):
+    """Tests that cmd transactions leave no outstanding request."""
+    assert pairing.feed(1, {"cmd": "hub.sync"}) == [(1, "req", "hub.sync", True, [])]
+    assert pairing.feed(1, {}) == [(1, "rsp", None, False, ["Response without an outstanding request"])]
+
+def test_unanswered_requests(pairing):
+    """Tests that superseded and unanswered requests are reported."""
+    pairing.feed(1, {"req": "card.time"})
+    results = pairing.feed(1, {"req": "card.status"})
+    assert results[0] == (1, "req", "card.time", False, ["No response to card.time request"])
+    assert results[1][3]
+    assert pairing.finish() == [(1, "req", "card.status", False, ["No response to card.status request"])]
+
+def test_interleaved_connections(pairing):
+    """Tests that responses are paired per connection."""
+    records = [
+        ("a", {"req": "card.time"}),
+        ("b", {"req": "card.voltage"}),
+        ("b", {"value": 4.2}),
+        ("a", {"time": 1700000000, "zone": "UTC,Etc/UTC"}),
+    ]
+    results = list(pairing.validate(records))
+    assert [(conn, direction, api, ok) for conn, direction, api, ok, _ in results] == [
+        ("a", "req", "card.time", True),
+        ("b", "req", "card.voltage", True),
+        ("b", "rsp", "card.voltage", True),
+        ("a", "rsp", "card.time", True),
+    ]
+
+def test_validate_transcript(dispatcher):
+    """Tests the JSONL transcript helper."""
+    transcript = io.BytesIO(
+        b'{"conn":"a","message":{"req":"card.time"}}\n'
+        b'garbage\n'
+        b'{"conn":"a","message":{"time":1700000000,"zone":"UTC,Etc/UTC"}}\n'
+        b'{"message":{"req":"card.status"}}\n'
+    )
+    results = list(validate_transcript(transcript, PairingValidator(dispatcher)))
+    assert [(line_no, result[1], result[3]) for line_no, result in results] == [
+        (1, "req", True),
+        (2, None, False),
+        (3, "rsp", True),
+        (4, "req", True),
+        (None, "req", False),
+    ]
+
+def test_transcript_conn_may_be_any_json_value(dispatcher):
+    """Tests that object and array conn values pair by value, whatever their key order."""
+    transcript = io.BytesIO(
+        b'{"conn":{"host":"a","port":1},"message":{"req":"card.time"}}\n'
+        b'{"conn":["b",2],"message":{"req":"card.voltage"}}\n'
+        b'{"conn":{"port":1,"host":"a"},"message":{"time":1700000000,"zone":"UTC,Etc/UTC"}}\n'
+        b'{"conn":["b",2],"message":{"value":4.2}}\n'
+        b'{"conn":"[\\"b\\",2]","message":{}}\n'
+    )
+    results = [result for _, result in validate_transcript(transcript, PairingValidator(dispatcher))]
+    assert [(direction, api, ok) for _, direction, api, ok, _ in results] == [
+        ("req", "card.time", True),
+        ("req", "card.voltage", True),
+        ("rsp", "card.time", True),
+        ("rsp", "card.voltage", True),
+        ("rsp", None, False),
+    ]
+    assert connection_key({"host": "a", "port": 1}) == connection_key({"port": 1, "host": "a"})
+    assert connection_key({"a": [1]}) != connection_key([["a", [1]]])
+
+def test_scalar_conn_values_of_different_types_are_distinct(dispatcher):
+    """Tests that conn 1 and conn true are separate connections, although 1 == True in Python."""
+    transcript = io.BytesIO(
+        b'{"conn":1,"message":{"req":"card.time"}}\n'
+        b'{"conn":true,"message":{"req":"card.voltage"}}\n'
+        b'{"conn":1,"message":{"time":1700000000,"zone":"UTC,Etc/UTC"}}\n'
+        b'{"conn":true,"message":{"value":4.2}}\n'
+    )
+    results = [result for _, result in validate_transcript(transcript, PairingValidator(dispatcher))]
+    assert [(direction, api, ok) for _, direction, api, ok, _ in results] == [
+        ("req", "card.time", True),
+        ("req", "card.voltage", True),
+        ("rsp", "card.time", True),
+        ("rsp", "card.voltage", True),
+    ]
+    assert len({connection_key(conn) for conn in (1, 1.0, True, "1", [1], None)}) == 6
+
+def test_response_to_unknown_api_is_an_error(pairing):
+    """Tests that a response answering a request for an unknown API is reported invalid."""
+    assert not pairing.feed("conn", {"req": "no.such.api"})[0][3]
+    assert pairing.feed("conn", {"value": 1}) == [
+        ("conn", "rsp", None, False, ["Response to a request for an unknown API"])]
+
+def test_response_validators_use_the_dispatcher_cache(tmp_path):
+    """Tests that response validators are compiled through the dispatcher's on-disk cache."""
+    cache = ValidatorCache(str(tmp_path))
+    pairing = PairingValidator(Dispatcher.from_directory(cache=cache))
+    pairing.response_validator("card.time")
+    assert any(name.startswith(SCHEMA_KEY_PREFIX) for name in os.listdir(tmp_path))
+
+def test_request_errors_match_stream(pairing, dispatcher):
+    """Tests that requests are checked with the same errors as the line stream."""
+    for message in ({"req": "card.time", "bogus": 1}, {"req": "no.such.api"}, {"req": "card.time"}):
+        api, ok, errors = check_request(dispatcher, message)
+        assert pairing.feed("conn", message)[0] == ("conn", "req", api, ok, errors)
+        pairing.finish()
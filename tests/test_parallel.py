@@ -0,0 +1,45 @@
+import io
+import mmap
+
+import pytest
+
+from notecard_schema.parallel import shard_ranges, validate_file
+from notecard_schema.stream import validate_stream
+
+LINES = [
+    b'{"req":"card.status"}',
+    b'',
+    b'{"req":"hub.set","mode":"sometimes"}',
+    b'{"req":"card.stauts"}',
+    b'not json',
+    b'{"cmd":"note.add","body":{"temp":21.5}}',
+    b'{"req":"card.time","x":"' + b'a' * 200 + b'"}',
+]
+
+@pytest.fixture
+def transcript(tmp_path):
+    path = tmp_path / "transcript.jsonl"
+    path.write_bytes(b'\n'.join(LINES * 20) + b'\n{"req":"card.version"}')
+    return path
+
+def test_shards_end_on_newlines(transcript):
+    """Tests that shards cover the file exactly and split only after newlines."""
+    with open(transcript, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        ranges = list(shard_ranges(mm, 100))
+        assert ranges[0][0] == 0 and ranges[-1][1] == len(mm)
+        for (_, end), (start, _) in zip(ranges, ranges[1:]):
+            assert end == start
+            assert mm[end - 1:end] == b'\n'
+
+@pytest.mark.parametrize("jobs,shard_size", [(1, 100), (2, 100), (2, 1), (3, 1 << 20)])
+def test_parallel_results_match_serial(transcript, jobs, shard_size):
+    """Tests that sharded validation returns the serial results in line order."""
+    with open(transcript, 'rb') as f:
+        expected = list(validate_stream(f, max_line_length=128))
+    assert list(validate_file(str(transcript), jobs=jobs, shard_size=shard_size, max_line_length=128)) == expected
+
+def test_empty_file(tmp_path):
+    """Tests that an empty transcript yields no results."""
+    path = tmp_path / "empty.jsonl"
+    path.write_bytes(b'')
+    assert list(validate_file(str(path), jobs=2)) == []
@@ -0,0 +1,87 @@
+import json
+import os
+import shutil
+import urllib.request
+
+import jsonschema
+import pytest
+from referencing.exceptions import NoSuchResource, Unresolvable
+
+from notecard_schema import Dispatcher
+from notecard_schema.loader import INDEX_FILE, SCHEMA_DIR, load_schema
+from notecard_schema.registry import LocalRetriever, offline_registry
+
+BASE_URL = "https://raw.githubusercontent.com/blues/notecard-schema"
+
+def released_index(tag):
+    """Returns notecard.api.json as the release workflow rewrites it for a tag."""
+    text = json.dumps(load_schema(INDEX_FILE))
+    return json.loads(text.replace(f"{BASE_URL}/master/", f"{BASE_URL}/refs/tags/{tag}/"))
+
+@pytest.fixture
+def no_network(monkeypatch):
+    def urlopen(*args, **kwargs):
+        raise AssertionError("the network must not be used")
+    monkeypatch.setattr(urllib.request, "urlopen", urlopen)
+
+@pytest.mark.parametrize("uri", [
+    f"{BASE_URL}/master/card.time.req.notecard.api.json",
+    f"{BASE_URL}/main/card.time.req.notecard.api.json",
+    f"{BASE_URL}/refs/heads/master/card.time.req.notecard.api.json",
+    f"{BASE_URL}/refs/tags/v1.1.2/card.time.req.notecard.api.json",
+    f"{BASE_URL}/v1.1.2/card.time.req.notecard.api.json",
+])
+def test_notecard_schema_urls_map_to_the_schema_directory(uri):
+    """Tests that master, branch and tag URLs of this repository map to the schema directory."""
+    assert LocalRetriever().local_path(uri) == os.path.join(SCHEMA_DIR, "card.time.req.notecard.api.json")
+
+@pytest.mark.parametrize("uri", [
+    "https://example.com/card.time.req.notecard.api.json",
+    "https://raw.githubusercontent.com/blues/other/master/card.time.req.notecard.api.json",
+    f"{BASE_URL}/master/docs/card.time.req.notecard.api.json",
+    f"{BASE_URL}/master/README.md",
+])
+def test_other_urls_are_not_retrieved(uri):
+    """Tests that URLs outside the schema directory of this repository raise NoSuchResource."""
+    retriever = LocalRetriever()
+    assert retriever.local_path(uri) is None
+    with pytest.raises(NoSuchResource):
+        retriever(uri)
+
+def test_tagged_urls_use_the_version_directory(tmp_path):
+    """Tests that a tag with its own directory is served from it, and other tags fall back."""
+    tagged = tmp_path / "v1.0.0"
+    tagged.mkdir()
+    shutil.copy(os.path.join(SCHEMA_DIR, "card.time.req.notecard.api.json"), tagged)
+    retriever = LocalRetriever(versions_dir=str(tmp_path))
+    assert retriever.local_path(f"{BASE_URL}/refs/tags/v1.0.0/card.time.req.notecard.api.json") == \
+        str(tagged / "card.time.req.notecard.api.json")
+    assert retriever.local_path(f"{BASE_URL}/refs/tags/v2.0.0/card.time.req.notecard.api.json") == \
+        os.path.join(SCHEMA_DIR, "card.time.req.notecard.api.json")
+    assert retriever.local_path(f"{BASE_URL}/master/card.time.req.notecard.api.json") == \
+        os.path.join(SCHEMA_DIR, "card.time.req.notecard.api.json")
+
+def test_resources_are_cached(tmp_path):
+    """Tests that a file is read once, however many URLs and validators refer to it."""
+    shutil.copy(os.path.join(SCHEMA_DIR, "card.time.req.notecard.api.json"), tmp_path)
+    retriever = LocalRetriever(str(tmp_path))
+    first = retriever(f"{BASE_URL}/master/card.time.req.notecard.api.json")
+    os.remove(tmp_path / "card.time.req.notecard.api.json")
+    assert retriever(f"{BASE_URL}/refs/tags/v1.1.2/card.time.req.notecard.api.json") is first
+    with pytest.raises(NoSuchResource):
+        retriever(f"{BASE_URL}/master/card.status.req.notecard.api.json")
+
+@pytest.mark.parametrize("tag", ["master", "v1.1.2"])
+def test_released_index_validates_offline(no_network, tag, request_instances):
+    """Tests that notecard.api.json, as shipped or as released, validates like the dispatcher without fetching."""
+    index = load_schema(INDEX_FILE) if tag == "master" else released_index(tag)
+    validator = jsonschema.Draft202012Validator(index, registry=offline_registry())
+    dispatcher = Dispatcher.from_directory()
+    for instance in request_instances[::20]:
+        assert validator.is_valid(instance) == dispatcher.is_valid(instance), instance
+
+def test_unknown_reference_is_unresolvable(no_network):
+    """Tests that a reference to another site fails to resolve instead of being fetched."""
+    validator = jsonschema.Draft202012Validator({"$ref": "https://example.com/other.json"}, registry=offline_registry())
+    with pytest.raises(Unresolvable):
+        validator.is_valid({})
@@ -0,0 +1,174 @@
+import json
+import os
+
+import jsonschema
+import pytest
+
+from notecard_schema import Dispatcher
+from notecard_schema.bundle import write_bundle
+from notecard_schema.loader import load_schema
+from notecard_schema.runtime import (
+    VALIDATION_KEYWORDS,
+    deep_size,
+    memory_report,
+    schema_files,
+    strip_schema,
+    verify_runtime_schema,
+    write_runtime_schemas,
+)
+from notecard_schema.scoping import SKUS, validator_for
+from notecard_schema.validator import SchemaValidator
+
+@pytest.fixture(scope="module")
+def runtime_dir(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("runtime")
+    write_runtime_schemas(str(directory))
+    return str(directory)
+
+def iter_keywords(schema):
+    """Yields every keyword used at a schema position, skipping property names."""
+    if isinstance(schema, dict):
+        for key, value in schema.items():
+            yield key
+            if key in ("properties", "patternProperties", "$defs", "dependentSchemas"):
+                for subschema in value.values():
+                    yield from iter_keywords(subschema)
+            elif key in ("allOf", "anyOf", "oneOf", "prefixItems"):
+                for subschema in value:
+                    yield from iter_keywords(subschema)
+            elif key != "sub-descriptions":
+                yield from iter_keywords(value)
+
+def error_summary(validator, instance):
+    return sorted((tuple(error.absolute_path), error.validator) for error in validator.iter_errors(instance))
+
+def test_documentation_is_dropped(runtime_dir):
+    """Tests that only validation and scoping keywords remain in the runtime schemas."""
+    allowed = VALIDATION_KEYWORDS | {"minApiVersion", "skus", "sub-descriptions"}
+    for filename in schema_files():
+        with open(os.path.join(runtime_dir, filename)) as f:
+            schema = json.load(f)
+        assert set(iter_keywords(schema)) <= allowed, filename
+    attn = load_schema("card.attn.req.notecard.api.json")
+    stripped = strip_schema(attn)
+    assert "samples" in attn and "samples" not in stripped
+    assert set(stripped["properties"]) == set(attn["properties"])
+    assert stripped["properties"]["off"] == {"type": "boolean", "minApiVersion": "7.2.1"}
+
+def test_scoped_sub_descriptions_are_kept():
+    """Tests that sub-descriptions keep only the const and scope of entries that have one."""
+    schema = {"enum": ["a", "b"], "sub-descriptions": [
+        {"const": "a", "description": "A."},
+        {"const": "b", "description": "B.", "minApiVersion": "9.1.1", "skus": ["WIFI"]},
+    ]}
+    assert strip_schema(schema) == {"enum": ["a", "b"], "sub-descriptions": [
+        {"const": "b", "minApiVersion": "9.1.1", "skus": ["WIFI"]},
+    ]}
+    del schema["sub-descriptions"][1]["minApiVersion"], schema["sub-descriptions"][1]["skus"]
+    assert strip_schema(schema) == {"enum": ["a", "b"]}
+
+def test_strings_are_interned():
+    """Tests that equal strings in different runtime schemas are the same object."""
+    first = strip_schema(load_schema("card.attn.req.notecard.api.json"))
+    second = strip_schema(load_schema("card.aux.req.notecard.api.json"))
+    first_key = next(key for key in first if key == "properties")
+    second_key = next(key for key in second if key == "properties")
+    assert first_key is second_key
+    assert first["$schema"] is second["$schema"]
+
+def test_runtime_schemas_validate_like_full_schemas(runtime_dir, schema_instances):
+    """Tests that each runtime schema gives the same result and errors on valid and invalid variants of every sample."""
+    checked = 0
+    for filename in schema_files():
+        if not filename.endswith(".notecard.api.json") or filename == "notecard.api.json":
+            continue
+        schema = load_schema(filename)
+        runtime = load_schema(filename, runtime_dir)
+        full_validator = jsonschema.Draft202012Validator(schema)
+        runtime_validator = jsonschema.Draft202012Validator(runtime)
+        compiled = SchemaValidator(runtime)
+        for instance in schema_instances[filename]:
+            expected = full_validator.is_valid(instance)
+            assert runtime_validator.is_valid(instance) == expected, (filename, instance)
+            assert compiled.is_valid(instance) == expected, (filename, instance)
+            assert error_summary(runtime_validator, instance) == error_summary(full_validator, instance)
+            checked += 1
+    assert checked > 1000
+
+@pytest.mark.parametrize("load", [
+    lambda runtime_dir: Dispatcher.from_directory(runtime_dir),
+    lambda runtime_dir: Dispatcher.from_directory(runtime=True),
+], ids=["written", "stripped on load"])
+def test_runtime_dispatcher_matches_full_dispatcher(runtime_dir, load, request_instances):
+    """Tests that dispatching against the runtime profile reports the same results and best errors."""
+    full = Dispatcher.from_directory()
+    runtime = load(runtime_dir)
+    for instance in request_instances:
+        assert runtime.is_valid(instance) == full.is_valid(instance), instance
+        full_error, runtime_error = full.best_error(instance), runtime.best_error(instance)
+        if full_error is None:
+            assert runtime_error is None
+        else:
+            assert (runtime_error.path, runtime_error.validator) == (full_error.path, full_error.validator)
+
+def test_runtime_bundle_matches_full_dispatcher(tmp_path, request_instances):
+    """Tests that a dispatcher stripped from the bundle validates like the full one."""
+    path = str(tmp_path / "bundle.json")
+    write_bundle(path)
+    full = Dispatcher.from_directory()
+    runtime = Dispatcher.from_bundle(path, runtime=True)
+    assert "samples" not in runtime.schemas["card.attn"]
+    for instance in request_instances:
+        assert runtime.is_valid(instance) == full.is_valid(instance), instance
+
+@pytest.mark.parametrize("api_version, sku", [("3.2.1", None), ("7.2.1", None), (None, "LORA"), ("8.1.3", "WIFI")]
+                         + [(None, sku) for sku in SKUS])
+def test_scoped_runtime_validators_match(runtime_dir, api_version, sku, request_instances):
+    """Tests that version and SKU scoping still works on the runtime profile."""
+    full = validator_for(api_version, sku)
+    runtime = validator_for(api_version, sku, schema_dir=runtime_dir)
+    assert set(runtime.schemas) == set(full.schemas)
+    for instance in request_instances:
+        assert runtime.is_valid(instance) == full.is_valid(instance), instance
+
+def test_verify_rejects_a_profile_that_changes_results():
+    """Tests that the build-time check catches a stripped schema that validates differently."""
+    schema = load_schema("card.attn.req.notecard.api.json")
+    runtime = strip_schema(schema)
+    del runtime["unevaluatedProperties"]
+    runtime["properties"]["seconds"] = {"type": "string"}
+    with pytest.raises(ValueError, match="card.attn"):
+        verify_runtime_schema(schema, runtime)
+
+def test_verify_rejects_a_dropped_keyword_the_samples_miss():
+    """Tests that the build-time check catches a validation keyword the samples never exercise."""
+    schema = load_schema("card.attn.req.notecard.api.json")
+    runtime = strip_schema(schema)
+    del runtime["properties"]["seconds"]["type"]
+    with pytest.raises(ValueError, match="/properties/seconds/type"):
+        verify_runtime_schema(schema, runtime)
+    runtime = strip_schema(schema)
+    runtime["properties"]["seconds"]["maximum"] = 10 ** 9
+    with pytest.raises(ValueError, match="/properties/seconds/maximum"):
+        verify_runtime_schema(schema, runtime)
+
+def test_verify_treats_property_names_as_names():
+    """Tests that properties named like documentation keywords are kept and pass the check."""
+    schema = {"type": "object", "description": "Notes.", "properties": {
+        "title": {"type": "string", "description": "Title."},
+        "samples": {"type": "integer"},
+    }, "unevaluatedProperties": False}
+    runtime = strip_schema(schema)
+    assert runtime == {"type": "object", "properties": {"title": {"type": "string"}, "samples": {"type": "integer"}},
+                       "unevaluatedProperties": False}
+    verify_runtime_schema(schema, runtime)
+    del runtime["properties"]["title"]
+    with pytest.raises(ValueError, match="/properties"):
+        verify_runtime_schema(schema, runtime)
+
+def test_memory_is_saved():
+    """Tests that the runtime profile holds much less memory than the full schemas."""
+    full = {filename: load_schema(filename) for filename in schema_files()}
+    runtime = {filename: strip_schema(schema) for filename, schema in full.items()}
+    assert deep_size(runtime) < deep_size(full) / 2
+    assert "Saved per worker" in memory_report()
@@ -0,0 +1,97 @@
+import pytest
+import jsonschema
+
+from notecard_schema.scoping import parse_version, restrict_schema, introduced_by, validator_for
+
+@pytest.mark.parametrize("version, expected", [
+    ("8.2.1", (8, 2, 1)),
+    ("v9.1", (9, 1, 0)),
+    ("8", (8, 0, 0)),
+])
+def test_parse_version(version, expected):
+    """Tests version normalization."""
+    assert parse_version(version) == expected
+
+def test_parse_invalid_version():
+    """Tests that malformed versions are rejected."""
+    with pytest.raises(ValueError):
+        parse_version("latest")
+
+def test_newer_property_is_rejected():
+    """Tests that note.add limit (9.1.1) is rejected when targeting 8.x firmware."""
+    instance = {"req": "note.add", "file": "data.qo", "limit": True}
+    assert validator_for().is_valid(instance)
+    assert validator_for("9.1.1").is_valid(instance)
+    assert not validator_for("8.2.1").is_valid(instance)
+    assert validator_for("8.2.1").is_valid({"req": "note.add", "file": "data.qo", "max": 10})
+    assert not validator_for("8.1.0").is_valid({"req": "note.add", "file": "data.qo", "max": 10})
+
+def test_newer_property_error_names_the_property():
+    """Tests that rejecting a newer property reports its location."""
+    with pytest.raises(jsonschema.ValidationError) as excinfo:
+        validator_for("8.2.1").validate({"req": "note.add", "limit": True})
+    assert list(excinfo.value.path) == ["limit"]
+    assert "Requires firmware 9.1.1 or later" in excinfo.value.message
+
+def test_newer_api_is_unknown():
+    """Tests that APIs introduced after the target version are not dispatched."""
+    assert validator_for("9.1.1").is_valid({"req": "card.illumination"})
+    assert not validator_for("8.2.1").is_valid({"req": "card.illumination"})
+    assert validator_for("8.2.1").api_for({"req": "card.illumination"}) is None
+
+def test_newer_enum_value_is_rejected():
+    """Tests that card.aux rgb mode (9.3.1) is rejected for older firmware."""
+    assert validator_for("9.3.1").is_valid({"req": "card.aux", "mode": "rgb"})
+    assert not validator_for("9.1.1").is_valid({"req": "card.aux", "mode": "rgb"})
+    assert validator_for("9.1.1").is_valid({"req": "card.aux", "mode": "neo"})
+
+def test_variants_are_cached_by_normalized_version():
+    """Tests that equivalent version strings share one variant."""
+    assert validator_for("8.2") is validator_for("8.2.0")
+    assert validator_for("v8.2.0") is validator_for("8.2")
+    assert validator_for("8.2") is not validator_for("8.3")
+
+def test_restrict_schema_leaves_original_untouched():
+    """Tests that restricting a schema copies rather than mutates it."""
+    schema = {"properties": {"a": {"minApiVersion": "9.0.0"}, "b": {"type": "string"}}}
+    restricted = restrict_schema(schema, introduced_by((8, 0, 0)), lambda node: "too new")
+    assert restricted["properties"] == {"a": {"not": {"description": "too new"}}, "b": {"type": "string"}}
+    assert schema["properties"]["a"] == {"minApiVersion": "9.0.0"}
+
+def test_api_unsupported_on_sku_is_unknown():
+    """Tests that card.wifi is not dispatched for cellular-only or LoRa Notecards."""
+    instance = {"req": "card.wifi", "ssid": "net", "password": "secret"}
+    assert validator_for(sku="WIFI").is_valid(instance)
+    assert not validator_for(sku="CELL").is_valid(instance)
+    assert not validator_for(sku="LORA").is_valid(instance)
+
+def test_argument_unsupported_on_sku_is_rejected():
+    """Tests that hub.set details, a LoRa-only argument, is rejected on other SKUs."""
+    instance = {"req": "hub.set", "details": "-"}
+    assert validator_for(sku="LORA").is_valid(instance)
+    with pytest.raises(jsonschema.ValidationError) as excinfo:
+        validator_for(sku="CELL").validate(instance)
+    assert list(excinfo.value.path) == ["details"]
+    assert "Not supported on CELL Notecards" in excinfo.value.message
+
+def test_enum_value_unsupported_on_sku_is_rejected():
+    """Tests that card.transport cell method is rejected on WiFi-only Notecards."""
+    assert validator_for(sku="CELL").is_valid({"req": "card.transport", "method": "cell"})
+    assert not validator_for(sku="WIFI").is_valid({"req": "card.transport", "method": "cell"})
+    assert validator_for(sku="WIFI").is_valid({"req": "card.transport", "method": "wifi"})
+
+def test_sku_variants_are_built_once():
+    """Tests that SKU variants are shared between lookups."""
+    assert validator_for(sku="LORA") is validator_for(sku="LORA")
+    assert validator_for("8.2.1", sku="LORA") is validator_for("8.2.1", sku="LORA")
+
+def test_version_and_sku_combine():
+    """Tests that version and SKU scoping apply together."""
+    assert validator_for("9.1.1", sku="LORA").is_valid({"req": "note.add", "limit": True})
+    assert not validator_for("8.2.1", sku="LORA").is_valid({"req": "note.add", "limit": True})
+    assert not validator_for("9.1.1", sku="LORA").is_valid({"req": "card.wifi"})
+
+def test_unknown_sku():
+    """Tests that unknown SKUs are rejected."""
+    with pytest.raises(ValueError):
+        validator_for(sku="NBIOT")
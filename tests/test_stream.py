@@ -0,0 +1,74 @@
+import io
+
+import pytest
+
+from notecard_schema import Dispatcher
+from notecard_schema import stream
+from notecard_schema.stream import iter_lines, validate_stream
+
+@pytest.fixture(scope="module")
+def dispatcher():
+    return Dispatcher.from_directory()
+
+TRANSCRIPT = (
+    b'{"req":"card.status"}\n'
+    b'\n'
+    b'{"req":"hub.set","mode":"sometimes"}\n'
+    b'{"req":"card.stauts"}\n'
+    b'not json\n'
+    b'{"cmd":"note.add","body":{"temp":21.5}}'
+)
+
+def test_validate_stream_reports_each_line(dispatcher):
+    """Tests that every non-blank line is reported with its line number and API."""
+    results = list(validate_stream(io.BytesIO(TRANSCRIPT), dispatcher))
+    assert [(line_no, api, ok) for line_no, api, ok, _ in results] == [
+        (1, "card.status", True),
+        (3, "hub.set", False),
+        (4, None, False),
+        (5, None, False),
+        (6, "note.add", True),
+    ]
+    assert results[0][3] == []
+    assert any(error.startswith("$.mode:") for error in results[1][3])
+    assert "did you mean 'card.status'?" in results[2][3][0]
+    assert results[3][3][0].startswith("Invalid JSON")
+
+@pytest.mark.parametrize("buffer_size", [1, 7, 64, 1 << 16])
+def test_results_do_not_depend_on_buffer_size(dispatcher, buffer_size):
+    """Tests that lines split across chunk boundaries are reassembled."""
+    expected = list(validate_stream(io.BytesIO(TRANSCRIPT), dispatcher))
+    assert list(validate_stream(io.BytesIO(TRANSCRIPT), dispatcher, buffer_size=buffer_size)) == expected
+
+def test_text_streams_are_accepted(dispatcher):
+    """Tests that text-mode file objects validate the same as binary ones."""
+    expected = list(validate_stream(io.BytesIO(TRANSCRIPT), dispatcher))
+    assert list(validate_stream(io.StringIO(TRANSCRIPT.decode()), dispatcher)) == expected
+
+def test_long_lines_are_skipped_without_buffering():
+    """Tests that lines over the limit are reported and the following lines still read."""
+    data = b'{"req":"card.status"}\n' + b'x' * 100 + b'\n{"req":"card.time"}\n' + b'y' * 100
+    lines = list(iter_lines(io.BytesIO(data), buffer_size=8, max_line_length=32))
+    assert lines == [(1, b'{"req":"card.status"}'), (2, None), (3, b'{"req":"card.time"}'), (4, None)]
+
+def test_long_line_error(dispatcher):
+    """Tests that an overlong line is reported as invalid."""
+    data = b'{"req":"card.status","x":"' + b'a' * 100 + b'"}\n'
+    results = list(validate_stream(io.BytesIO(data), dispatcher, max_line_length=32))
+    assert results == [(1, None, False, ["Line exceeds 32 bytes"])]
+
+def test_main_closes_the_transcript(tmp_path, monkeypatch, capsys):
+    """Tests that the command line closes the transcript file once it is validated."""
+    path = tmp_path / "transcript.jsonl"
+    path.write_bytes(TRANSCRIPT)
+    opened = []
+    def tracking_open(*args, **kwargs):
+        opened.append(open(*args, **kwargs))
+        return opened[-1]
+    monkeypatch.setattr(stream, "open", tracking_open, raising=False)
+    monkeypatch.setattr("sys.argv", ["stream", str(path)])
+    with pytest.raises(SystemExit) as excinfo:
+        stream.main()
+    assert excinfo.value.code == 1
+    assert "Validated 5 transactions, 3 invalid" in capsys.readouterr().out
+    assert len(opened) == 1 and opened[0].closed
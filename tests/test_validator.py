@@ -0,0 +1,54 @@
+import pytest
+import jsonschema
+
+from notecard_schema import Dispatcher, SchemaValidator
+from notecard_schema.loader import load_schema
+
+SCHEMA_FILE = "card.status.req.notecard.api.json"
+
+@pytest.fixture
+def validator(schema):
+    return SchemaValidator(schema)
+
+def test_is_valid_does_not_build_errors(validator, monkeypatch):
+    """Tests that the boolean fast path never constructs ValidationErrors or a jsonschema validator."""
+    def fail(*args, **kwargs):
+        raise AssertionError("ValidationError constructed on the fast path")
+    monkeypatch.setattr(jsonschema.exceptions._Error, "__init__", fail)
+    assert validator.is_valid({"req": "card.status"})
+    assert not validator.is_valid({"req": "card.status", "extra": "field"})
+    assert not validator.is_valid({"req": "card.status", "cmd": "card.status"})
+    assert validator._validator is None
+
+def test_explain_valid_instance_is_empty(validator):
+    """Tests that a valid instance has an empty error tree."""
+    tree = validator.explain({"req": "card.status"})
+    assert tree.total_errors == 0
+
+def test_explain_invalid_instance(validator):
+    """Tests that explain materializes the full error tree on demand."""
+    tree = validator.explain({"req": "card.status", "extra": "field"})
+    assert tree.total_errors == 1
+    assert tree.errors["unevaluatedProperties"].message == "Unevaluated properties are not allowed ('extra' was unexpected)"
+
+def test_validate_matches_jsonschema(validator, schema):
+    """Tests that validate raises the same best-match error as jsonschema.validate."""
+    instance = {"cmd": "invalid.command"}
+    with pytest.raises(jsonschema.ValidationError) as expected:
+        jsonschema.validate(instance=instance, schema=schema)
+    with pytest.raises(jsonschema.ValidationError) as excinfo:
+        validator.validate(instance)
+    assert excinfo.value.message == expected.value.message
+
+def test_unsupported_schema_falls_back_to_jsonschema():
+    """Tests that schemas the compiler rejects are still validated."""
+    validator = SchemaValidator({"type": "array", "uniqueItems": True})
+    assert validator.is_valid([1, 2])
+    assert not validator.is_valid([1, 1])
+
+def test_dispatcher_explain():
+    """Tests that the dispatcher error tree nests the dispatched schema errors."""
+    dispatcher = Dispatcher.from_directory()
+    assert dispatcher.explain({"req": "card.status"}).total_errors == 0
+    tree = dispatcher.explain({"req": "card.status", "extra": "field"})
+    assert tree.errors["oneOf"].context[0].validator == "unevaluatedProperties"